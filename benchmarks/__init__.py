@@ -0,0 +1,4 @@
+"""
+This package contains benchmark scripts for the robot server.
+Each module can be run with ``python -m benchmarks.<module>`` from the repository root.
+"""
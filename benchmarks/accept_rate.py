@@ -0,0 +1,73 @@
+"""
+Benchmark of the accept loop: many clients connect at once and close the connection
+immediately, and the number of connections the server accepts per second is reported.
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+from robot_server.server import RobotServer, AsyncRobotServer, PooledRobotServer
+
+ENGINES = {
+    "thread": RobotServer,
+    "async": AsyncRobotServer,
+    "pool": PooledRobotServer,
+}
+
+
+async def _connect(host, port, limit: asyncio.Semaphore) -> bool:
+    """
+    Opens one connection and closes it right away.
+    """
+    async with limit:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            return False
+        writer.close()
+        return True
+
+
+async def _run_clients(host, port, connections, concurrency):
+    """
+    Opens all connections, at most concurrency of them at the same time.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(_connect(host, port, limit) for _ in range(connections)))
+    return sum(results)
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--connections", type=int, default=5000)
+    parser.add_argument("-c", "--concurrency", type=int, default=500)
+    parser.add_argument("-b", "--backlog", type=int, default=socket.SOMAXCONN)
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="thread")
+    parser.add_argument("-p", "--port", type=int, default=61111)
+    args = parser.parse_args()
+
+    server = ENGINES[args.engine]("127.0.0.1", args.port, backlog=args.backlog)
+    threading.Thread(target=server.start, daemon=True).start()
+    time.sleep(0.5)
+    start = time.perf_counter()
+    try:
+        connected = asyncio.run(_run_clients("127.0.0.1", args.port,
+                                             args.connections, args.concurrency))
+        while server.sessions.total < connected and time.perf_counter() - start < 60:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+    print(f"engine={args.engine} backlog={args.backlog} connected={connected} "
+          f"accepted={server.sessions.total} elapsed={elapsed:.2f}s "
+          f"({server.sessions.total / elapsed:.0f} connections/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark sweeping a grid of starting positions in all four rotations with the vectorised
+batch simulator, compared with the scalar simulator on a random sample of the same starts.
+Reports simulated robots per second and the distribution of the command counts,
+and can save the heatmap of the command counts as a NumPy file. Requires NumPy.
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from robot_server.server.batch_simulator import command_heatmap
+from robot_server.server.map import RobotMap, Rotation
+from robot_server.server.simulator import World, simulate, MAX_COMMANDS, DEFAULT_DENSITY
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--radius", type=int, default=100,
+                        help="the maximal coordinate of the starts and of the obstacles")
+    parser.add_argument("-t", "--step", type=int, default=1,
+                        help="the distance between neighbouring starts")
+    parser.add_argument("-d", "--density", type=float, default=DEFAULT_DENSITY,
+                        help="the number of obstacle attempts per coordinate")
+    parser.add_argument("-n", "--sample", type=int, default=2000,
+                        help="the number of starts simulated by the scalar simulator")
+    parser.add_argument("-o", "--output", help="the .npy file to save the heatmap to")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    world = World.generate(rng, args.radius, args.density)
+
+    start_time = time.perf_counter()
+    heatmap = command_heatmap(world.obstacles, args.radius, args.step)
+    elapsed = time.perf_counter() - start_time
+    commands = heatmap[heatmap >= 0]
+    print(f"  batch: {commands.size:>8} robots, {commands.size / elapsed:9.0f} robots/s")
+
+    max_commands = MAX_COMMANDS + 4 * args.radius
+    starts = [world.random_start(rng, args.radius) for _ in range(args.sample)]
+    start_time = time.perf_counter()
+    for position, rotation in starts:
+        simulate(RobotMap(), world, position, rotation, max_commands)
+    elapsed = time.perf_counter() - start_time
+    print(f" scalar: {args.sample:>8} robots, {args.sample / elapsed:9.0f} robots/s")
+
+    print(f"commands: mean {commands.mean():.1f}, median {np.median(commands):.0f}, "
+          f"max {commands.max()}, {(commands == max_commands).sum()} unreached")
+    for rotation in Rotation:
+        rotation_commands = heatmap[rotation.value]
+        print(f"{rotation.name:>8}: mean {rotation_commands[rotation_commands >= 0].mean():.1f}")
+    if args.output:
+        np.save(args.output, heatmap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark that starts many robot sessions at once and drives each of them
+through a complete conversation (authentication, two moves and the secret message).
+Sessions can't stay idle because of the protocol TIMEOUT,
+so the peak number of concurrently open sessions is reported.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from robot_server.server import RobotServer, AsyncRobotServer, PooledRobotServer
+
+ENGINES = {
+    "thread": RobotServer,
+    "async": AsyncRobotServer,
+    "pool": PooledRobotServer,
+}
+
+CONVERSATION = [
+    (b"Oompa Loompa\a\b", b"107 KEY REQUEST\a\b"),
+    (b"0\a\b", b"64907\a\b"),
+    (b"8389\a\b", b"200 OK\a\b102 MOVE\a\b"),
+    (b"OK 0 -1\a\b", b"102 MOVE\a\b"),
+    (b"OK 0 0\a\b", b"105 GET MESSAGE\a\b"),
+    (b"Tajny vzkaz.\a\b", b"106 LOGOUT\a\b"),
+]
+
+
+async def _read_exactly(reader: asyncio.StreamReader, expected: bytes) -> bool:
+    """
+    Reads the expected response, which might arrive in several parts.
+    """
+    data = await reader.readexactly(len(expected))
+    return data == expected
+
+
+async def _robot(host, port, active: list) -> bool:
+    """
+    Connects and runs the conversation.
+    The first item of active is the number of open sessions, the second one its peak.
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return False
+    active[0] += 1
+    active[1] = max(active)
+    try:
+        for message, response in CONVERSATION:
+            writer.write(message)
+            if not await _read_exactly(reader, response):
+                return False
+        return True
+    except (OSError, asyncio.IncompleteReadError):
+        return False
+    finally:
+        active[0] -= 1
+        writer.close()
+
+
+async def _run_clients(host, port, sessions):
+    """
+    Starts all sessions at once and waits until they finish.
+    """
+    active = [0, 0]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_robot(host, port, active) for _ in range(sessions)))
+    return time.perf_counter() - start, sum(results), active[1]
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--sessions", type=int, default=1000)
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="async")
+    parser.add_argument("-p", "--port", type=int, default=61111)
+    args = parser.parse_args()
+
+    server = ENGINES[args.engine]("127.0.0.1", args.port)
+    threading.Thread(target=server.start, daemon=True).start()
+    time.sleep(0.5)
+    try:
+        elapsed, succeeded, peak = asyncio.run(_run_clients("127.0.0.1", args.port, args.sessions))
+    finally:
+        server.stop()
+    print(f"engine={args.engine} sessions={args.sessions} "
+          f"succeeded={succeeded} peak_concurrent={peak} elapsed={elapsed:.2f}s "
+          f"({succeeded / elapsed:.0f} sessions/s)")
+
+
+if __name__ == "__main__":
+    main()
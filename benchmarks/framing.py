@@ -0,0 +1,78 @@
+"""
+Microbenchmark of splitting the received bytes into messages: the MessageFramer
+against the previous approach of concatenating bytes and running
+ClientMessages.matches_message and parse_message over the whole stack.
+"""
+
+import argparse
+import time
+
+from robot_server.server.framing import MessageFramer
+from robot_server.server.messages import ClientMessages
+
+END = b"\a\b"
+
+
+def regex_framing(chunks: list[bytes]) -> int:
+    """
+    Frames the chunks the way RobotThread did before the MessageFramer.
+    """
+    stack = b""
+    frames = 0
+    for chunk in chunks:
+        stack += chunk
+        while ClientMessages.matches_message(stack, END):
+            _, stack = ClientMessages.parse_message(stack, END)
+            frames += 1
+    return frames
+
+
+def framer_framing(chunks: list[bytes]) -> int:
+    """
+    Frames the chunks with the MessageFramer.
+    """
+    framer = MessageFramer(END)
+    frames = 0
+    for chunk in chunks:
+        framer.feed(chunk)
+        for _ in framer.frames():
+            frames += 1
+    return frames
+
+
+def measure(function, chunks, repeat) -> float:
+    """
+    Returns the best time of several runs.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(chunks)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    secret = b"x" * 98 + END
+    scenarios = {
+        "100-byte message, 1 byte per recv": [bytes([b]) for b in secret],
+        "100 messages in one packet": [(b"OK -12 345" + END) * 100],
+        "1000 messages, 1 byte per recv": [bytes([b]) for b in (b"OK 1 2" + END) * 1000],
+    }
+    for name, chunks in scenarios.items():
+        assert regex_framing(chunks) == framer_framing(chunks)
+        old = measure(regex_framing, chunks, args.repeat)
+        new = measure(framer_framing, chunks, args.repeat)
+        print(f"{name:>36}: regex {old * 1e6:9.1f} us, framer {new * 1e6:9.1f} us "
+              f"({old / new:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
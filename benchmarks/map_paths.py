@@ -0,0 +1,72 @@
+"""
+Benchmark driving RobotMap.update_position along long paths through a field of
+obstacles, reporting the number of processed positions per second.
+The obstacles lie on every coordinate with x - 2y divisible by 5, which is the densest
+placement where all the neighbours of an obstacle are free, so the robot runs into
+an obstacle every few steps and the set of banned positions keeps growing.
+"""
+
+import argparse
+import time
+
+from robot_server.server.map import RobotMap, Action, Rotation, add_positions
+
+
+def is_obstacle(position: tuple) -> bool:
+    """
+    Returns whether there is an obstacle on the position.
+    """
+    return (position[0] - 2 * position[1]) % 5 == 0 and position != (0, 0)
+
+
+def drive(start: tuple, rotation: Rotation, limit: int) -> tuple[int, int]:
+    """
+    Drives a robot from the start to the center of the map.
+
+    :param start: The starting position of the robot.
+    :param rotation: The starting rotation of the robot.
+    :param limit: The maximum number of steps.
+    :return: The number of steps and the number of banned positions.
+    """
+    robot_map = RobotMap()
+    position = start
+    for step in range(1, limit + 1):
+        action = robot_map.update_position(position)
+        if position == (0, 0) and step > 1:
+            return step, len(robot_map.banned_positions)
+        if action == Action.MOVE:
+            next_position = add_positions(position, rotation.to_coordinate())
+            if not is_obstacle(next_position):
+                position = next_position
+        elif action == Action.TURN_LEFT:
+            rotation = Rotation((rotation.value + 3) % 4)
+        else:
+            rotation = Rotation((rotation.value + 1) % 4)
+    raise RuntimeError(f"The robot didn't reach the center from {start} in {limit} steps")
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-d", "--distances", type=int, nargs="+", default=[200, 2000, 9000],
+                        help="distances of the starting positions from the center")
+    args = parser.parse_args()
+
+    for distance in args.distances:
+        starts = [((-distance, -distance), Rotation.UP), ((distance, distance), Rotation.LEFT),
+                  ((0, -distance), Rotation.UP), ((-distance, 0), Rotation.RIGHT)]
+        steps = banned = 0
+        start_time = time.perf_counter()
+        for start, rotation in starts:
+            path_steps, path_banned = drive(start, rotation, 100 * distance)
+            steps += path_steps
+            banned = max(banned, path_banned)
+        elapsed = time.perf_counter() - start_time
+        print(f"distance={distance:>5}: {steps:>7} positions, up to {banned:>5} banned, "
+              f"{steps / elapsed:10.0f} positions/s")
+
+
+if __name__ == "__main__":
+    main()
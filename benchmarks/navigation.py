@@ -0,0 +1,100 @@
+"""
+Benchmark comparing the registered navigation strategies by the number of commands they
+need to bring a robot to the center, simulated offline on random obstacle fields which
+follow the rules of the task, and by the CPU time they spend per decision. Reports
+the distributions of the commands, moves, turns and crashes over the seeds. A part of
+the obstacles can be made known to the maps in advance, as if earlier robots had found them.
+The decisions are timed by replaying the calls recorded during the simulation
+to fresh strategies, so the simulated world isn't counted.
+"""
+
+import argparse
+import functools
+import time
+
+from robot_server.server.map import NavigationStrategy
+from robot_server.server.navigation import STRATEGIES
+from robot_server.server.simulator import simulate_seeds, Summary
+
+
+class RecordingStrategy(NavigationStrategy):
+    """
+    Strategy forwarding the calls to another strategy and recording them.
+    """
+    def __init__(self, strategy: NavigationStrategy, calls: list):
+        """
+        :param strategy: The strategy the calls are forwarded to.
+        :param calls: The list the names and arguments of the calls are appended to.
+        """
+        self.strategy = strategy
+        self.calls = calls
+
+    def update_position(self, position):
+        self.calls.append(("update_position", position))
+        return self.strategy.update_position(position)
+
+    def get_map_state(self):
+        return self.strategy.get_map_state()
+
+    def add_obstacle(self, position):
+        self.calls.append(("add_obstacle", position))
+        self.strategy.add_obstacle(position)
+
+
+def recording_strategy(strategy_class, sessions: list[list]) -> RecordingStrategy:
+    """
+    Creates a strategy recording its calls to a new list appended to the sessions.
+
+    :param strategy_class: The class of the recorded strategy.
+    :param sessions: The list of the recorded calls of every session.
+    """
+    sessions.append([])
+    return RecordingStrategy(strategy_class(), sessions[-1])
+
+
+def replay_time(strategy_class, sessions: list[list]) -> float:
+    """
+    Replays the recorded calls of every session to a new strategy.
+
+    :return: The CPU time of the replay, in seconds.
+    """
+    start_time = time.process_time()
+    for calls in sessions:
+        strategy = strategy_class()
+        for method, position in calls:
+            getattr(strategy, method)(position)
+    return time.process_time() - start_time
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--runs", type=int, default=1000)
+    parser.add_argument("-r", "--radius", type=int, default=20,
+                        help="the maximal coordinate of the start and of the obstacles")
+    parser.add_argument("-d", "--density", type=float, default=0.15,
+                        help="the number of obstacle attempts per coordinate")
+    parser.add_argument("-k", "--known", type=float, default=0.0,
+                        help="the fraction of the obstacles known in advance")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="the first seed")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.runs)
+    for name, strategy_class in STRATEGIES.items():
+        sessions: list[list] = []
+        summary = Summary.of(simulate_seeds(
+            functools.partial(recording_strategy, strategy_class, sessions),
+            seeds, args.radius, args.density, args.known))
+        decisions = sum(method == "update_position" for calls in sessions
+                        for method, _ in calls)
+        elapsed = replay_time(strategy_class, sessions)
+        print(f"{name} ({summary.runs} runs, {1e6 * elapsed / decisions:.2f} us/decision, "
+              f"{summary.unreached} unreached, {summary.broken} broken):")
+        for metric in ("commands", "moves", "turns", "crashes"):
+            print(f"  {metric:>8}: {getattr(summary, metric)}")
+
+
+if __name__ == "__main__":
+    main()
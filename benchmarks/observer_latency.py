@@ -0,0 +1,77 @@
+"""
+Benchmark measuring the latency of the responses of RobotSession, fed one message at a time,
+when every session has a slow observer, e.g. the GUI or a log on a slow disk. Compares
+observers called from the session with observers called by an EventDispatcher
+with every overflow policy, and reports the dropped and coalesced events.
+"""
+
+import argparse
+import statistics
+import time
+
+from robot_server.server.dispatcher import EventDispatcher, OverflowPolicy
+from robot_server.server.session import RobotSession
+from robot_server.server.thread_observer import RobotThreadObserver
+
+from .session_throughput import CONVERSATION
+
+
+class SlowObserver(RobotThreadObserver):
+    """
+    Observer spending the given time on every event.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def on_thread_event(self, event):
+        time.sleep(self.delay)
+
+
+def run(sessions: int, delay: float, dispatcher) -> list[float]:
+    """
+    Runs the given number of conversations and returns the latencies of the feeds.
+    """
+    latencies = []
+    observer = SlowObserver(delay)
+    for _ in range(sessions):
+        session = RobotSession(("127.0.0.1", 0), dispatcher=dispatcher)
+        session.add_observer(observer)
+        for message in CONVERSATION:
+            start_time = time.perf_counter()
+            session.feed(message)
+            latencies.append(time.perf_counter() - start_time)
+    return latencies
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--sessions", type=int, default=50)
+    parser.add_argument("-d", "--delay", type=float, default=0.001,
+                        help="the time the observer spends on every event, in seconds")
+    parser.add_argument("-q", "--queue", type=int, default=100,
+                        help="the capacity of the queue of the dispatcher")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions, observer spending {1e3 * args.delay:.1f} ms per event")
+    for policy in [None, *OverflowPolicy]:
+        dispatcher = EventDispatcher(args.queue, policy) if policy is not None else None
+        latencies = sorted(run(args.sessions, args.delay, dispatcher))
+        p99 = latencies[int(0.99 * (len(latencies) - 1))]
+        counts = f", {dispatcher.dropped} dropped, {dispatcher.coalesced} coalesced" \
+            if dispatcher is not None else ""
+        print(f"{policy.value if policy is not None else 'synchronous':>12}: "
+              f"median {1e6 * statistics.median(latencies):8.1f} us, "
+              f"p99 {1e6 * p99:8.1f} us{counts}")
+        if dispatcher is not None:
+            dispatcher.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark of the overhead of the observers of RobotSession per processed client message,
+with no observers as in the command line mode, and with 1 and 10 observers subscribed
+to all the events or only to the state updates.
+"""
+
+import argparse
+import time
+
+from robot_server.bridge.thread_event import StateUpdate
+from robot_server.server.session import RobotSession
+from robot_server.server.thread_observer import RobotThreadObserver
+
+from .session_throughput import CONVERSATION
+
+
+class NullObserver(RobotThreadObserver):
+    """
+    Observer ignoring the events.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def on_thread_event(self, event):
+        pass
+
+
+def run(sessions: int, observers: int, events) -> float:
+    """
+    Runs the given number of conversations, fed one message at a time.
+
+    :param sessions: The number of conversations.
+    :param observers: The number of observers of every session.
+    :param events: The event types the observers subscribe to, None for all.
+    :return: The time per message, in seconds.
+    """
+    start_time = time.perf_counter()
+    for _ in range(sessions):
+        session = RobotSession(("127.0.0.1", 0))
+        for _ in range(observers):
+            session.add_observer(NullObserver(), events)
+        for message in CONVERSATION:
+            session.feed(message)
+    return (time.perf_counter() - start_time) / (sessions * len(CONVERSATION))
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--sessions", type=int, default=5000)
+    args = parser.parse_args()
+
+    for observers, events in ((0, None), (1, None), (10, None),
+                              (1, {StateUpdate}), (10, {StateUpdate})):
+        elapsed = run(args.sessions, observers, events)
+        subscription = "all events" if events is None else "state updates"
+        print(f"{observers:2} observers ({subscription:>13}): {1e6 * elapsed:6.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of the MappedObstacleStore, which keeps the obstacles in a memory-mapped file.
+Records random obstacles over the coordinates of the protocol, and compares the startup
+time and the lookup latency with an ObstacleStore loaded from a file of coordinates,
+which has to build a set of all the obstacles before the first lookup.
+"""
+
+import argparse
+import array
+import gc
+import os
+import random
+import tempfile
+import time
+
+from robot_server.server.obstacles import ObstacleStore, MappedObstacleStore
+
+
+def load_store(path: str) -> ObstacleStore:
+    """
+    Loads an ObstacleStore from a file of coordinates.
+    """
+    coordinates = array.array("i")
+    with open(path, "rb") as file:
+        coordinates.frombytes(file.read())
+    store = ObstacleStore()
+    store._positions.update(zip(coordinates[::2], coordinates[1::2]))  # pylint: disable=W0212
+    return store
+
+
+def lookup_latency(store, queries: list) -> float:
+    """
+    Returns the mean time of a lookup in the store, in seconds.
+    """
+    start_time = time.perf_counter()
+    for query in queries:
+        _ = query in store
+    return (time.perf_counter() - start_time) / len(queries)
+
+
+def random_obstacles(count: int, query_count: int, seed: int) -> tuple[list, list]:
+    """
+    Returns random obstacles over the coordinates of the protocol, and the queries
+    of the lookups, half of them of the obstacles.
+    """
+    rng = random.Random(seed)
+    obstacles = [(rng.randint(-9999, 9999), rng.randint(-9999, 9999))
+                 for _ in range(count)]
+    queries = [rng.choice(obstacles) if index % 2 else
+               (rng.randint(-9999, 9999), rng.randint(-9999, 9999))
+               for index in range(query_count)]
+    return obstacles, queries
+
+
+def record_obstacles(obstacles: list, mapped_path: str, list_path: str):
+    """
+    Records the obstacles to a MappedObstacleStore and to a file of coordinates,
+    and reports the recording time of the MappedObstacleStore.
+    """
+    start_time = time.perf_counter()
+    mapped = MappedObstacleStore(mapped_path)
+    for obstacle in obstacles:
+        mapped.add(obstacle)
+    mapped.close()
+    elapsed = time.perf_counter() - start_time
+    with open(list_path, "wb") as file:
+        array.array("i", [c for obstacle in obstacles for c in obstacle]).tofile(file)
+    print(f"{len(obstacles)} obstacles recorded in {elapsed:.2f}s, "
+          f"file {os.path.getsize(mapped_path) / 2 ** 20:.1f} MiB")
+
+
+def measure_store(name: str, opener, path: str, queries: list):
+    """
+    Reports the startup time and the lookup latency of a store opened from the path.
+    """
+    gc.collect()
+    gc.disable()  # a collection of the queries would be counted to the startup
+    start_time = time.perf_counter()
+    store = opener(path)
+    startup = time.perf_counter() - start_time
+    gc.enable()
+    latency = lookup_latency(store, queries)
+    print(f"{name:>19}: startup {1e3 * startup:8.2f} ms, "
+          f"lookup {1e9 * latency:6.0f} ns, {len(store)} obstacles")
+    if isinstance(store, MappedObstacleStore):
+        store.close()
+    del store  # freeing the set would be counted to the next startup
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--obstacles", type=int, default=1000000)
+    parser.add_argument("-q", "--queries", type=int, default=1000000,
+                        help="the number of lookups, half of them of recorded obstacles")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    obstacles, queries = random_obstacles(args.obstacles, args.queries, args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        mapped_path = os.path.join(directory, "obstacles.bin")
+        list_path = os.path.join(directory, "obstacles.raw")
+        record_obstacles(obstacles, mapped_path, list_path)
+        for name, opener, path in (("ObstacleStore", load_store, list_path),
+                                   ("MappedObstacleStore", MappedObstacleStore, mapped_path)):
+            measure_store(name, opener, path, queries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark that drives complete conversations through RobotSession in-process,
+without any sockets, and reports the number of processed client messages per second.
+"""
+
+import argparse
+import time
+
+from robot_server.server.session import RobotSession
+
+CONVERSATION = [
+    b"Oompa Loompa\a\b",
+    b"0\a\b",
+    b"8389\a\b",
+    b"OK 0 -3\a\b",
+    b"OK 0 -2\a\b",
+    b"RECHARGING\a\b",
+    b"FULL POWER\a\b",
+    b"OK 0 -1\a\b",
+    b"OK 0 0\a\b",
+    b"Tajny vzkaz.\a\b",
+]
+
+
+def run(sessions: int, chunked: bool) -> float:
+    """
+    Runs the given number of sessions and returns the elapsed time.
+
+    :param sessions: Number of complete conversations.
+    :param chunked: Whether to feed the whole conversation in one chunk.
+    """
+    joined = b"".join(CONVERSATION)
+    start = time.perf_counter()
+    for _ in range(sessions):
+        session = RobotSession(("127.0.0.1", 0))
+        if chunked:
+            session.feed(joined)
+        else:
+            for message in CONVERSATION:
+                session.feed(message)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    for chunked in (False, True):
+        elapsed = run(args.sessions, chunked)
+        messages = args.sessions * len(CONVERSATION)
+        print(f"{'pipelined' if chunked else 'one message per feed':>22}: "
+              f"{messages / elapsed:10.0f} messages/s, "
+              f"{elapsed / args.sessions * 1e6:8.1f} us/session")
+
+
+if __name__ == "__main__":
+    main()
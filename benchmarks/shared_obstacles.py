@@ -0,0 +1,69 @@
+"""
+Benchmark comparing the sessions of robots which navigate the same obstacle field one after
+another, each finding the obstacles on its own and sharing the found obstacles through
+an ObstacleStore. Reports the distributions of the commands and crashes per session
+for every registered navigation strategy, simulated offline.
+"""
+
+import argparse
+import random
+
+from robot_server.server.navigation import STRATEGIES
+from robot_server.server.obstacles import ObstacleStore
+from robot_server.server.simulator import World, Summary, simulate, DEFAULT_DENSITY
+
+
+def run_sessions(map_class, world: World, starts: list, shared: bool) -> Summary:
+    """
+    Simulates a session per start in the world.
+
+    :param map_class: The class of the maps.
+    :param world: The world of all the sessions.
+    :param starts: The positions and rotations of the robots, in order of the sessions.
+    :param shared: Whether the sessions share the found obstacles.
+    :return: The summary of the sessions.
+    """
+    store = ObstacleStore() if shared else None
+    return Summary.of([simulate(map_class(store), world, position, rotation)
+                       for position, rotation in starts])
+
+
+def parse_field(parser: argparse.ArgumentParser, robots: int, radius: int) -> tuple:
+    """
+    Adds the arguments of a random obstacle field with robots to the parser,
+    parses the command line and generates the field.
+
+    :param parser: The parser of the benchmark.
+    :param robots: The default number of robots.
+    :param radius: The default maximal coordinate of the starts and of the obstacles.
+    :return: The parsed arguments, the world and the starts of the robots.
+    """
+    parser.add_argument("-n", "--robots", type=int, default=robots)
+    parser.add_argument("-r", "--radius", type=int, default=radius,
+                        help="the maximal coordinate of the starts and of the obstacles")
+    parser.add_argument("-d", "--density", type=float, default=DEFAULT_DENSITY,
+                        help="the number of obstacle attempts per coordinate")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    world = World.generate(rng, args.radius, args.density)
+    return args, world, [world.random_start(rng, args.radius) for _ in range(args.robots)]
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    args, world, starts = parse_field(argparse.ArgumentParser(description=__doc__), 1000, 20)
+    print(f"{args.robots} robots, {len(world.obstacles)} obstacles")
+    for name, map_class in STRATEGIES.items():
+        for mode in ("private", "shared"):
+            summary = run_sessions(map_class, world, starts, mode == "shared")
+            print(f"{name} ({mode} obstacles, {summary.unreached} unreached):")
+            for metric in ("commands", "crashes"):
+                print(f"  {metric:>8}: {getattr(summary, metric)}")
+
+
+if __name__ == "__main__":
+    main()
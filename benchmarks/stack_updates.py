@@ -0,0 +1,83 @@
+"""
+Benchmark counting the events delivered to an observer of RobotSession when the robots
+send their secret message one byte at a time, with the observer called from the session
+and called by an EventDispatcher, with and without a stack interval.
+"""
+
+import argparse
+import time
+
+from robot_server.bridge.thread_event import MessageStackUpdate
+from robot_server.server.dispatcher import EventDispatcher
+from robot_server.server.session import RobotSession
+from robot_server.server.thread_observer import RobotThreadObserver
+
+from .session_throughput import CONVERSATION
+
+SECRET = b"Tajny vzkaz. " * 7 + b"Konec\a\b"
+
+
+class CountingObserver(RobotThreadObserver):
+    """
+    Observer counting the events and the bytes of the message stacks it received.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        super().__init__()
+        self.events = 0
+        self.stack_updates = 0
+        self.stack_bytes = 0
+
+    def on_thread_event(self, event):
+        self.events += 1
+        if isinstance(event, MessageStackUpdate):
+            self.stack_updates += 1
+            self.stack_bytes += len(event.message_stack)
+
+
+def run(sessions: int, delay: float, dispatcher) -> CountingObserver:
+    """
+    Runs the conversations, the secret message fed byte by byte with the given delay.
+    """
+    observer = CountingObserver()
+    for _ in range(sessions):
+        session = RobotSession(("127.0.0.1", 0), dispatcher=dispatcher)
+        session.add_observer(observer)
+        for message in CONVERSATION[:-1]:
+            session.feed(message)
+        for byte in SECRET:
+            session.feed(bytes([byte]))
+            time.sleep(delay)
+    if dispatcher is not None:
+        dispatcher.flush()
+    return observer
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--sessions", type=int, default=10)
+    parser.add_argument("-d", "--delay", type=float, default=0.001,
+                        help="the time between two bytes of the secret message, in seconds")
+    parser.add_argument("-i", "--interval", type=float, default=0.05,
+                        help="the stack interval of the dispatcher, in seconds")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions, {len(SECRET)} byte secret message, "
+          f"a byte every {1e3 * args.delay:.1f} ms")
+    for name, dispatcher in (("synchronous", None),
+                             ("dispatcher", EventDispatcher()),
+                             (f"interval {args.interval}s",
+                              EventDispatcher(stack_interval=args.interval))):
+        observer = run(args.sessions, args.delay, dispatcher)
+        print(f"{name:>15}: {observer.events / args.sessions:6.1f} events/session, "
+              f"{observer.stack_updates / args.sessions:6.1f} stack updates/session, "
+              f"{observer.stack_bytes / args.sessions:7.0f} stack bytes/session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark comparing the shared transition table of RobotSession with a
+transitions.Machine built for every session from the same table, as the sessions
+used to do. Reports the cost of setting up a session and of a complete conversation.
+The transitions package is only needed for the comparison (pip install transitions).
+"""
+
+import argparse
+import time
+
+from robot_server.server.session import RobotSession
+
+from .session_throughput import CONVERSATION
+
+try:
+    from transitions import Machine, State
+except ImportError:
+    Machine = State = None
+
+
+def _bind(callback, session):
+    """
+    Adapts a table callback taking the session to a transitions callback.
+    """
+    if callback is None:
+        return []
+    return [lambda classification=None, **kwargs: callback(session, classification)]
+
+
+class _TransitionsMachine:
+    """
+    Per-session transitions.Machine with the interface of the shared StateMachine.
+    """
+
+    # pylint: disable=unused-argument
+    def __init__(self, session: RobotSession):
+        table = RobotSession.machine
+        self.states = table.states
+        states = []
+        for index, state in enumerate(table.states):
+            on_enter = [lambda index=index, **kwargs: setattr(session, "state_index", index)]
+            if state.on_enter is not None:
+                on_enter.append(lambda callback=state.on_enter, **kwargs: callback(session))
+            on_exit = [lambda callback=state.on_exit, **kwargs: callback(session)] \
+                if state.on_exit is not None else []
+            states.append(State(state.name, on_enter=on_enter, on_exit=on_exit))
+        self.machine = Machine(model=self, states=states, initial=states[0],
+                               after_state_change=lambda **kwargs:
+                               table.after_state_change(session))
+        for transition in RobotSession.transitions:
+            conditions = []
+            if transition.message is not None:
+                conditions.append(lambda classification, transition=transition, **kwargs:
+                                  classification.passes(transition.message, transition.level))
+            if transition.condition is not None:
+                conditions.append(lambda classification, transition=transition, **kwargs:
+                                  transition.condition(session, classification))
+            self.machine.add_transition("process_message", transition.source, transition.dest,
+                                        conditions=conditions,
+                                        before=_bind(transition.before, session),
+                                        after=_bind(transition.after, session))
+
+    def process(self, session, classification):
+        """
+        Triggers the transition for a classified message.
+        """
+        # pylint: disable=no-member
+        return self.process_message(classification=classification)
+
+    def go_to(self, session, name):
+        """
+        Moves to the given state.
+        """
+        getattr(self, f"to_{name}")()
+
+
+class TransitionsSession(RobotSession):
+    """
+    RobotSession dispatching through its own transitions.Machine.
+    """
+    def __init__(self, address):
+        super().__init__(address)
+        self.machine = _TransitionsMachine(self)
+
+
+def run(session_class, sessions: int) -> tuple[float, float]:
+    """
+    Sets up the given number of sessions, then runs a conversation through each.
+
+    :return: The elapsed time of the setup and of the conversations.
+    """
+    start = time.perf_counter()
+    created = [session_class(("127.0.0.1", 0)) for _ in range(sessions)]
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for session in created:
+        for message in CONVERSATION:
+            session.feed(message)
+    return setup, time.perf_counter() - start
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--sessions", type=int, default=2000)
+    args = parser.parse_args()
+
+    engines = {"table": RobotSession}
+    if Machine is not None:
+        engines["transitions"] = TransitionsSession
+    else:
+        print("transitions is not installed, skipping the comparison")
+
+    for name, session_class in engines.items():
+        setup, elapsed = run(session_class, args.sessions)
+        messages = args.sessions * len(CONVERSATION)
+        print(f"{name:>12}: setup {setup / args.sessions * 1e6:8.1f} us/session, "
+              f"{messages / elapsed:10.0f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
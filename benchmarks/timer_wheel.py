@@ -0,0 +1,98 @@
+"""
+Benchmark of the TimerWheel with many armed timers: arming, re-arming every timer
+(as the pool engine does after each received message) and expiring them,
+compared with a heap of deadlines with lazy invalidation.
+"""
+
+import argparse
+import heapq
+import random
+import time
+
+from robot_server.server.timer_wheel import TimerWheel
+
+
+def bench_wheel(timers: int, now: float) -> dict:
+    """
+    Measures the TimerWheel operations.
+    """
+    keys = [object() for _ in range(timers)]
+    wheel = TimerWheel(now=now)
+    results = {}
+
+    start = time.perf_counter()
+    for key in keys:
+        wheel.arm(key, 1, now=now)
+    results["arm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        wheel.arm(key, random.choice((1, 5)), now=now + 0.5)
+    results["re-arm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expired = 0
+    tick = now + 0.5
+    while len(wheel):
+        tick += 0.01
+        expired += len(wheel.expire(now=tick))
+    results["expire"] = time.perf_counter() - start
+    assert expired == timers
+    return results
+
+
+def bench_heap(timers: int, now: float) -> dict:
+    """
+    Measures the same operations on a heap of deadlines.
+    """
+    keys = [object() for _ in range(timers)]
+    heap = []
+    deadlines = {}
+    results = {}
+
+    start = time.perf_counter()
+    for key in keys:
+        deadlines[key] = now + 1
+        heapq.heappush(heap, (now + 1, id(key), key))
+    results["arm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        deadline = now + 0.5 + random.choice((1, 5))
+        deadlines[key] = deadline
+        heapq.heappush(heap, (deadline, id(key), key))
+    results["re-arm"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expired = 0
+    tick = now + 0.5
+    while deadlines:
+        tick += 0.01
+        while heap and heap[0][0] <= tick:
+            deadline, _, key = heapq.heappop(heap)
+            if deadlines.get(key) == deadline:
+                del deadlines[key]
+                expired += 1
+    results["expire"] = time.perf_counter() - start
+    assert expired == timers
+    return results
+
+
+def main():
+    """
+    Runs the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--timers", type=int, default=100_000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    for name, bench in (("timer wheel", bench_wheel), ("heap", bench_heap)):
+        results = bench(args.timers, 1000.0)
+        print(f"{name:>12}: " + ", ".join(
+            f"{operation} {elapsed / args.timers * 1e9:6.0f} ns/timer"
+            for operation, elapsed in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,17 @@ This module is the entry point for the robot server application.
 """
 
 import sys
+import socket
 import argparse
 import re
 import logging
+from functools import partial
 
-from .server import RobotServer
+from .server import RobotServer, AsyncRobotServer, PooledRobotServer
+from .server.dispatcher import EventDispatcher, OverflowPolicy, DEFAULT_CAPACITY
+from .server.multiprocess import MultiProcessRobotServer
+from .server.navigation import STRATEGIES, DEFAULT_STRATEGY, get_strategy
+from .server.obstacles import ObstacleStore, SharedMemoryObstacleStore, MappedObstacleStore
 
 
 def port_type(port):
@@ -37,12 +43,64 @@ parser.add_argument('-g', '--gui', default=False, action='store_true', help='run
 parser.add_argument('-v', '--verbose', default=False,
                     action='store_true', help='print messages to console')
 parser.add_argument('-l', '--log', metavar='file', type=str, default=None, help='log file')
+parser.add_argument('-e', '--engine', choices=['thread', 'async', 'pool'], default='thread',
+                    help='run each robot in its own thread, all robots in one event loop '
+                         'or all robots in a fixed pool of threads')
+parser.add_argument('-p', '--pool-size', metavar='N', type=int, default=4,
+                    help='number of threads of the pool engine')
+parser.add_argument('-b', '--backlog', metavar='N', type=int, default=socket.SOMAXCONN,
+                    help='maximum number of connections waiting to be accepted')
+parser.add_argument('-w', '--workers', metavar='N', type=int, default=1,
+                    help='number of server processes sharing the port (SO_REUSEPORT)')
+parser.add_argument('-o', '--obstacles', choices=['private', 'shared'], default='private',
+                    help='let every robot find the obstacles of its own world, or share '
+                         'the found obstacles between all robots navigating the same world')
+parser.add_argument('-f', '--obstacle-file', metavar='file', type=str, default=None,
+                    help='keep the shared obstacles in a memory-mapped file, '
+                         'which survives restarts of the server')
+parser.add_argument('-n', '--navigation', choices=list(STRATEGIES), default=DEFAULT_STRATEGY,
+                    help='the navigation strategy of the robots, greedy computes the least '
+                         'per decision, planner sends the fewest commands per session')
+parser.add_argument('-q', '--observer-queue', metavar='N', type=int, default=DEFAULT_CAPACITY,
+                    help='number of events queued for the observers (GUI, logs) of the robots, '
+                         '0 to call them from the sessions')
+parser.add_argument('--overflow', choices=[policy.value for policy in OverflowPolicy],
+                    default=OverflowPolicy.COALESCE.value,
+                    help='drop the oldest event, replace the queued snapshots of the robots '
+                         'or wait for the observers when the observer queue is full')
+parser.add_argument('--stack-interval', metavar='SECONDS', type=float, default=0.05,
+                    help='minimum time between two updates of the message stack of a robot '
+                         'sent to the observers, 0 to send every update')
 
 
 args = parser.parse_args()
 
 if __name__ == "__main__":
-    server = RobotServer(args.host, args.port)
+    if args.workers < 1:
+        parser.error("there must be at least one worker")
+    if args.obstacle_file and args.obstacles != 'shared':
+        parser.error("the obstacle file can only be used with shared obstacles")
+    shared_obstacles = None
+    if args.obstacle_file:
+        shared_obstacles = MappedObstacleStore(args.obstacle_file)
+    elif args.obstacles == 'shared':
+        shared_obstacles = SharedMemoryObstacleStore() if args.workers > 1 else ObstacleStore()
+    dispatcher = EventDispatcher(args.observer_queue, OverflowPolicy(args.overflow),
+                                 args.stack_interval) if args.observer_queue > 0 else None
+    engine = {
+        'thread': RobotServer,
+        'async': AsyncRobotServer,
+        'pool': partial(PooledRobotServer, pool_size=args.pool_size)
+    }[args.engine]
+    server_class = partial(engine, backlog=args.backlog, shared_obstacles=shared_obstacles,
+                           navigation_strategy=get_strategy(args.navigation),
+                           dispatcher=dispatcher)
+    if args.workers > 1:
+        if args.gui:
+            parser.error("GUI can't be used with several workers")
+        server = MultiProcessRobotServer(args.host, args.port, args.workers, server_class)
+    else:
+        server = server_class(args.host, args.port)
 
     if args.log:
         logging.basicConfig(filename=args.log, level=logging.INFO)
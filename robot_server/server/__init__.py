@@ -3,6 +3,9 @@ This package contains all the server logic for the robot server.
 """
 
 from .server import RobotServer
+from .async_server import AsyncRobotServer
+from .pool_server import PooledRobotServer
 from .thread import RobotThread
+from .session import RobotSession
 from .server_observer import RobotServerObserver
 from .thread_observer import RobotThreadObserver
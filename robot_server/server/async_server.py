@@ -0,0 +1,115 @@
+"""
+This module contains the AsyncRobotServer class, which serves all robots
+from a single asyncio event loop instead of starting a thread per connection.
+"""
+
+import asyncio
+import logging
+import socket
+
+from .map import RobotMap
+from .server import RobotServer, DEFAULT_BACKLOG
+from .session import RobotSession
+
+
+class AsyncRobotServer(RobotServer):
+    """
+    Class for the server, which runs every robot session as a coroutine
+    on one event loop. The protocol is processed by RobotSession instances.
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(self, host, port, reuse_port=False, backlog=DEFAULT_BACKLOG,
+                 shared_obstacles=None, navigation_strategy=RobotMap, dispatcher=None):
+        super().__init__(host, port, reuse_port, backlog, shared_obstacles, navigation_strategy,
+                         dispatcher)
+        self._loop = None
+        self._main_task = None
+
+    def start(self):
+        """
+        Starts the server and blocks until it is stopped.
+        """
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            self._stopping = True
+
+    def stop(self):
+        """
+        Stops the server.
+        Can be called from any thread.
+        """
+        self._stopping = True
+        if self._loop is not None and self._main_task is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._main_task.cancel)
+            except RuntimeError:
+                pass  # the loop is already closed
+
+    async def _serve(self):
+        """
+        Accepts new connections and starts a session coroutine for each of them.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._main_task = asyncio.current_task()
+        self._server_socket = self._create_server_socket()
+
+        tasks = set()
+        try:
+            while not self._stopping:
+                conn, addr = await self._loop.sock_accept(self._server_socket)
+                conn.setblocking(False)
+                task = self._loop.create_task(self._run_session(conn, addr))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._server_socket.close()
+            for session in self.sessions:
+                if not session.stop_flag:
+                    session.to_final()
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_session(self, conn: socket.socket, addr):
+        """
+        Runs one robot session until it finishes.
+        :param conn: The socket of the connection.
+        :param addr: The address of the client.
+        """
+        session = RobotSession(addr, self.shared_obstacles, self.navigation_strategy,
+                               self.dispatcher)
+        self.sessions.add(session)
+        for observer in self.observers:
+            observer.on_new_connection(session)
+
+        logging.info("(+) Session working with address %s:%s", *addr)
+        try:
+            while not session.stop_flag:
+                try:
+                    received = await asyncio.wait_for(
+                        self._loop.sock_recv_into(conn, session.receive_buffer()),
+                        session.timeout
+                    )
+                except asyncio.TimeoutError:
+                    await self._send(conn, session.on_timeout())
+                    break
+                except OSError:
+                    received = 0
+                try:
+                    await self._send(conn, session.feed_received(received))
+                except OSError:
+                    session.feed(b"")
+        finally:
+            conn.close()
+
+    async def _send(self, conn: socket.socket, data: bytes):
+        """
+        Sends the messages returned by the session to the client with a single call.
+        :param conn: The socket of the connection.
+        :param data: The framed messages to send.
+        """
+        if data:
+            await self._loop.sock_sendall(conn, data)
@@ -0,0 +1,292 @@
+"""
+This module contains a vectorised variant of the simulator, which advances many robots
+at once in NumPy arrays, applying the decisions of RobotMap to every robot.
+It makes it possible to sweep whole grids of starting positions, e.g. for heatmaps
+of the number of commands. NumPy is an optional dependency of the server.
+"""
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .map import RobotMap, Action, Rotation
+from .simulator import MAX_COMMANDS, RunResult, World, simulate
+
+MOVE, TURN_RIGHT, TURN_LEFT = Action.MOVE.value, Action.TURN_RIGHT.value, Action.TURN_LEFT.value
+UNKNOWN = -1  # rotation the map hasn't determined yet
+BANNED_CAPACITY = 64  # banned positions per robot, robots with more are simulated by RobotMap
+_BANNED_SLOTS = 8  # initial banned positions per robot, doubled when needed
+
+if np is not None:
+    _DX = np.array([0, 1, 0, -1])
+    _DY = np.array([1, 0, -1, 0])
+    _TURNS = np.array([0, 1, 3])  # rotation change by the value of the action
+    _NO_KEY = np.iinfo(np.int64).min
+else:
+    _DX = _DY = _TURNS = _NO_KEY = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The batch simulator requires NumPy, install it with pip install numpy")
+
+
+def _keys(x, y):
+    """
+    Encodes coordinates into single integers, which can be compared and sorted.
+    """
+    return (x.astype(np.int64) << 32) + y
+
+
+def _obstacle_keys(obstacles: list[tuple]):
+    """
+    Returns the sorted keys of the positions of the obstacles.
+    """
+    coordinates = np.array(obstacles, dtype=np.int64).reshape(-1, 2)
+    return np.unique(_keys(coordinates[:, 0], coordinates[:, 1]))
+
+
+@dataclass
+class BatchResult:
+    """
+    Results of the runs simulated by simulate_batch, one array element per robot,
+    with the same meaning as the attributes of RunResult.
+    """
+    commands: "np.ndarray"
+    moves: "np.ndarray"
+    turns: "np.ndarray"
+    crashes: "np.ndarray"
+    reached: "np.ndarray"
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __getitem__(self, index: int) -> RunResult:
+        return RunResult(int(self.commands[index]), int(self.moves[index]),
+                         int(self.turns[index]), int(self.crashes[index]),
+                         bool(self.reached[index]))
+
+    def results(self) -> list[RunResult]:
+        """
+        Returns the results as RunResults, e.g. for Summary.of.
+        """
+        return [self[index] for index in range(len(self))]
+
+
+class _Batch:  # pylint: disable=too-many-instance-attributes
+    """
+    The robots still being simulated, as a structure of arrays. The robot part of the state
+    is the position and the real rotation, the map part mirrors the attributes of RobotMap,
+    with the banned positions in a fixed number of slots per robot.
+    """
+    def __init__(self, x, y, rotation):
+        size = len(x)
+        self.index = np.arange(size)
+        self.x, self.y = x.astype(np.int64), y.astype(np.int64)
+        self.rotation = rotation.astype(np.int64)
+        self.map_rotation = np.full(size, UNKNOWN)
+        self.prev = np.zeros((2, size), dtype=np.int64)
+        self.has_prev = np.zeros(size, dtype=bool)
+        self.action = np.full(size, MOVE)
+        self.counts = np.zeros((4, size), dtype=np.int64)  # moves, turns, crashes, banned
+        self.banned = np.full((size, _BANNED_SLOTS), _NO_KEY)
+        self.overflow = np.zeros(size, dtype=bool)
+
+    def __len__(self):
+        return len(self.index)
+
+    def keep(self, mask):
+        """
+        Keeps only the robots selected by the mask.
+        """
+        for name, value in vars(self).items():
+            setattr(self, name, value[..., mask] if name in ("prev", "counts") else value[mask])
+
+    def is_banned(self, keys):
+        """
+        Returns which robots have the positions banned in their maps. The keys may have
+        further dimensions after the robot one, e.g. several positions per robot.
+        """
+        result = np.zeros(keys.shape, dtype=bool)
+        rows = np.flatnonzero(self.counts[3])
+        if len(rows):
+            banned = self.banned[rows, :self.counts[3, rows].max()]
+            banned = banned.reshape(banned.shape[:1] + (1,) * (keys.ndim - 1) + banned.shape[1:])
+            result[rows] = (banned == keys[rows, ..., None]).any(axis=-1)
+        return result
+
+    def ban(self, mask, keys):
+        """
+        Adds the positions to the banned positions of the maps of the robots in the mask.
+        """
+        mask = mask & ~self.is_banned(keys)
+        self.overflow |= mask & (self.counts[3] == BANNED_CAPACITY)
+        rows = np.flatnonzero(mask & ~self.overflow)
+        if len(rows) and self.counts[3, rows].max() == self.banned.shape[1]:
+            self.banned = np.hstack((self.banned, np.full_like(self.banned, _NO_KEY)))
+        self.banned[rows, self.counts[3, rows]] = keys[rows]
+        self.counts[3, rows] += 1
+
+    def execute(self, obstacles):
+        """
+        Lets the robots execute their actions in the world with the sorted obstacle keys.
+        """
+        move = self.action == MOVE
+        next_x = self.x + _DX[self.rotation] * move
+        next_y = self.y + _DY[self.rotation] * move
+        keys = _keys(next_x, next_y)
+        found = np.searchsorted(obstacles, keys).clip(max=max(len(obstacles) - 1, 0))
+        crash = move & (obstacles[found] == keys) if len(obstacles) else np.zeros_like(move)
+        self.x = np.where(crash, self.x, next_x)
+        self.y = np.where(crash, self.y, next_y)
+        self.rotation = (self.rotation + _TURNS[self.action]) % 4
+        self.counts[0] += move
+        self.counts[1] += ~move
+        self.counts[2] += crash
+
+    def decide(self):
+        """
+        Computes the next actions the way RobotMap.update_position does.
+        """
+        still = (self.x == self.prev[0]) & (self.y == self.prev[1])
+        locate = self.has_prev & (self.map_rotation == UNKNOWN)
+        located = locate & ~still
+        self.map_rotation = np.where(located, self._moved_rotation(), self.map_rotation)
+        navigate = self.has_prev & (self.map_rotation != UNKNOWN)
+
+        action = np.where(locate & still,
+                          np.where(self.action == MOVE, TURN_RIGHT, MOVE), MOVE)
+        action = np.where(navigate, self._navigate(navigate, still), action)
+
+        known = self.map_rotation != UNKNOWN
+        self.map_rotation = np.where(known, (self.map_rotation + _TURNS[action]) % 4, UNKNOWN)
+        self.prev = np.stack((self.x, self.y))
+        self.has_prev[:] = True
+        self.action = action
+
+    def _moved_rotation(self):
+        """
+        Returns the first rotation of Rotation.from_coordinate for the last move.
+        """
+        dx, dy = self.x - self.prev[0], self.y - self.prev[1]
+        return np.select([dy > 0, dx > 0, dy < 0, dx < 0], [0, 1, 2, 3], UNKNOWN)
+
+    def _navigate(self, navigate, still):
+        """
+        Returns the actions of RobotMap._navigate for the robots with known rotations.
+        """
+        rotation = self.map_rotation.clip(min=0)
+        next_keys = _keys(self.x + _DX[rotation], self.y + _DY[rotation])
+        obstacle = navigate & still & (self.action == MOVE)
+        self.ban(obstacle, next_keys)
+
+        # bit r is set if the rotation r reduces the distance to the center
+        available = (self.y < 0) * 1 | (self.x < 0) * 2 | (self.y > 0) * 4 | (self.x > 0) * 8
+        available &= ~np.where(obstacle, 1 << rotation, 0)
+        neighbours = _keys(self.x[:, None] + _DX, self.y[:, None] + _DY)
+        banned = self.is_banned(np.column_stack((neighbours, next_keys)))
+        available &= ~(banned[:, :4] << np.arange(4)).sum(axis=1)
+
+        blocked = available == 0
+        bypass = blocked & banned[:, 4]
+        self.ban(navigate & blocked & ~bypass, _keys(self.x, self.y))
+
+        def has(rotations):
+            return (available >> (rotations % 4)) & 1 == 1
+
+        turn = np.where(has(rotation - 1), TURN_LEFT,
+                        np.where(has(rotation + 1), TURN_RIGHT, TURN_LEFT))
+        return np.where(blocked, np.where(bypass, TURN_RIGHT, MOVE),
+                        np.where(has(rotation), MOVE, turn))
+
+
+def simulate_batch(obstacles: Iterable[tuple], positions, rotations,
+                   max_commands: int = MAX_COMMANDS) -> BatchResult:
+    """
+    Simulates a robot driven by its own RobotMap for every starting position and rotation,
+    all in the same world. Gives the same results as simulator.simulate for every robot.
+
+    :param obstacles: The positions of the obstacles of the world.
+    :param positions: The starting positions, an array of shape (robots, 2).
+    :param rotations: The starting rotations, an array of Rotation values.
+    :param max_commands: The number of commands after which the runs are given up.
+    :return: The results of the runs, in order of the robots.
+    """
+    _require_numpy()
+    obstacles = list(obstacles)
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+    rotations = np.asarray(rotations, dtype=np.int64)
+    world_keys = _obstacle_keys(obstacles)
+    result = BatchResult(np.full(len(positions), max_commands), np.zeros(len(positions), int),
+                         np.zeros(len(positions), int), np.zeros(len(positions), int),
+                         np.zeros(len(positions), bool))
+
+    batch = _Batch(positions[:, 0], positions[:, 1], rotations)
+    overflow = []
+    for command in range(1, max_commands + 1):
+        if len(batch) == 0:
+            break
+        batch.execute(world_keys)
+        batch.decide()
+        reached = (batch.x == 0) & (batch.y == 0) & ~batch.overflow
+        _store(result, batch, reached, command)
+        finished = reached | batch.overflow
+        if finished.any():
+            overflow.extend(batch.index[batch.overflow])
+            batch.keep(~finished)
+    _store(result, batch, np.ones(len(batch), dtype=bool), max_commands, reached=False)
+
+    if overflow:
+        world = World(set(obstacles))
+        for index in overflow:
+            run = simulate(RobotMap(), world, tuple(positions[index].tolist()),
+                           Rotation(int(rotations[index])), max_commands)
+            result.commands[index], result.moves[index], result.turns[index], \
+                result.crashes[index], result.reached[index] = \
+                run.commands, run.moves, run.turns, run.crashes, run.reached
+    return result
+
+
+def _store(result: BatchResult, batch: _Batch, mask, commands: int, reached: bool = True):
+    """
+    Stores the results of the robots of the batch selected by the mask.
+    """
+    index = batch.index[mask]
+    result.commands[index] = commands
+    result.moves[index], result.turns[index], result.crashes[index] = batch.counts[:3, mask]
+    result.reached[index] = reached
+
+
+def command_heatmap(obstacles: Iterable[tuple], radius: int, step: int = 1,
+                    max_commands: Optional[int] = None) -> "np.ndarray":
+    """
+    Computes the number of commands needed from every starting position of a grid
+    in every rotation.
+
+    :param obstacles: The positions of the obstacles of the world.
+    :param radius: The maximal coordinate of the starting positions.
+    :param step: The distance between neighbouring starting positions.
+    :param max_commands: The number of commands after which the runs are given up,
+        by default enough for any starting position within the radius.
+    :return: The numbers of commands, an array indexed by the rotation value and by the
+        indices of the y and x coordinates, counted from -radius. The starting positions
+        on obstacles are -1, the ones given up max_commands.
+    """
+    _require_numpy()
+    obstacles = list(obstacles)
+    coordinates = np.arange(-radius, radius + 1, step)
+    y, x = np.meshgrid(coordinates, coordinates, indexing="ij")
+    positions = np.stack((x.ravel(), y.ravel()), axis=1)
+    free = ~np.isin(_keys(positions[:, 0], positions[:, 1]), _obstacle_keys(obstacles))
+
+    heatmap = np.full((4, len(coordinates) * len(coordinates)), -1)
+    starts = np.tile(positions[free], (4, 1))
+    rotations = np.repeat(np.arange(4), free.sum())
+    result = simulate_batch(obstacles, starts, rotations,
+                            max_commands or MAX_COMMANDS + 4 * radius)
+    heatmap[:, free] = result.commands.reshape(4, -1)
+    return heatmap.reshape(4, len(coordinates), len(coordinates))
@@ -0,0 +1,234 @@
+"""
+This module contains the EventDispatcher class, which delivers the events of the sessions
+to their observers from a separate thread, so that a slow observer, e.g. the GUI
+or a log on a slow disk, doesn't delay the responses to the robots.
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import deque
+from enum import Enum
+from itertools import count
+from typing import Optional
+
+from robot_server.bridge.thread_event import RobotThreadEvent, MessageStackUpdate, MapUpdate
+
+from .thread_observer import RobotThreadObserver
+
+DEFAULT_CAPACITY = 10000
+# events carrying a snapshot of the session, which is superseded by the next one
+SNAPSHOT_EVENTS = (MessageStackUpdate, MapUpdate)
+
+
+class OverflowPolicy(Enum):
+    """
+    Enum for what the dispatcher does with a new event when its queue is full.
+    """
+    DROP_OLDEST = "drop-oldest"  # drop the oldest queued event
+    COALESCE = "coalesce"  # replace the queued snapshot of the session, else drop the oldest
+    BLOCK = "block"  # wait for the observers, which delays the session
+
+
+class _DispatchedObserver(RobotThreadObserver):
+    """
+    Observer of one session, queueing the events for the observer it wraps.
+    The attributes other than the observer are guarded by the lock of the dispatcher.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, dispatcher: "EventDispatcher", observer: RobotThreadObserver):
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.observer = observer
+        self.tail: Optional[list] = None  # the last queued entry of the session
+        self.deferred: Optional[list] = None  # the stack update waiting for the interval
+        self.last_stack_update = -math.inf  # the time the last stack update was queued
+
+    def on_thread_event(self, event: RobotThreadEvent):
+        self.dispatcher.put(self, event)
+
+
+class EventDispatcher:
+    """
+    Class delivering the events of the sessions to their observers from its own thread.
+    The sessions only append the events to a bounded queue, and what happens when
+    the queue is full is given by the overflow policy. The numbers of the dropped
+    and coalesced events are counted. With the coalesce policy, when the queue is full,
+    a snapshot event is replaced by a newer one of the same type for the same observer
+    if it is the last queued event of the session, so the events are delivered in order.
+    With a stack interval, the message stack updates of a session are queued at most
+    once per interval, the latest one wins, and it is queued before the next other
+    event of the session, so a client sending a message byte by byte doesn't flood
+    the observers. The thread is started with the first event, so a dispatcher can
+    be created before the worker processes are started.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY,
+                 policy: OverflowPolicy = OverflowPolicy.COALESCE,
+                 stack_interval: float = 0.0):
+        """
+        :param capacity: The maximum number of queued events.
+        :param policy: What to do with a new event when the queue is full.
+        :param stack_interval: The minimum time between two message stack updates
+            of a session, in seconds, 0 to queue every update.
+        """
+        self.capacity = capacity
+        self.policy = policy
+        self.stack_interval = stack_interval
+        self.dropped = 0
+        self.coalesced = 0
+        self._queue: deque[list] = deque()
+        self._deferred: list[tuple] = []  # heap of the due times of the deferred updates
+        self._order = count()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+
+    def __getstate__(self):
+        return {"capacity": self.capacity, "policy": self.policy,
+                "stack_interval": self.stack_interval}
+
+    def __setstate__(self, state):
+        self.__init__(**state)  # pylint: disable=unnecessary-dunder-call
+
+    def wrap(self, observer: RobotThreadObserver) -> RobotThreadObserver:
+        """
+        Returns an observer for one session, which queues the events for the observer.
+
+        :param observer: The observer the events are delivered to.
+        """
+        return _DispatchedObserver(self, observer)
+
+    def put(self, observer: _DispatchedObserver, event: RobotThreadEvent):
+        """
+        Queues the event for the observer.
+
+        :param observer: The observer of the session.
+        :param event: The event.
+        """
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-dispatcher",
+                                                daemon=True)
+                self._thread.start()
+            if self.stack_interval > 0 and isinstance(event, MessageStackUpdate):
+                if observer.deferred is not None:
+                    observer.deferred[1] = event
+                    self.coalesced += 1
+                    return
+                due = observer.last_stack_update + self.stack_interval
+                if time.monotonic() < due:
+                    observer.deferred = [observer, event]
+                    heapq.heappush(self._deferred, (due, next(self._order), observer.deferred))
+                    self._condition.notify_all()
+                    return
+                observer.last_stack_update = time.monotonic()
+            elif observer.deferred is not None:
+                self._release(observer.deferred)
+            self._enqueue(observer, event)
+            self._condition.notify_all()
+
+    def _enqueue(self, observer: _DispatchedObserver, event: RobotThreadEvent):
+        """
+        Queues the event, coalescing it or making room for it according to the policy.
+        """
+        if len(self._queue) >= self.capacity:
+            tail = observer.tail
+            if self.policy is OverflowPolicy.BLOCK:
+                self._condition.wait_for(lambda: len(self._queue) < self.capacity)
+            elif self.policy is OverflowPolicy.COALESCE and tail is not None \
+                    and type(tail[1]) is type(event) and isinstance(event, SNAPSHOT_EVENTS):
+                tail[1] = event
+                self.coalesced += 1
+                return
+            else:
+                self._forget(self._queue.popleft())
+                self.dropped += 1
+        self._append([observer, event])
+
+    def _append(self, entry: list):
+        """
+        Appends the entry to the queue as the last entry of its session.
+        """
+        self._queue.append(entry)
+        entry[0].tail = entry
+
+    def _forget(self, entry: list):
+        """
+        Removes a dequeued entry from the last entry of its session.
+        """
+        if entry[0].tail is entry:
+            entry[0].tail = None
+
+    def _release(self, entry: list):
+        """
+        Queues a deferred stack update. The queue may exceed the capacity by the deferred
+        updates, at most one per session, as they were admitted before.
+        """
+        observer = entry[0]
+        if observer.deferred is entry:
+            observer.deferred = None
+            observer.last_stack_update = time.monotonic()
+            self._append(entry)
+
+    def _release_due(self) -> Optional[float]:
+        """
+        Queues the deferred stack updates which are due.
+
+        :return: The time until the next deferred update is due, None if there is none.
+        """
+        while self._deferred:
+            due, _, entry = self._deferred[0]
+            if entry[0].deferred is not entry:
+                heapq.heappop(self._deferred)  # released before it was due
+            elif due <= time.monotonic():
+                heapq.heappop(self._deferred)
+                self._release(entry)
+            else:
+                return due - time.monotonic()
+        return None
+
+    def _run(self):
+        """
+        Delivers the queued events until the process exits.
+        """
+        while True:
+            with self._condition:
+                self._busy = False
+                while True:
+                    timeout = self._release_due()
+                    if self._queue:
+                        break
+                    self._condition.notify_all()
+                    self._condition.wait(timeout)
+                entry = self._queue.popleft()
+                self._forget(entry)
+                self._busy = True
+                if self.policy is OverflowPolicy.BLOCK:
+                    self._condition.notify_all()
+            observer, event = entry
+            try:
+                observer.observer.on_thread_event(event)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logging.exception("Observer %s failed to process %s", observer.observer, event)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Queues the deferred stack updates and waits until all the queued events
+        are delivered.
+
+        :param timeout: The maximum time to wait, in seconds.
+        :return: Whether the events were delivered in time.
+        """
+        with self._condition:
+            for _, _, entry in self._deferred:
+                self._release(entry)
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._queue and not self._busy,
+                                            timeout)
@@ -0,0 +1,165 @@
+"""
+This module contains the MessageFramer class, which splits the received
+bytes into messages terminated by the end sequence.
+"""
+
+from typing import Optional
+
+DEFAULT_CAPACITY = 256
+RECEIVE_SIZE = 128
+
+
+class MessageFramer:
+    """
+    Incremental framer for messages terminated by an end sequence.
+    The received bytes are kept in one preallocated buffer, which a driver can receive
+    into directly, and the search for the end sequence continues from where the previous
+    search stopped, so every byte is scanned once even when a client sends one byte
+    at a time. An end sequence split between two chunks is found as well.
+    Frames are returned as views of the buffer, so no bytes are copied per frame.
+    The unconsumed tail is moved to the beginning of the buffer only when there isn't
+    enough room to receive, and the buffer grows only if the tail doesn't fit.
+    The validation of the unterminated tail also continues where it stopped.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, end_sequence: bytes = b"\a\b", capacity: int = DEFAULT_CAPACITY):
+        """
+        :param end_sequence: The sequence terminating every message.
+        :param capacity: The initial size of the buffer.
+        """
+        self.end_sequence = end_sequence
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+        # the validator of the unterminated tail, its state and the end of the validated bytes
+        self._validator = None
+        self._prefix_state = 0
+        self._validated = 0
+
+    def __len__(self):
+        """
+        The number of received bytes which don't belong to a returned frame yet.
+        """
+        return self._end - self._start
+
+    @property
+    def pending(self) -> bytes:
+        """
+        The received bytes which don't belong to a returned frame yet.
+        """
+        return bytes(self._view[self._start:self._end])
+
+    def writable(self, size: int = RECEIVE_SIZE) -> memoryview:
+        """
+        Returns the free part of the buffer, which is at least the given size,
+        to receive into, e.g. with socket.recv_into. The received bytes
+        have to be committed. Invalidates the returned frames.
+
+        :param size: The minimal number of bytes to receive.
+        :return: A view of the free part of the buffer.
+        """
+        if len(self._buffer) - self._end < size:
+            self._make_room(size)
+        return self._view[self._end:]
+
+    def commit(self, size: int):
+        """
+        Marks the given number of bytes received into the writable view as received.
+
+        :param size: The number of received bytes.
+        """
+        self._end += size
+
+    def feed(self, data):
+        """
+        Copies received bytes to the buffer. Invalidates the returned frames.
+
+        :param data: The received bytes, or any bytes-like object.
+        """
+        size = len(data)
+        self.writable(size)[:size] = data
+        self._end += size
+
+    def _make_room(self, size: int):
+        """
+        Moves the unconsumed bytes to the beginning of the buffer,
+        and grows the buffer if the free part is still smaller than the given size.
+        """
+        pending = self._end - self._start
+        if pending + size > len(self._buffer):
+            buffer = bytearray(max(2 * len(self._buffer), pending + size))
+            buffer[:pending] = self._view[self._start:self._end]
+            self._view.release()
+            self._buffer, self._view = buffer, memoryview(buffer)
+        else:
+            self._view[:pending] = self._view[self._start:self._end]
+        self._scan -= self._start
+        self._validated -= self._start
+        self._start, self._end = 0, pending
+
+    def next_frame(self) -> Optional[memoryview]:
+        """
+        Returns the next complete message without the end sequence.
+        The message is a view of the buffer, valid until more bytes are received.
+
+        :return: The message, or None if no complete message was received yet.
+        """
+        index = self._buffer.find(self.end_sequence, self._scan, self._end)
+        if index == -1:
+            # the end of the buffer might hold the beginning of the end sequence
+            self._scan = max(self._start, self._end - len(self.end_sequence) + 1)
+            return None
+        frame = self._view[self._start:index]
+        self._start = self._scan = index + len(self.end_sequence)
+        self._validator = None  # the next message is validated from its beginning
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+        return frame
+
+    def frames(self):
+        """
+        Yields all complete messages received so far.
+        """
+        frame = self.next_frame()
+        while frame is not None:
+            yield frame
+            frame = self.next_frame()
+
+    def unterminated_length(self) -> int:
+        """
+        Returns the number of bytes received since the last end sequence,
+        without a possible beginning of the end sequence at the end of the buffer.
+        """
+        for length in range(len(self.end_sequence) - 1, 0, -1):
+            if self._buffer.endswith(self.end_sequence[:length], self._start, self._end):
+                return len(self) - length
+        return len(self)
+
+    def pending_is_valid(self, validator) -> bool:
+        """
+        Returns whether the bytes received since the last end sequence could still
+        begin a valid message. A possible beginning of the end sequence at the end
+        of the buffer isn't validated yet. The length is checked before any byte is
+        looked at, and the state of the validator is kept until the next frame,
+        so every byte is validated once, however the client splits the message.
+        The validation starts again if the validator changes.
+
+        :param validator: The PrefixValidator of the messages which can be received.
+        :return: Whether the pending bytes are a valid beginning of a message.
+        """
+        length = self.unterminated_length()
+        if validator.exceeds_length(length):
+            return False
+        if validator is not self._validator:
+            self._validator, self._prefix_state = validator, validator.initial
+            self._validated = self._start
+        end = self._start + length
+        if end > self._validated:
+            self._prefix_state = validator.advance(self._prefix_state,
+                                                   self._view[self._validated:end])
+            self._validated = end
+        return self._prefix_state != validator.REJECTED
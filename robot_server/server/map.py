@@ -3,10 +3,12 @@ This module contains the RobotMap class, which is used to keep
 track of the robot's position and rotation.
 """
 
+from abc import ABC, abstractmethod
 from enum import Enum
 from typing import Optional
 
 from robot_server.bridge.thread_event import MapState
+from .obstacles import ObstacleStore
 
 
 class Action(Enum):
@@ -83,16 +85,160 @@ class Rotation(Enum):
         return Action.TURN_LEFT  # if several turns needed
 
 
-class RobotMap:
+def add_positions(position_a: tuple, position_b: tuple, b_mult=1) -> tuple:
+    """
+    Adds two positions element-wise, multiplying the second position by b_mult.
+    """
+    return position_a[0] + b_mult * position_b[0], position_a[1] + b_mult * position_b[1]
+
+
+def _reference_decision(position: tuple, rotation: Rotation,
+                        banned_positions: set) -> tuple[Action, bool]:
+    """
+    The navigation rule of RobotMap, from which the decision table is generated.
+    Turns towards any rotation reducing the distance to the center, and bypasses obstacles.
+
+    :param position: the position of the robot
+    :param rotation: the rotation of the robot
+    :param banned_positions: the banned positions, including a just found obstacle
+    :return: the action, and whether the position of the robot has to be banned
+    """
+    next_position = add_positions(position, rotation.to_coordinate())
+    available_rotations = [  # filter for rotations leading to a banned position
+        rot for rot in map(Rotation.opposite, Rotation.from_coordinate(position))
+        if add_positions(position, rot.to_coordinate()) not in banned_positions
+    ]
+
+    if len(available_rotations) == 0:
+        if next_position in banned_positions:
+            return Action.TURN_RIGHT, False  # turn to bypass an obstacle
+        return Action.MOVE, True  # move from an obstacle
+
+    if rotation not in available_rotations:
+        return rotation.turn_for(available_rotations), False
+    return Action.MOVE, False
+
+
+def _decision_key(sign_x: int, sign_y: int, rotation: int, banned_mask: int) -> int:
+    """
+    Encodes a situation of the robot as an index to the decision table.
+
+    :param sign_x: the sign of the x coordinate of the position
+    :param sign_y: the sign of the y coordinate of the position
+    :param rotation: the value of the rotation
+    :param banned_mask: bit r is set if the neighbour in the rotation of value r is banned
+    """
+    return (((sign_x + 1) * 3 + sign_y + 1) * 4 + rotation) * 16 + banned_mask
+
+
+def _neighbour_mask(x: int, y: int, positions) -> int:
+    """
+    Returns the mask of the neighbours of the position contained in the positions,
+    bit r is set for the neighbour in the rotation of value r.
+    """
+    return (((x, y + 1) in positions) | ((x + 1, y) in positions) << 1
+            | ((x, y - 1) in positions) << 2 | ((x - 1, y) in positions) << 3)
+
+
+def _build_decision_table() -> tuple[tuple[Action, bool], ...]:
+    """
+    Generates the decisions of _reference_decision for all the situations, which only
+    depend on the signs of the coordinates, the rotation and the banned neighbours.
+    """
+    table = [(Action.MOVE, False)] * _decision_key(1, 1, 3, 15 + 1)
+    for sign_x in (-1, 0, 1):
+        for sign_y in (-1, 0, 1):
+            for rotation in Rotation:
+                for banned_mask in range(16):
+                    banned_positions = {
+                        add_positions((sign_x, sign_y), neighbour.to_coordinate())
+                        for neighbour in Rotation if banned_mask >> neighbour.value & 1
+                    }
+                    table[_decision_key(sign_x, sign_y, rotation.value, banned_mask)] = \
+                        _reference_decision((sign_x, sign_y), rotation, banned_positions)
+    return tuple(table)
+
+
+_DECISIONS = _build_decision_table()
+# the rotation after an action, by the value of the rotation and the value of the action
+_TURNED = tuple(tuple(Rotation((rotation.value + turn) % 4) for turn in (0, 1, 3))
+                for rotation in Rotation)
+
+
+class NavigationStrategy(ABC):
+    """
+    Abstract class for the navigation strategies, which decide the commands of one robot.
+    A strategy is created for every session, with the obstacles shared by the sessions
+    as the only argument, which may be None.
+    """
+
+    @abstractmethod
+    def update_position(self, position: tuple) -> Action:
+        """
+        Returns the action the robot should take, given the position it reported.
+
+        :param position: the new position
+        :return: the action the robot should take
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_map_state(self) -> MapState:
+        """
+        Returns the current map state, shown by the GUI.
+
+        :return: the current map state
+        """
+        raise NotImplementedError
+
+    def add_obstacle(self, position: tuple):
+        """
+        Records an obstacle known in advance. Strategies which don't keep
+        the obstacles ignore it.
+
+        :param position: the position of the obstacle
+        """
+
+
+class RobotMap(NavigationStrategy):
     """
     The RobotMap class is used to keep track of the robot's position and rotation.
+    The banned positions are kept in a set, so checking a position costs O(1)
+    however long the path around the obstacles is. The obstacles are also kept
+    in a list, in the order they were found, for the map state.
+    If the map has an ObstacleStore, the obstacles in it are avoided as well,
+    and the obstacles the robot hits are published to it.
     """
-    def __init__(self):
+    def __init__(self, shared_obstacles: Optional[ObstacleStore] = None):
+        """
+        :param shared_obstacles: the obstacles shared with the other robots, if any
+        """
         self.position = None
         self.rotation = None
         self.previous_action = None
-        self.banned_positions: list[tuple[int, int]] = []
+        self.banned_positions: set[tuple[int, int]] = set()
         self.obstacles: list[tuple[int, int]] = []
+        self.shared_obstacles = shared_obstacles
+
+    def add_obstacle(self, position: tuple):
+        """
+        Records an obstacle on the given position, e.g. one found by the robot
+        or one known in advance.
+
+        :param position: the position of the obstacle
+        """
+        self.banned_positions.add(position)
+        self.obstacles.append(position)
+
+    def _hit_obstacle(self, position: tuple):
+        """
+        Records an obstacle the robot hit, and publishes it to the shared obstacles.
+
+        :param position: the position of the obstacle
+        """
+        self.add_obstacle(position)
+        if self.shared_obstacles is not None:
+            self.shared_obstacles.add(position)
 
     def update_position(self, position: tuple) -> Action:
         """
@@ -105,70 +251,91 @@ class RobotMap:
         res = self._update_position(position)
         self.previous_action = res
         if self.rotation is not None:
-            if res == Action.TURN_LEFT:
-                self.rotation = Rotation((self.rotation.value + 3) % 4)
-            elif res == Action.TURN_RIGHT:
-                self.rotation = Rotation((self.rotation.value + 1) % 4)
+            self.rotation = _TURNED[self.rotation.value][res.value]
         return res
 
-    def _update_position(self, new_position: tuple) -> Action:
+    def _locate(self, prev_position: Optional[tuple], new_position: tuple) -> Optional[Action]:
         """
-        Private part of the update_position function.
-        Does not update the rotation and previous action.
-        Returns the action the robot should take to get to the center of the map.
+        Determines the rotation of the robot from its first successful move.
+        Returns the action the robot should take while the rotation is unknown.
 
+        :param prev_position: the previous position, None before the first move
         :param new_position: the new position
+        :return: the action, or None if the rotation is known
         """
-        prev_position = self.position
-        self.position = new_position
-
-        def add_lists(list_a, list_b, b_mult=1) -> tuple:
-            """
-            Adds two lists element-wise, multiplying the second list by b_mult.
-            """
-            return list_a[0] + b_mult * list_b[0], list_a[1] + b_mult * list_b[1]
-
         if prev_position is None:
             return Action.MOVE
         if self.rotation is None:  # determine rotation
-            coordinate = add_lists(new_position, prev_position, b_mult=-1)
+            coordinate = add_positions(new_position, prev_position, b_mult=-1)
             if coordinate == (0, 0):
                 # TURN_RIGHT if unable to determine rotation due to an obstacle
                 return Action.TURN_RIGHT if self.previous_action == Action.MOVE else Action.MOVE
 
             self.rotation = Rotation.from_coordinate(coordinate)[0]
+        return None
 
-        next_position = add_lists(new_position, self.rotation.to_coordinate())
-        available_rotations = set(map(Rotation.opposite, Rotation.from_coordinate(new_position)))
+    def _update_position(self, new_position: tuple) -> Action:
+        """
+        Private part of the update_position function.
+        Does not update the rotation and previous action.
+        Returns the action the robot should take to get to the center of the map.
 
-        if prev_position == new_position and self.previous_action == Action.MOVE:  # obstacle
-            self.banned_positions.append(next_position)
-            self.obstacles.append(next_position)
-            available_rotations.remove(self.rotation)
+        :param new_position: the new position
+        """
+        prev_position = self.position
+        self.position = new_position
+
+        locating_action = self._locate(prev_position, new_position)
+        if locating_action is not None:
+            return locating_action
+        return self._navigate(prev_position, new_position)
+
+    def _navigate(self, prev_position: tuple, new_position: tuple) -> Action:
+        """
+        Returns the action the robot should take to get to the center of the map,
+        once its rotation is known, and records the obstacle the robot hit, if any.
 
-        available_rotations = list(filter(
-            lambda rot: add_lists(new_position, rot.to_coordinate()) not in self.banned_positions,
-            available_rotations))  # filter for rotations leading to a banned position
+        :param prev_position: the previous position
+        :param new_position: the new position
+        """
+        if prev_position == new_position and self.previous_action == Action.MOVE:  # obstacle
+            step_x, step_y = self.rotation.to_coordinate()
+            self._hit_obstacle((new_position[0] + step_x, new_position[1] + step_y))
+        return self._decide(new_position)
 
-        if len(available_rotations) == 0:
-            if next_position in self.banned_positions:
-                return Action.TURN_RIGHT  # turn to bypass an obstacle
-            self.banned_positions.append(self.position)
-            return Action.MOVE  # move from an obstacle
+    def _decide(self, position: tuple) -> Action:
+        """
+        Turns towards any rotation reducing the distance to the center, and bypasses
+        obstacles. The decision is looked up in a table generated from _reference_decision,
+        by the signs of the coordinates, the rotation and the banned neighbours.
 
-        if self.rotation not in available_rotations:
-            return self.rotation.turn_for(available_rotations)
-        return Action.MOVE
+        :param position: the position of the robot
+        """
+        x, y = position
+        rotation = self.rotation.value
+        banned = self.banned_positions
+        banned_mask = (((x, y + 1) in banned) | ((x + 1, y) in banned) << 1
+                       | ((x, y - 1) in banned) << 2 | ((x - 1, y) in banned) << 3) \
+            if banned else 0
+        if self.shared_obstacles is not None:
+            banned_mask |= _neighbour_mask(x, y, self.shared_obstacles)
+        action, ban_position = _DECISIONS[_decision_key(
+            (x > 0) - (x < 0), (y > 0) - (y < 0), rotation, banned_mask)]
+        if ban_position:
+            banned.add(position)
+        return action
 
     def get_map_state(self) -> MapState:
         """
         Returns the current map state.
         It could be used to process the map state in other programs.
+        The obstacles are copied, as the state may be delivered to the observers
+        after the robot found more of them.
 
         :return: the current map state
         """
         return MapState(
             self.position,
             MapState.Rotation(self.rotation.value) if self.rotation is not None else None,
-            self.obstacles
+            list(self.obstacles)
         )
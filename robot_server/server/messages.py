@@ -3,8 +3,9 @@ This module contains all the messages that are sent between the server and the c
 """
 
 import re
-from typing import Optional
-from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional, Any
+from dataclasses import dataclass, field
 
 from .map import Action
 
@@ -25,6 +26,18 @@ class ServerMessages:
     SERVER_LOGOUT = b"106 LOGOUT"
     SERVER_LOGIC_ERROR = b"302 LOGIC ERROR"
 
+    @classmethod
+    def framed(cls, end_sequence: bytes) -> dict[bytes, bytes]:
+        """
+        Returns all the constant server messages followed by the end sequence,
+        so they can be sent without being concatenated every time.
+
+        :param end_sequence: The end sequence of the messages.
+        :return: The framed messages, by the messages without the end sequence.
+        """
+        return {value: value + end_sequence
+                for name, value in vars(cls).items() if name.startswith("SERVER_")}
+
     @staticmethod
     def server_confirmation(server_hash: int) -> bytes:
         """
@@ -80,6 +93,10 @@ class RegexCheck:
     regex: bytes
     unless: bool = False
     full_match: bool = True
+    pattern: re.Pattern = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.pattern = re.compile(self.regex)
 
     def test(self, **kwargs):
         """
@@ -91,9 +108,9 @@ class RegexCheck:
             raise NameError(f'"{ARG_NAME}" not in kwargs')
 
         if self.full_match:
-            res = re.fullmatch(self.regex, kwargs.get(ARG_NAME))
+            res = self.pattern.fullmatch(kwargs.get(ARG_NAME))
         else:
-            res = re.match(self.regex, kwargs.get(ARG_NAME))
+            res = self.pattern.match(kwargs.get(ARG_NAME))
 
         return (res is not None) ^ self.unless
 
@@ -107,7 +124,7 @@ class RegexCheck:
         """
         if not self.test(**kwargs):
             raise ValueError("Cannot parse when the check isn't fulfilled")
-        match = re.match(self.regex, kwargs.get(ARG_NAME))
+        match = self.pattern.match(kwargs.get(ARG_NAME))
         res = match.groups()
         if len(res) == 0:
             res = match.group()
@@ -125,24 +142,57 @@ class RegexCheck:
         return tuple((cast_type(x) for x in res))
 
 
+DIGITS = frozenset(b"0123456789")
+ANY_BYTE = frozenset(range(256)) - {ord(b"\n")}  # the bytes "." matches in a bytes regex
+
+
+@dataclass(frozen=True)
+class Repeat:
+    """
+    Part of the syntax of a message, used to validate beginnings of messages:
+    the bytes of a set, repeated.
+
+    :param allowed: The bytes of the part.
+    :param min_count: The minimal number of the bytes.
+    :param max_count: The maximal number of the bytes, None if unlimited.
+    """
+    allowed: frozenset
+    min_count: int = 1
+    max_count: Optional[int] = 1
+
+
+def literal_syntax(literal: bytes) -> list[Repeat]:
+    """
+    Returns the syntax of a message consisting of the literal.
+
+    :param literal: The literal bytes.
+    :return: The parts of the syntax, one per byte.
+    """
+    return [Repeat(frozenset([byte])) for byte in literal]
+
+
 class ClientMessage:
     """
     Class for a client message.
     """
 
-    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
     def __init__(self,
                  max_len=None,
                  syntax_checks=None,
                  logic_checks=None,
                  unique_checks=None,
-                 parse_cast=None):
+                 parse_cast=None,
+                 prefix_syntax=None):
         """
         :param max_len: The maximum length of the message.
         :param syntax_checks: The syntax checks to perform on the message.
         :param logic_checks: The logic checks to perform on the message.
         :param unique_checks: The unique checks to perform on the message.
         :param parse_cast: The type to cast the parsed message to.
+        :param prefix_syntax: The parts of the messages which pass the syntax checks,
+            used to reject a beginning of a message as soon as it can't pass them.
+            If None, any beginning within the maximum length is accepted.
         """
         syntax_checks = syntax_checks if syntax_checks is not None else []
         logic_checks = logic_checks if logic_checks is not None else []
@@ -155,6 +205,10 @@ class ClientMessage:
             unique_checks if isinstance(unique_checks, list) else [unique_checks]
         self.max_len = max_len
         self.parse_cast = parse_cast
+        self.prefix_syntax: list[Repeat] = prefix_syntax if prefix_syntax is not None \
+            else [Repeat(ANY_BYTE, 0, None)]
+        self._length_check = RegexCheck(br".{1," + str(max_len).encode() + br"}") \
+            if max_len is not None else None
 
     def length_check(self, **kwargs):
         """
@@ -162,9 +216,64 @@ class ClientMessage:
 
         :return: Whether the message is of the correct length.
         """
-        if self.max_len is None:
+        if self._length_check is None:
             return True
-        return RegexCheck(br".{1," + str(self.max_len).encode() + br"}").test(**kwargs)
+        return self._length_check.test(**kwargs)
+
+    def syntax_regex(self) -> bytes:
+        """
+        Returns one regex matching exactly the messages which pass the syntax checks,
+        including the length check.
+
+        :return: The regex.
+        """
+        parts = [br"(?=.{1," + str(self.max_len).encode() + br"}\Z)"] \
+            if self.max_len is not None else []
+        for check in self._syntax_checks:
+            if check.unless or not check.full_match:
+                raise ValueError("Only plain full match syntax checks can be combined")
+            parts.append(br"(?=(?:" + check.regex + br")\Z)")
+        if len(self._syntax_checks) == 1:
+            parts[-1] = self._syntax_checks[0].regex
+        else:
+            parts.append(br".*")
+        return b"".join(parts)
+
+    @staticmethod
+    def _lookahead_regex(checks: list[RegexCheck]) -> bytes:
+        """
+        Returns a regex matching the empty string at the beginning of a message
+        which passes all the checks.
+        """
+        return b"".join((br"(?!" if check.unless else br"(?=") + br"(?:" + check.regex + br")"
+                        + (br"\Z" if check.full_match else b"") + br")"
+                        for check in checks)
+
+    def level_regex(self) -> bytes:
+        """
+        Returns one regex matching the empty string at the beginning of a message,
+        whose last two groups tell the level of checks the message passes, assuming
+        it passes the syntax checks. The last group participates in the match
+        if the message passes the logic checks, the next to last one if it passes
+        the unique checks as well.
+
+        :return: The regex.
+        """
+        return (br"(?:" + self._lookahead_regex(self._logic_checks)
+                + br"(?:" + self._lookahead_regex(self._unique_checks) + br"())?())?")
+
+    def cast(self, value: bytes):
+        """
+        Casts a parsed part of the message to the parse type of the message.
+
+        :param value: The parsed bytes.
+        :return: The cast value.
+        """
+        if not self.parse_cast:
+            return value
+        if self.parse_cast == str:
+            return value.decode()
+        return self.parse_cast(value)
 
     def syntax_check(self, **kwargs):
         """
@@ -206,19 +315,264 @@ class ClientMessage:
         return self._syntax_checks[0].parse(cast_type=self.parse_cast, **kwargs)
 
 
+class CheckLevel(IntEnum):
+    """
+    Levels of checks a client message can pass. Every level implies the previous ones.
+    """
+    NONE = 0
+    SYNTAX = 1
+    LOGIC = 2
+    UNIQUE = 3
+
+
+@dataclass(frozen=True)
+class Classification:
+    """
+    Result of classifying one message.
+
+    :param message: The client message type the message matched, or None.
+    :param level: The highest level of checks the message passed.
+    :param value: The parsed value of the message, as ClientMessage.parse would return it.
+    """
+    message: Optional[ClientMessage]
+    level: CheckLevel = CheckLevel.NONE
+    value: Any = None
+
+    def passes(self, message: ClientMessage, level: CheckLevel = CheckLevel.SYNTAX) -> bool:
+        """
+        Returns whether the message is of the given type and passed the given level of checks.
+        """
+        return self.message is message and self.level >= level
+
+
+UNKNOWN_MESSAGE = Classification(None)
+
+
+class MessageClassifier:
+    """
+    Class classifying messages among several client message types.
+    The syntax, logic and unique checks of all the types are compiled into one regex,
+    so a message is matched only once, and its level of checks and its value
+    are read from the groups of the same match.
+    Types listed earlier take precedence.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, messages: list[ClientMessage]):
+        """
+        :param messages: The client message types to recognise, in order of precedence.
+        """
+        # the message type, the group of the whole alternative, the groups telling
+        # the level of checks, and the groups of the value, by the alternatives
+        self._alternatives: list[tuple[ClientMessage, int, int, int, tuple[int, ...]]] = []
+        regexes = []
+        group = 1
+        for message in messages:
+            level_regex, syntax_regex = message.level_regex(), message.syntax_regex()
+            level_groups = re.compile(level_regex).groups
+            inner_groups = re.compile(syntax_regex).groups
+            value_groups = tuple(range(group + 1 + level_groups,
+                                       group + 1 + level_groups + inner_groups))
+            self._alternatives.append((message, group, group + level_groups,
+                                       group + level_groups - 1, value_groups))
+            regexes.append(br"(" + level_regex + syntax_regex + br")")
+            group += level_groups + inner_groups + 1
+        self._pattern = re.compile(b"|".join(regexes)) if regexes else None
+
+    def classify(self, message: bytes) -> Classification:
+        """
+        Classifies the message.
+
+        :param message: The message without the end sequence.
+        :return: The classification of the message.
+        """
+        match = self._pattern.fullmatch(message) if self._pattern is not None else None
+        if match is None:
+            return UNKNOWN_MESSAGE
+        for client_message, group, logic_group, unique_group, value_groups in self._alternatives:
+            if match.start(group) == -1:
+                continue
+            if value_groups:
+                value = tuple(client_message.cast(match.group(i)) for i in value_groups)
+            else:
+                value = client_message.cast(match.group(group))
+            if match.start(logic_group) == -1:
+                level = CheckLevel.SYNTAX
+            elif match.start(unique_group) == -1:
+                level = CheckLevel.LOGIC
+            else:
+                level = CheckLevel.UNIQUE
+            return Classification(client_message, level, value)
+        return UNKNOWN_MESSAGE
+
+
+class PrefixValidator:
+    """
+    Class checking whether the unterminated beginning of a message could still become
+    a message of one of several client message types.
+    The longest allowed beginning is precomputed, so overlong input is rejected
+    without looking at it. The syntaxes of all the types are compiled into one
+    automaton, whose state is kept by the caller between the received chunks,
+    so every received byte is validated once, by looking up the next state.
+    The bytes are looked up by their class, the bytes which every part of the syntaxes
+    allows or disallows alike, so the automaton is small enough to be built in advance
+    and shared by all sessions.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    REJECTED = 0  # the state of the beginnings of no message
+
+    def __init__(self, messages: list[ClientMessage], length_only: bool = False):
+        """
+        :param messages: The client message types which can be received.
+        :param length_only: Whether only the length is checked, e.g. when any other
+            message is a logic error, which is only reported for a complete message.
+        """
+        lengths = [m.max_len for m in messages]
+        self.max_length: Optional[int] = \
+            max(lengths) if lengths and None not in lengths else None
+        self.length_only = length_only
+        self._messages = messages
+        self._classes, representatives = self._byte_classes(messages)
+        # the positions in the syntaxes of every state, and the next states by the byte class
+        self._positions: list[frozenset] = [frozenset()]
+        self._states: dict[frozenset, int] = {frozenset(): self.REJECTED}
+        self._transitions: list[list[int]] = []
+        self.initial = self._state(self._closure(
+            {(index, 0, 0, 0) for index in range(len(messages))}))
+        state = 0
+        while state < len(self._positions):  # new states are appended while building
+            self._transitions.append([self._state(self._step(state, byte))
+                                      for byte in representatives])
+            state += 1
+
+    @staticmethod
+    def _byte_classes(messages: list[ClientMessage]) -> tuple[bytes, list[int]]:
+        """
+        Returns the class of every byte, and a byte of every class.
+        """
+        parts = {repeat.allowed for m in messages for repeat in m.prefix_syntax}
+        signatures: dict[tuple, int] = {}
+        classes = bytearray(256)
+        representatives = []
+        for byte in range(256):
+            signature = tuple(byte in allowed for allowed in parts)
+            if signature not in signatures:
+                signatures[signature] = len(representatives)
+                representatives.append(byte)
+            classes[byte] = signatures[signature]
+        return bytes(classes), representatives
+
+    def _state(self, positions: frozenset) -> int:
+        """
+        Returns the state of the positions, which is added if it's new.
+        """
+        if positions not in self._states:
+            self._states[positions] = len(self._positions)
+            self._positions.append(positions)
+        return self._states[positions]
+
+    def _closure(self, positions: set) -> frozenset:
+        """
+        Adds the positions after every part which was repeated enough times.
+        A position is the index of the message type, the index of the part
+        of its syntax, the number of the bytes of the part, and the length
+        of the beginning, which is only counted if the length of the type is limited.
+        """
+        pending = list(positions)
+        while pending:
+            index, part, count, length = pending.pop()
+            syntax = self._messages[index].prefix_syntax
+            if part < len(syntax) and count >= syntax[part].min_count:
+                position = (index, part + 1, 0, length)
+                if position not in positions:
+                    positions.add(position)
+                    pending.append(position)
+        return frozenset(positions)
+
+    def _step(self, state: int, byte: int) -> frozenset:
+        """
+        Returns the positions after the byte follows the positions of the state.
+        """
+        positions = set()
+        for index, part, count, length in self._positions[state]:
+            message = self._messages[index]
+            syntax = message.prefix_syntax
+            if part == len(syntax) or byte not in syntax[part].allowed:
+                continue
+            repeat = syntax[part]
+            if repeat.max_count is not None and count == repeat.max_count:
+                continue
+            if message.max_len is not None and length == message.max_len:
+                continue
+            positions.add((index, part,
+                           count + 1 if repeat.max_count is not None
+                           else min(count + 1, repeat.min_count),  # more are all alike
+                           length + 1 if message.max_len is not None else 0))
+        return self._closure(positions)
+
+    def exceeds_length(self, length: int) -> bool:
+        """
+        Returns whether no message can begin with the given number of bytes.
+
+        :param length: The number of bytes received since the last end sequence.
+        :return: Whether the length exceeds the maximum length of all types.
+        """
+        return self.max_length is not None and length > self.max_length
+
+    def advance(self, state: int, data) -> int:
+        """
+        Returns the state after the beginning of a message in the given state
+        is followed by the data.
+
+        :param state: The state of the beginning, initially the initial state.
+        :param data: The bytes following the beginning, or any bytes-like object.
+        :return: The state of the longer beginning.
+        """
+        if self.length_only:
+            return state
+        transitions, classes = self._transitions, self._classes
+        for byte in data:
+            state = transitions[state][classes[byte]]
+        return state
+
+    def is_valid(self, prefix) -> bool:
+        """
+        Returns whether a message of one of the types can begin with the given bytes.
+
+        :param prefix: The bytes received since the last end sequence.
+        :return: Whether the prefix can still become a valid message.
+        """
+        if self.exceeds_length(len(prefix)):
+            return False
+        return self.advance(self.initial, prefix) != self.REJECTED
+
+
+_MINUS = Repeat(frozenset(b"-"), 0)  # an optional minus sign
+
+
 class ClientMessages:
     """
     Class for all client messages.
     """
     CLIENT_USERNAME = ClientMessage(18, parse_cast=str)
     CLIENT_KEY_ID = ClientMessage(3, syntax_checks=RegexCheck(br"-?\d+"),
-                                  logic_checks=RegexCheck(br"[01234]"), parse_cast=int)
-    CLIENT_CONFIRMATION = ClientMessage(5, syntax_checks=RegexCheck(br"\d{1,5}"), parse_cast=int)
+                                  logic_checks=RegexCheck(br"[01234]"), parse_cast=int,
+                                  prefix_syntax=[_MINUS, Repeat(DIGITS, 1, None)])
+    CLIENT_CONFIRMATION = ClientMessage(5, syntax_checks=RegexCheck(br"\d{1,5}"), parse_cast=int,
+                                        prefix_syntax=[Repeat(DIGITS, 1, 5)])
     CLIENT_OK = ClientMessage(10, syntax_checks=RegexCheck(br"OK (-?\d{1,4}) (-?\d{1,4})"),
-                              unique_checks=RegexCheck(br"OK 0 0"), parse_cast=int)
+                              unique_checks=RegexCheck(br"OK 0 0"), parse_cast=int,
+                              prefix_syntax=literal_syntax(b"OK ") + [
+                                  _MINUS, Repeat(DIGITS, 1, 4), *literal_syntax(b" "),
+                                  _MINUS, Repeat(DIGITS, 1, 4)])
     CLIENT_MESSAGE = ClientMessage(98)
-    CLIENT_RECHARGING = ClientMessage(10, syntax_checks=RegexCheck(br"RECHARGING"))
-    CLIENT_FULL_POWER = ClientMessage(10, syntax_checks=RegexCheck(br"FULL POWER"))
+    CLIENT_RECHARGING = ClientMessage(10, syntax_checks=RegexCheck(br"RECHARGING"),
+                                      prefix_syntax=literal_syntax(b"RECHARGING"))
+    CLIENT_FULL_POWER = ClientMessage(10, syntax_checks=RegexCheck(br"FULL POWER"),
+                                      prefix_syntax=literal_syntax(b"FULL POWER"))
 
     @staticmethod
     def matches_message(message: bytes, end_sequence: bytes):
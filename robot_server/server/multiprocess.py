@@ -0,0 +1,199 @@
+"""
+This module contains the MultiProcessRobotServer class, which runs several
+server processes listening on the same address with SO_REUSEPORT,
+so that the robots are spread over all CPU cores.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.connection
+import signal
+import socket
+import time
+from typing import Optional
+
+from .server import RobotServer
+from .server_observer import RobotServerObserver
+
+RESTART_DELAY = 0.5  # the delay before the first restart of a failing worker, in seconds
+MAX_RESTART_DELAY = 60.0
+STABLE_TIME = 10.0  # a worker running for this long is restarted without a growing delay
+STOP_TIMEOUT = 5.0  # the time the workers have to exit when stopped, before they are killed
+
+
+class _ConnectionCounter(RobotServerObserver):
+    """
+    Observer counting the connections accepted by a worker process
+    in a slot of an array shared with the supervisor.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, counts, slot: int):
+        """
+        :param counts: The shared array of connection counts.
+        :param slot: The index of the worker in the array.
+        """
+        super().__init__()
+        self._counts = counts
+        self._slot = slot
+
+    def on_new_connection(self, robot_thread):
+        with self._counts.get_lock():
+            self._counts[self._slot] += 1
+
+
+def _run_worker(server_class, host, port, slot, counts):
+    """
+    Entry point of a worker process.
+    Runs the server until the supervisor terminates the process.
+    """
+    server = server_class(host, port, reuse_port=True)
+    server.add_observer(_ConnectionCounter(counts, slot))
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server.start()
+
+
+class MultiProcessRobotServer:
+    """
+    Class for the supervisor of several server processes.
+    Every worker process binds the same host and port with SO_REUSEPORT
+    and runs its own accept loop, so the kernel balances the connections
+    between them. Workers that die are restarted. The delay before a restart doubles
+    with every worker of the slot dying within STABLE_TIME, e.g. when it can't bind
+    the address, so a worker failing at startup isn't restarted in a busy loop.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, host, port, workers: int, server_class=RobotServer):
+        """
+        :param host: The host IP address to listen on.
+        :param port: The port to listen on.
+        :param workers: The number of worker processes.
+        :param server_class: The server class run by every worker.
+        """
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise OSError("SO_REUSEPORT is not supported on this platform")
+        if workers < 1:
+            raise ValueError("There must be at least one worker")
+        self.host = host
+        self.port = port
+        self.server_class = server_class
+        self.processes: list[Optional[multiprocessing.Process]] = [None] * workers  # before start
+        self.restarts = 0
+        self._started = [0.0] * workers
+        self._failures = [0] * workers  # the workers of every slot which died quickly in a row
+        self._restart_at: list[Optional[float]] = [None] * workers
+        self._counts = multiprocessing.Array("q", workers)
+        self._stopping = False
+
+    @property
+    def connection_counts(self) -> list[int]:
+        """
+        The number of connections accepted by each worker.
+        """
+        with self._counts.get_lock():
+            return list(self._counts)
+
+    @property
+    def connection_count(self) -> int:
+        """
+        The number of connections accepted by all workers.
+        """
+        return sum(self.connection_counts)
+
+    def _start_worker(self, slot: int):
+        """
+        Starts the worker process for the given slot.
+        :param slot: The index of the worker.
+        """
+        if self.processes[slot] is not None:
+            self.processes[slot].close()
+        process = multiprocessing.Process(
+            target=_run_worker,
+            args=(self.server_class, self.host, self.port, slot, self._counts),
+            name=f"robot-server-worker-{slot}",
+            daemon=True
+        )
+        process.start()
+        self.processes[slot] = process
+        self._started[slot] = time.monotonic()
+        self._restart_at[slot] = None
+
+    def _schedule_restart(self, slot: int):
+        """
+        Schedules the restart of the dead worker process of the given slot.
+        :param slot: The index of the worker.
+        """
+        now = time.monotonic()
+        if now - self._started[slot] >= STABLE_TIME:
+            self._failures[slot] = 0
+        self._failures[slot] += 1
+        delay = min(RESTART_DELAY * 2 ** (self._failures[slot] - 1), MAX_RESTART_DELAY)
+        logging.warning("Worker %s exited with code %s, restarting in %.1fs",
+                        slot, self.processes[slot].exitcode, delay)
+        self._restart_at[slot] = now + delay
+
+    def _next_timeout(self) -> float:
+        """
+        Returns the time until the next scheduled restart, at most half a second,
+        so that the supervisor notices when it is stopped.
+        """
+        now = time.monotonic()
+        return max(0.0, min([0.5] + [restart_at - now for restart_at in self._restart_at
+                                     if restart_at is not None]))
+
+    def start(self):
+        """
+        Starts the worker processes and supervises them until stopped.
+        """
+        for slot in range(len(self.processes)):
+            self._start_worker(slot)
+        print(f"Started {len(self.processes)} workers on {self.host}, port {self.port}")
+
+        try:
+            while not self._stopping:
+                sentinels = [process.sentinel for slot, process in enumerate(self.processes)
+                             if self._restart_at[slot] is None]
+                multiprocessing.connection.wait(sentinels, timeout=self._next_timeout())
+                for slot, process in enumerate(self.processes):
+                    if self._stopping:
+                        break
+                    if self._restart_at[slot] is None:
+                        if not process.is_alive():
+                            self._schedule_restart(slot)
+                    elif time.monotonic() >= self._restart_at[slot]:
+                        self.restarts += 1
+                        self._start_worker(slot)
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            if not self._stopping:
+                self.stop()
+            self._join_workers()
+            logging.info("Workers accepted %s connections in total", self.connection_count)
+
+    def _join_workers(self):
+        """
+        Waits for the terminated workers to exit, and kills those which didn't exit
+        within STOP_TIMEOUT, e.g. because a session holds up the shutdown of the server.
+        """
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        for slot, process in enumerate(self.processes):
+            if process.is_alive():
+                logging.warning("Worker %s didn't exit in %.1fs, killing it", slot, STOP_TIMEOUT)
+                process.kill()
+                process.join()
+
+    def stop(self):
+        """
+        Stops the supervisor and all worker processes.
+        """
+        self._stopping = True
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
@@ -0,0 +1,42 @@
+"""
+This module contains the registry of the navigation strategies, from which
+the strategy of the sessions of a deployment is chosen by name.
+"""
+
+from .map import NavigationStrategy, RobotMap
+from .planner import PlanningRobotMap
+
+DEFAULT_STRATEGY = "greedy"
+
+STRATEGIES: dict[str, type[NavigationStrategy]] = {}
+
+
+def register_strategy(name: str, strategy_class: type[NavigationStrategy]):
+    """
+    Registers a navigation strategy under the given name.
+
+    :param name: The name of the strategy, e.g. for the command line.
+    :param strategy_class: The class of the strategy.
+    :raises ValueError: If a strategy with the name is already registered.
+    """
+    if name in STRATEGIES:
+        raise ValueError(f"Navigation strategy {name} is already registered")
+    STRATEGIES[name] = strategy_class
+
+
+def get_strategy(name: str) -> type[NavigationStrategy]:
+    """
+    Returns the navigation strategy registered under the given name.
+
+    :param name: The name of the strategy.
+    :raises ValueError: If no strategy is registered under the name.
+    """
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown navigation strategy {name}, "
+                         f"choose one of {', '.join(STRATEGIES)}") from None
+
+
+register_strategy("greedy", RobotMap)  # the fewest computations per decision
+register_strategy("planner", PlanningRobotMap)  # the fewest commands per session
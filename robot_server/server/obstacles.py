@@ -0,0 +1,237 @@
+"""
+This module contains the obstacle stores, which share the obstacles found by the robots
+between the sessions of the server, so that a robot navigating the same field as
+earlier robots doesn't have to hit the same obstacles again.
+The stores are optional, in the course tester every robot has its own world.
+"""
+
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+from threading import Lock
+
+DEFAULT_CAPACITY = 1 << 16
+
+# layout of the file of the MappedObstacleStore
+_MAGIC = b"RSOBST01"
+_HEADER = struct.Struct("<8sQQ")  # magic, number of allocated chunks, number of obstacles
+_ORIGIN = 1 << 14  # coordinates from -16384 to 16383, the protocol allows -9999 to 9999
+_CHUNK_SHIFT = 6  # chunks of 64x64 positions
+_CHUNK_MASK = (1 << _CHUNK_SHIFT) - 1
+_CHUNK_BYTES = (1 << 2 * _CHUNK_SHIFT) // 8
+_CHUNKS_PER_SIDE = 2 * _ORIGIN >> _CHUNK_SHIFT
+_DIRECTORY_OFFSET = mmap.ALLOCATIONGRANULARITY
+_DATA_OFFSET = _DIRECTORY_OFFSET + 4 * _CHUNKS_PER_SIDE ** 2
+_GROWTH_CHUNKS = 256  # the file is extended by 128 KiB at once
+
+
+class ObstacleStore:
+    """
+    Obstacles shared by the sessions of one server process.
+    Lookups read a set without locking, additions are serialized by a lock.
+    """
+    def __init__(self):
+        self._positions: set[tuple[int, int]] = set()
+        self._lock = Lock()
+
+    def __contains__(self, position: tuple) -> bool:
+        return position in self._positions
+
+    def __len__(self):
+        return len(self._positions)
+
+    def add(self, position: tuple):
+        """
+        Publishes an obstacle confirmed by a robot.
+
+        :param position: The position of the obstacle.
+        """
+        with self._lock:
+            self._positions.add(position)
+
+
+class SharedMemoryObstacleStore(ObstacleStore):
+    """
+    Obstacles shared by the sessions of several server processes. The obstacles are
+    appended to a log in shared memory, and every process caches the log in its own set,
+    reading only the entries added since the last lookup. Obstacles beyond the capacity
+    of the log are only known to the process which found them.
+    The store must be created before the worker processes are started.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        :param capacity: The maximum number of obstacles in the log.
+        """
+        super().__init__()
+        self.capacity = capacity
+        self._log = multiprocessing.Array("q", 2 * capacity)
+        self._count = multiprocessing.Value("q", 0, lock=False)  # guarded by the log lock
+        self._synced = 0
+        self._full = False
+
+    def __getstate__(self):
+        return {"capacity": self.capacity, "_log": self._log, "_count": self._count}
+
+    def __setstate__(self, state):
+        ObstacleStore.__init__(self)
+        self.__dict__.update(state)
+        self._synced = 0
+        self._full = False
+
+    def __contains__(self, position: tuple) -> bool:
+        if self._count.value != self._synced:
+            self._sync()
+        return position in self._positions
+
+    def __len__(self):
+        self._sync()
+        return len(self._positions)
+
+    def _sync(self):
+        """
+        Caches the entries of the log added since the last synchronization.
+        """
+        with self._log.get_lock():
+            count = self._count.value
+            entries = self._log[2 * self._synced:2 * count]
+        with self._lock:
+            self._positions.update(zip(entries[::2], entries[1::2]))
+            self._synced = max(self._synced, count)
+
+    def add(self, position: tuple):
+        if position in self:
+            return
+        with self._log.get_lock():
+            count = self._count.value
+            if count < self.capacity:
+                self._log[2 * count:2 * count + 2] = position
+                self._count.value = count + 1
+        if count == self.capacity and not self._full:
+            self._full = True
+            logging.warning("The obstacle log is full, new obstacles are kept in the process")
+        super().add(position)
+
+
+class MappedObstacleStore(ObstacleStore):
+    """
+    Obstacles kept in a memory-mapped file, which survives restarts of the server.
+    The file is a sparse bitmap of the coordinates: a directory maps every square chunk
+    of 64x64 positions to its bitmap, which is allocated when the first obstacle
+    in the chunk is added. A lookup reads two words of the mapping, nothing is loaded
+    into Python objects, so opening a file with millions of obstacles is instant.
+    Several processes can share the file, lookups don't lock, additions are serialized
+    by a lock which must be created before the worker processes are started.
+    """
+    def __init__(self, path):
+        """
+        :param path: The path of the file, created if it doesn't exist.
+        """
+        super().__init__()
+        self.path = os.fspath(path)
+        self._file_lock = multiprocessing.Lock()
+        self._open()
+
+    def __getstate__(self):
+        return {"path": self.path, "_file_lock": self._file_lock}
+
+    def __setstate__(self, state):
+        ObstacleStore.__init__(self)
+        self.__dict__.update(state)
+        self._open()
+
+    def _open(self):
+        """
+        Opens the file and maps it, creating an empty store if the file is empty.
+        """
+        self._file = open(self.path, "a+b")  # pylint: disable=consider-using-with
+        with self._file_lock:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                self._file.write(_HEADER.pack(_MAGIC, 0, 0))
+                self._file.truncate(_DATA_OFFSET)
+                self._file.flush()
+            self._file.seek(0)
+            if self._file.read(len(_MAGIC)) != _MAGIC \
+                    or os.fstat(self._file.fileno()).st_size < _DATA_OFFSET:
+                self._file.close()
+                raise ValueError(f"{self.path} is not an obstacle store")
+            self._mapping, self._directory = self._map()
+
+    def _map(self) -> tuple[mmap.mmap, memoryview]:
+        """
+        Maps the whole file, which may have been extended by another process.
+        The previous mapping is left to the garbage collector, as lookups
+        of other threads may still read it.
+
+        :return: The mapping and its directory of chunks.
+        """
+        mapping = mmap.mmap(self._file.fileno(), 0)
+        return mapping, memoryview(mapping)[_DIRECTORY_OFFSET:_DATA_OFFSET].cast("I")
+
+    def _remap(self, offset: int) -> mmap.mmap:
+        """
+        Remaps the file if the offset is out of the mapping, which happens
+        when a chunk was allocated by another process.
+
+        :return: The mapping.
+        """
+        with self._lock:
+            if offset >= len(self._mapping):
+                self._mapping, self._directory = self._map()
+            return self._mapping
+
+    def close(self):
+        """
+        Writes the mapping to the file and closes it.
+        """
+        self._directory.release()
+        self._mapping.flush()
+        self._mapping.close()
+        self._file.close()
+
+    def __contains__(self, position: tuple) -> bool:
+        x, y = position[0] + _ORIGIN, position[1] + _ORIGIN
+        if (x | y) >> _CHUNK_SHIFT >= _CHUNKS_PER_SIDE or x < 0 or y < 0:
+            return False
+        chunk = self._directory[(x >> _CHUNK_SHIFT) * _CHUNKS_PER_SIDE + (y >> _CHUNK_SHIFT)]
+        if chunk == 0:
+            return False
+        bit = (x & _CHUNK_MASK) << _CHUNK_SHIFT | y & _CHUNK_MASK
+        offset = _DATA_OFFSET + (chunk - 1) * _CHUNK_BYTES + (bit >> 3)
+        mapping = self._mapping
+        if offset >= len(mapping):
+            mapping = self._remap(offset)
+        return mapping[offset] >> (bit & 7) & 1 == 1
+
+    def __len__(self):
+        return _HEADER.unpack_from(self._mapping)[2]
+
+    def add(self, position: tuple):
+        """
+        Publishes an obstacle confirmed by a robot.
+
+        :param position: The position of the obstacle.
+        :raises ValueError: If the position is out of the coordinates of the store.
+        """
+        x, y = position[0] + _ORIGIN, position[1] + _ORIGIN
+        if (x | y) >> _CHUNK_SHIFT >= _CHUNKS_PER_SIDE or x < 0 or y < 0:
+            raise ValueError(f"Position {position} is out of the obstacle store")
+        index = (x >> _CHUNK_SHIFT) * _CHUNKS_PER_SIDE + (y >> _CHUNK_SHIFT)
+        bit = (x & _CHUNK_MASK) << _CHUNK_SHIFT | y & _CHUNK_MASK
+        with self._file_lock:
+            _, chunks, count = _HEADER.unpack_from(self._mapping)
+            chunk = self._directory[index]
+            if chunk == 0:
+                chunk = chunks = chunks + 1
+                size = _DATA_OFFSET + chunks * _CHUNK_BYTES
+                if size > os.fstat(self._file.fileno()).st_size:
+                    self._file.truncate(size + (_GROWTH_CHUNKS - 1) * _CHUNK_BYTES)
+                self._directory[index] = chunk  # the bitmap is zeroed by the extension
+            offset = _DATA_OFFSET + (chunk - 1) * _CHUNK_BYTES + (bit >> 3)
+            mapping = self._remap(offset)
+            byte = mapping[offset]
+            if not byte >> (bit & 7) & 1:
+                mapping[offset] = byte | 1 << (bit & 7)
+                count += 1
+            _HEADER.pack_into(mapping, 0, _MAGIC, chunks, count)
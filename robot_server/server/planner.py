@@ -0,0 +1,168 @@
+"""
+This module contains the PlanningRobotMap class, which navigates the robot along
+a shortest path to the center of the map instead of following the greedy rule
+of RobotMap.
+"""
+
+import heapq
+import logging
+from collections import deque
+from itertools import count
+from typing import Optional
+
+from .map import RobotMap, Action, Rotation, add_positions
+from .obstacles import ObstacleStore
+
+GOAL = (0, 0)
+
+# the coordinate difference of a move, by the value of the rotation
+_STEPS = tuple(rotation.to_coordinate() for rotation in Rotation)
+
+
+def _turns_between(rotation: int, target: int) -> int:
+    """
+    Returns the number of turns needed to turn from one rotation to another.
+    """
+    difference = (target - rotation) % 4
+    return 2 if difference == 2 else min(difference, 1)
+
+
+def _lower_bound(x: int, y: int, rotation: int) -> int:
+    """
+    Returns a lower bound of the number of commands needed to get from the position
+    in the rotation to the goal: every step needs a move, and every direction
+    of the remaining steps which the robot doesn't face needs a turn.
+    """
+    directions = [rotation.value for rotation in Rotation.from_coordinate((-x, -y))]
+    turns = min((_turns_between(rotation, direction) for direction in directions), default=0)
+    if len(directions) == 2:
+        turns += 1
+    return abs(x) + abs(y) + turns
+
+
+def _successors(state: tuple, obstacles: set, bounds: tuple) -> list[tuple[tuple, Action]]:
+    """
+    Returns the states reachable from the state with one command, with the commands.
+    A move is possible only to a position which isn't a known obstacle and lies within
+    the bounds (min_x, max_x, min_y, max_y).
+    """
+    x, y, facing = state
+    successors = [((x, y, (facing + 1) % 4), Action.TURN_RIGHT),
+                  ((x, y, (facing + 3) % 4), Action.TURN_LEFT)]
+    step_x, step_y = _STEPS[facing]
+    next_x, next_y = x + step_x, y + step_y
+    min_x, max_x, min_y, max_y = bounds
+    if min_x <= next_x <= max_x and min_y <= next_y <= max_y \
+            and (next_x, next_y) not in obstacles:
+        successors.append(((next_x, next_y, facing), Action.MOVE))
+    return successors
+
+
+def _actions_to(state: tuple, start: tuple, parents: dict) -> list[Action]:
+    """
+    Returns the commands leading from the start to the state found by the search.
+    """
+    actions = []
+    while state != start:
+        state, action = parents[state]
+        actions.append(action)
+    return actions[::-1]
+
+
+def plan_path(position: tuple, rotation: Rotation, obstacles: set) -> list[Action]:
+    """
+    Finds the shortest sequence of commands leading the robot to the center of the map,
+    where a move and a turn both cost one command. Uses A* over position x rotation.
+    Unknown positions are assumed to be free. The search stays in the rectangle spanned
+    by the position and the center, extended by two in every direction, which always
+    contains a path around single obstacles with free neighbourhoods.
+
+    :param position: the position of the robot
+    :param rotation: the rotation of the robot
+    :param obstacles: the positions of the known obstacles
+    :return: the commands, empty if the robot already is in the center
+    """
+    bounds = (min(position[0], GOAL[0]) - 2, max(position[0], GOAL[0]) + 2,
+              min(position[1], GOAL[1]) - 2, max(position[1], GOAL[1]) + 2)
+
+    start = (position[0], position[1], rotation.value)
+    costs = {start: 0}
+    parents: dict[tuple, tuple[tuple, Action]] = {}
+    tie_breaker = count()
+    queue = [(_lower_bound(*start), 0, next(tie_breaker), start)]
+    while queue:
+        _, cost, _, state = heapq.heappop(queue)
+        if state[:2] == GOAL:
+            return _actions_to(state, start, parents)
+        if cost > costs[state]:
+            continue
+        for successor, action in _successors(state, obstacles, bounds):
+            if cost + 1 < costs.get(successor, cost + 2):
+                costs[successor] = cost + 1
+                parents[successor] = (state, action)
+                heapq.heappush(queue, (cost + 1 + _lower_bound(*successor), cost + 1,
+                                       next(tie_breaker), successor))
+    raise ValueError(f"No path from {position} to the center")
+
+
+class _KnownObstacles:
+    """
+    The banned positions of a map together with the shared obstacles.
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, banned_positions: set, shared_obstacles: ObstacleStore):
+        self.banned_positions = banned_positions
+        self.shared_obstacles = shared_obstacles
+
+    def __contains__(self, position: tuple) -> bool:
+        return position in self.banned_positions or position in self.shared_obstacles
+
+
+class PlanningRobotMap(RobotMap):
+    """
+    RobotMap which plans the shortest sequence of commands to the center of the map,
+    counting turns as well as moves, since every command is a round trip.
+    The plan is kept while the robot follows it, and computed again
+    whenever the robot hits a new obstacle or ends up anywhere unexpected.
+    If the known obstacles leave no path, e.g. stale shared obstacles around a position,
+    the robot is navigated by the greedy rule of RobotMap for the rest of the session.
+    """
+    def __init__(self, shared_obstacles: Optional[ObstacleStore] = None):
+        super().__init__(shared_obstacles)
+        self._plan: deque[Action] = deque()
+        self._expected: Optional[tuple] = None
+        self._greedy = False
+
+    def add_obstacle(self, position: tuple):
+        super().add_obstacle(position)
+        self._plan.clear()
+
+    def _navigate(self, prev_position: tuple, new_position: tuple) -> Action:
+        if prev_position == new_position and self.previous_action == Action.MOVE:  # obstacle
+            self._hit_obstacle(add_positions(new_position, self.rotation.to_coordinate()))
+        if self._greedy:
+            return self._decide(new_position)
+
+        if not self._plan or self._expected != (new_position, self.rotation):
+            obstacles = self.banned_positions if self.shared_obstacles is None \
+                else _KnownObstacles(self.banned_positions, self.shared_obstacles)
+            try:
+                self._plan = deque(plan_path(new_position, self.rotation, obstacles))
+            except ValueError:
+                logging.warning("No path from %s to the center, navigating greedily",
+                                new_position)
+                self._greedy = True
+                return self._decide(new_position)
+        if not self._plan:
+            self._expected = None
+            return Action.MOVE  # already in the center
+
+        action = self._plan.popleft()
+        if action == Action.MOVE:
+            self._expected = (add_positions(new_position, self.rotation.to_coordinate()),
+                              self.rotation)
+        else:
+            turn = 1 if action == Action.TURN_RIGHT else 3
+            self._expected = (new_position, Rotation((self.rotation.value + turn) % 4))
+        return action
@@ -0,0 +1,193 @@
+"""
+This module contains the PooledRobotServer class, which services all robot
+sessions with a fixed pool of worker threads instead of a thread per connection.
+"""
+
+import logging
+import selectors
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from queue import SimpleQueue, Empty
+
+from .map import RobotMap
+from .server import RobotServer, DEFAULT_BACKLOG
+from .session import RobotSession
+from .timer_wheel import TimerWheel
+
+DEFAULT_POOL_SIZE = 4
+
+
+class PooledConnection:
+    """
+    Class holding a socket together with the session it drives.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, sock: socket.socket, session: RobotSession):
+        """
+        :param sock: The socket of the connection.
+        :param session: The session of the connection.
+        """
+        self.sock = sock
+        self.session = session
+
+
+class PooledRobotServer(RobotServer):
+    """
+    Class for the server, which waits for readable sockets with a selector
+    and lets a bounded pool of worker threads run the sessions.
+    A session which is waiting for the client, e.g. while the robot is recharging,
+    doesn't occupy any thread. Its timeout is tracked by a TimerWheel,
+    which is re-armed every time the session was processed.
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(self, host, port, reuse_port=False, backlog=DEFAULT_BACKLOG,
+                 pool_size=DEFAULT_POOL_SIZE, shared_obstacles=None,
+                 navigation_strategy=RobotMap, dispatcher=None):
+        """
+        :param host: The host IP address to listen on.
+        :param port: The port to listen on.
+        :param reuse_port: Whether to bind with SO_REUSEPORT.
+        :param backlog: The maximum number of connections waiting to be accepted.
+        :param pool_size: The number of worker threads.
+        :param shared_obstacles: The obstacles shared by the sessions, if any.
+        :param navigation_strategy: The class of the strategy navigating the robots.
+        :param dispatcher: The dispatcher delivering the events to the observers, if any.
+        """
+        super().__init__(host, port, reuse_port, backlog, shared_obstacles, navigation_strategy,
+                         dispatcher)
+        self.pool_size = pool_size
+        self._selector = None
+        self._returned: SimpleQueue = SimpleQueue()
+        self._timers = TimerWheel()
+
+    def _process(self, connection: PooledConnection):
+        """
+        Runs in a worker thread. Receives the available data and feeds it to the session.
+        The socket is non-blocking, so a spurious wakeup of the selector
+        returns the connection without any data being fed.
+        """
+        try:
+            session = connection.session
+            try:
+                received = connection.sock.recv_into(session.receive_buffer())
+            except BlockingIOError:
+                received = None
+            except OSError:
+                received = 0
+            if received is not None:
+                self._send(connection, session.feed_received(received))
+        finally:
+            self._returned.put(connection)
+            self._wakeup()
+
+    def _expire(self, connection: PooledConnection):
+        """
+        Runs in a worker thread. Notifies the session about its timeout.
+        """
+        try:
+            self._send(connection, connection.session.on_timeout())
+        finally:
+            self._returned.put(connection)
+            self._wakeup()
+
+    @staticmethod
+    def _send(connection: PooledConnection, data: bytes):
+        """
+        Sends the messages returned by the session to the client with a single call.
+        The responses are much shorter than the socket's send buffer, so a send
+        which would block means the client stopped reading, and the session ends.
+        """
+        if not data:
+            return
+        try:
+            connection.sock.sendall(data)
+        except OSError:
+            connection.session.feed(b"")
+
+    def _handle_connection(self, conn: socket.socket, addr):
+        """
+        Creates a session for an accepted connection and registers it in the selector.
+        :param conn: The socket of the connection.
+        :param addr: The address of the client.
+        """
+        conn.setblocking(False)  # the timeouts are tracked by the timer wheel
+        session = RobotSession(addr, self.shared_obstacles, self.navigation_strategy,
+                               self.dispatcher)
+        connection = PooledConnection(conn, session)
+        self.sessions.add(connection.session)
+        for observer in self.observers:
+            observer.on_new_connection(connection.session)
+        self._timers.arm(connection, connection.session.timeout)
+        self._selector.register(conn, selectors.EVENT_READ, connection)
+
+    def _take_back(self):
+        """
+        Registers the sessions returned by the workers again, or closes finished ones.
+        """
+        while True:
+            try:
+                connection = self._returned.get_nowait()
+            except Empty:
+                return
+            if connection.session.stop_flag:
+                connection.sock.close()
+                continue
+            self._timers.arm(connection, connection.session.timeout)
+            self._selector.register(connection.sock, selectors.EVENT_READ, connection)
+
+    def _expire_timers(self, pool: ThreadPoolExecutor):
+        """
+        Hands the idle connections whose timeout passed to the pool.
+        """
+        for connection in self._timers.expire():
+            self._selector.unregister(connection.sock)
+            pool.submit(self._expire, connection)
+
+    def start(self):
+        """
+        Starts the server.
+        """
+        self._server_socket = self._create_server_socket()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server_socket, selectors.EVENT_READ)
+        self._selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+
+        pool = ThreadPoolExecutor(self.pool_size, thread_name_prefix="robot-session")
+        try:
+            while not self._stopping:
+                self._expire_timers(pool)
+                for key, _ in self._selector.select(self._timers.next_timeout()):
+                    if key.fileobj is self._server_socket:
+                        self._accept_pending()
+                    elif key.fileobj is self._wakeup_receiver:
+                        self._drain_wakeup()
+                    else:
+                        self._selector.unregister(key.fileobj)
+                        self._timers.cancel(key.data)
+                        pool.submit(self._process, key.data)
+                self._take_back()
+        except KeyboardInterrupt:
+            self._stopping = True
+        finally:
+            # the workers return their connections to the selector, so it is closed after them
+            pool.shutdown()
+            self._take_back()
+            for session in self.sessions:
+                if not session.stop_flag:
+                    session.to_final()
+            for key in list(self._selector.get_map().values()):
+                if isinstance(key.data, PooledConnection):
+                    key.fileobj.close()
+            self._selector.close()
+            self._server_socket.close()
+        logging.info("Server stopped")
+
+    def stop(self):
+        """
+        Stops the server.
+        Can be called from any thread.
+        """
+        self._stopping = True
+        self._wakeup()
@@ -0,0 +1,103 @@
+"""
+This module contains the SessionRegistry class, which keeps track of the live
+sessions of a server and forgets the finished ones.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+from robot_server.bridge.thread_event import RobotThreadEvent, StateUpdate
+
+from .thread_observer import RobotThreadObserver
+
+DEFAULT_HISTORY = 100
+
+
+@dataclass(frozen=True)
+class SessionSummary:
+    """
+    Compact record of a finished session.
+    """
+    address: tuple
+    state: str
+    error: Optional[str]
+
+
+class _SessionReaper(RobotThreadObserver):
+    """
+    Observer removing its session from the registry once the session finishes.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    synchronous = True
+
+    def __init__(self, registry: "SessionRegistry", session):
+        super().__init__()
+        self._registry = registry
+        self._session = session
+
+    def on_thread_event(self, event: RobotThreadEvent):
+        if self._session is not None and isinstance(event, StateUpdate) and event.final:
+            session, self._session = self._session, None
+            self._registry.remove(session, event.state_name, event.error)
+
+
+class SessionRegistry:
+    """
+    Class holding the live sessions (RobotThread or RobotSession instances) of a server.
+    A session is removed as soon as it reaches the final or error state, so only
+    aggregate counters and a bounded history of summaries outlive it.
+    """
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        """
+        :param history: The number of summaries of finished sessions to keep.
+        """
+        self._live: dict = {}
+        self._lock = Lock()
+        self.total = 0
+        self.finished = 0
+        self.errored = 0
+        self.recent: deque[SessionSummary] = deque(maxlen=history)
+
+    def __len__(self):
+        return len(self._live)
+
+    def __iter__(self):
+        return iter(self.live)
+
+    @property
+    def live(self) -> list:
+        """
+        A snapshot of the live sessions.
+        """
+        with self._lock:
+            return list(self._live)
+
+    def add(self, session):
+        """
+        Adds a new session and starts watching its state.
+        :param session: The RobotThread or RobotSession to add.
+        """
+        with self._lock:
+            self._live[session] = None
+            self.total += 1
+        session.add_observer(_SessionReaper(self, session), {StateUpdate})
+
+    def remove(self, session, state: str, error: Optional[str] = None):
+        """
+        Removes a finished session and records its summary.
+        :param session: The session to remove.
+        :param state: The name of the state the session finished in.
+        :param error: The error the session finished with, if any.
+        """
+        with self._lock:
+            if self._live.pop(session, False) is False:
+                return
+            if state == "error":
+                self.errored += 1
+            else:
+                self.finished += 1
+            self.recent.append(SessionSummary(session.address, state, error))
@@ -3,25 +3,60 @@ This module contains the RobotServer class, which is responsible for
 accepting new connections and creating RobotThread instances for them.
 """
 
+import logging
+import selectors
 import socket
-import select
+from typing import Optional
 
+from .dispatcher import EventDispatcher
+from .map import NavigationStrategy, RobotMap
+from .obstacles import ObstacleStore
+from .registry import SessionRegistry
 from .server_observer import RobotServerObserver
 from .thread import RobotThread
 
+DEFAULT_BACKLOG = socket.SOMAXCONN
+
 
 class RobotServer:
     """
     Class for the server, which is responsible for accepting new connections
     and creating RobotThread instances for them.
     """
-    def __init__(self, host, port):
+
+    # pylint: disable=too-many-instance-attributes
+
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    def __init__(self, host, port, reuse_port=False, backlog=DEFAULT_BACKLOG,
+                 shared_obstacles: Optional[ObstacleStore] = None,
+                 navigation_strategy: type[NavigationStrategy] = RobotMap,
+                 dispatcher: Optional[EventDispatcher] = None):
+        """
+        :param host: The host IP address to listen on.
+        :param port: The port to listen on.
+        :param reuse_port: Whether to bind with SO_REUSEPORT, so that several
+            processes can listen on the same address.
+        :param backlog: The maximum number of connections waiting to be accepted.
+        :param shared_obstacles: The obstacles shared by the sessions, None if every robot
+            has its own world.
+        :param navigation_strategy: The class of the strategy navigating the robots.
+        :param dispatcher: The dispatcher delivering the events of the sessions
+            to their observers, None to call the observers from the sessions.
+        """
         self.host = host
         self.port = port
-        self.threads = []
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+        self.shared_obstacles = shared_obstacles
+        self.navigation_strategy = navigation_strategy
+        self.dispatcher = dispatcher
+        self.sessions = SessionRegistry()
         self.observers: list[RobotServerObserver] = []
         self._stopping = False
         self._server_socket = None
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
 
     def add_observer(self, observer: RobotServerObserver):
         """
@@ -37,41 +72,96 @@ class RobotServer:
         """
         self.observers.remove(observer)
 
-    def start(self):
+    def _create_server_socket(self) -> socket.socket:
         """
-        Starts the server.
+        Creates the non-blocking listening socket.
+        :return: The bound and listening socket.
         """
-        self._server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self._server_socket.bind((self.host, self.port))
-        self._server_socket.listen()
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.reuse_port:
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        server_socket.bind((self.host, self.port))
+        server_socket.listen(self.backlog)
+        server_socket.setblocking(False)
         print(f"Started server on {self.host}, port {self.port}")
+        return server_socket
+
+    def _wakeup(self):
+        """
+        Interrupts the select call of the accept loop.
+        Can be called from any thread.
+        """
+        try:
+            self._wakeup_sender.send(b"\0")
+        except OSError:
+            pass  # the buffer is full, so the loop will wake up anyway
+
+    def _drain_wakeup(self):
+        """
+        Reads all pending wake-up bytes.
+        """
+        while True:
+            try:
+                if not self._wakeup_receiver.recv(1024):
+                    return
+            except BlockingIOError:
+                return
 
-        inputs = [self._server_socket]
+    def _accept_pending(self):
+        """
+        Accepts all connections waiting in the backlog.
+        """
         while not self._stopping:
             try:
-                readable, _, _ = select.select(inputs, [], [], 1)
-                for readable_socket in readable:
-                    if self._stopping:
-                        break
-                    conn, addr = readable_socket.accept()
-                    thread = RobotThread(conn, addr)
-                    self.threads.append(thread)
-                    for observer in self.observers:
-                        observer.on_new_connection(thread)
-                    thread.start()
-            except OSError:
-                if self._stopping:
-                    break
-                raise
+                conn, addr = self._server_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as error:
+                logging.warning("Couldn't accept a connection: %s", error)
+                return
+            self._handle_connection(conn, addr)
+
+    def _handle_connection(self, conn: socket.socket, addr):
+        """
+        Creates and starts a RobotThread for an accepted connection.
+        :param conn: The socket of the connection.
+        :param addr: The address of the client.
+        """
+        conn.setblocking(True)
+        thread = RobotThread(conn, addr, self.shared_obstacles, self.navigation_strategy,
+                             self.dispatcher)
+        self.sessions.add(thread)
+        for observer in self.observers:
+            observer.on_new_connection(thread)
+        thread.start()
+
+    def start(self):
+        """
+        Starts the server.
+        """
+        self._server_socket = self._create_server_socket()
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._server_socket, selectors.EVENT_READ)
+            selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+            try:
+                while not self._stopping:
+                    for key, _ in selector.select():
+                        if key.fileobj is self._server_socket:
+                            self._accept_pending()
+                        else:
+                            self._drain_wakeup()
             except KeyboardInterrupt:
                 self.stop()
+            finally:
+                self._server_socket.close()
 
     def stop(self):
         """
         Stops the server.
-        Sets the state of all threads to final.
+        Sets the state of all live sessions to final.
+        Can be called from any thread.
         """
-        for thread in self.threads:
-            thread.to_final()
         self._stopping = True
-        self._server_socket.close()
+        for thread in self.sessions:
+            thread.to_final()
+        self._wakeup()
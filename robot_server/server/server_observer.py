@@ -21,5 +21,7 @@ class RobotServerObserver(ABC):
         """
         Called when a new connection is accepted by the server.
         :param robot_thread: The RobotThread instance for the new connection.
+            Engines without a thread per connection pass the RobotSession instead,
+            which offers the same address and add_observer interface.
         """
         raise NotImplementedError
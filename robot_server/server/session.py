@@ -0,0 +1,565 @@
+"""
+Session that implements the robot protocol without doing any I/O.
+It is in charge of the authentication and the message processing.
+The message processing is done by using a state machine.
+The session is fed with the received bytes and returns the bytes to send,
+so it can be driven by a thread, an event loop or a test harness.
+"""
+
+# pylint: disable=too-many-instance-attributes,unused-argument
+# unused-argument is disabled because the state machine passes \
+# the classification to every transition callback
+
+import logging
+from typing import Callable, Iterable, Optional
+
+from robot_server.bridge.thread_event import RobotThreadEvent, StateUpdate, MessageProcessed, \
+    MessageStackUpdate, MapUpdate
+
+from .dispatcher import EventDispatcher
+from .framing import MessageFramer, RECEIVE_SIZE
+from .messages import ServerMessages, ClientMessage, ClientMessages, \
+    CheckLevel, Classification, MessageClassifier, PrefixValidator
+from .map import NavigationStrategy, RobotMap
+from .obstacles import ObstacleStore
+from .state_machine import StateMachine, Transition
+from .thread_observer import RobotThreadObserver
+
+server_keys = {
+    0: 23019,
+    1: 32037,
+    2: 18789,
+    3: 16443,
+    4: 18189
+}
+
+client_keys = {
+    0: 32037,
+    1: 29295,
+    2: 13603,
+    3: 29533,
+    4: 21952
+}
+
+TIMEOUT = 1
+TIMEOUT_RECHARGING = 5
+
+# the types of the events the observers can subscribe to
+EVENT_TYPES = (MessageStackUpdate, MessageProcessed, StateUpdate, MapUpdate)
+# the subscribers of the sessions without observers, shared until the first observer is added
+_NO_SUBSCRIBERS: dict = {event_type: () for event_type in EVENT_TYPES}
+
+
+class MessageState:
+    """
+    The MessageState class is a state of the session's state machine.
+    It is used to classify the messages received in the state and to check if
+    the beginning of a message could be of a type that is supported by the state.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-arguments,too-many-positional-arguments
+
+    def __init__(self, name: str, supported_messages=None,
+                 on_enter: Optional[Callable] = None, on_exit: Optional[Callable] = None,
+                 check_prefix: bool = True):
+        """
+        :param name: The name of the state.
+        :param supported_messages: The client message types which can be received in the state.
+        :param on_enter: Called with the session when the session enters the state.
+        :param on_exit: Called with the session when the session leaves the state.
+        :param check_prefix: Whether the beginning of a message is checked to be a beginning
+            of a supported message, otherwise only its length is checked.
+        """
+        self.name = name
+        self.on_enter = on_enter
+        self.on_exit = on_exit
+        supported_messages = supported_messages \
+            if supported_messages is not None else []
+        self.supported_messages: list[ClientMessage] = supported_messages \
+            if isinstance(supported_messages, list) else [supported_messages]
+        # CLIENT_RECHARGING is accepted in every state and takes precedence
+        accepted_messages = [ClientMessages.CLIENT_RECHARGING] + \
+            [m for m in self.supported_messages if m is not ClientMessages.CLIENT_RECHARGING]
+        self.classifier = MessageClassifier(accepted_messages)
+        self.prefix_validator = PrefixValidator(accepted_messages, length_only=not check_prefix)
+
+
+class RobotSession:
+    """
+    The RobotSession class represents the protocol state of one connected robot.
+    It is in charge of the authentication and the message processing.
+    The message processing is done by using a state machine.
+
+    The session never touches a socket: feed() takes the received bytes and returns
+    all the framed messages that should be sent back in one buffer, so the driver
+    writes every response to a received chunk at once. on_timeout() is called when
+    the client was silent for longer than the current timeout,
+    and stop_flag tells the driver to close the connection.
+    """
+    end_sequence = b"\a\b"
+    framed_messages = ServerMessages.framed(end_sequence)
+
+    def __init__(self, address, shared_obstacles: Optional[ObstacleStore] = None,
+                 navigation_strategy: type[NavigationStrategy] = RobotMap,
+                 dispatcher: Optional[EventDispatcher] = None):
+        """
+        :param address: The address of the client.
+        :param shared_obstacles: The obstacles shared with the other sessions, if any.
+        :param navigation_strategy: The class of the strategy navigating the robot.
+        :param dispatcher: The dispatcher delivering the events to the observers,
+            None to call the observers directly.
+        """
+        self.address = address
+        self._framer = MessageFramer(self.end_sequence)
+
+        self.robot_username = None
+        self.key_id = None
+        self.username_hash = None
+        self.stop_flag = False
+        self.timeout = TIMEOUT
+        self.robot_map = navigation_strategy(shared_obstacles)
+        self.before_charging_state = None
+        self.state_index = 0
+
+        self.observers: list[RobotThreadObserver] = []
+        # the observers subscribed to every event type, an event is only built if the list
+        # of its type isn't empty, so a session without observers doesn't build any events
+        self._subscribers: dict[type, list[RobotThreadObserver]] = _NO_SUBSCRIBERS
+        self.dispatcher = dispatcher
+        self.message_in_process = None
+        self.error: Optional[str] = None
+        self._outgoing = bytearray()
+
+    @property
+    def state(self) -> str:
+        """
+        The name of the current state.
+        """
+        return self.machine.states[self.state_index].name
+
+    @property
+    def message_stack(self) -> bytes:
+        """
+        The received bytes which were not processed as a message yet.
+        """
+        return self._framer.pending
+
+    def _handle_correct_username(self, classification: Classification):
+        """
+        The handle_correct_username function is called when the client sends a message
+        with the correct username.
+        The function parses out the robot's username from that message and stores it,
+        and then sends a SERVER_KEY_REQUEST to request an encryption key.
+
+        :return: A string of the robot's username
+        """
+        self.robot_username = classification.value
+        self._send(ServerMessages.SERVER_KEY_REQUEST)
+
+    def _handle_correct_key_id(self, classification: Classification):
+        """
+        The handle_correct_key_id function is called when the client sends
+        a message with the correct key_id.
+        The function parses out the key_id from that message and stores.
+        The function computes a username hash using compute_username_hash() and stores it.
+        The function then sends a SERVER_CONFIRMATION message to the client.
+
+        :return: The server_confirmation message
+        """
+        self.key_id = classification.value
+        self.username_hash = self._compute_username_hash(self.robot_username)
+        self._send(ServerMessages.server_confirmation(self._compute_server_hash()))
+
+    def _handle_correct_confirmation(self, classification: Classification):
+        """
+        The handle_correct_confirmation function is called when the client sends
+        a confirmation message after receiving the SERVER_CONFIRMATION message.
+        The server responds with a SERVER_OK message and then sends a SERVER_MOVE message.
+        """
+        self._send(ServerMessages.SERVER_OK)
+        self._send(ServerMessages.SERVER_MOVE)
+
+    def _handle_client_ok(self, classification: Classification):
+        """
+        The handle_client_ok function is called when the client sends
+        a message of type CLIENT_OK after making a move.
+        The function parses the message and updates the robot's position on the map. It then sends a
+        message with an action that corresponds to what it should do next.
+        """
+        new_position = classification.value
+        self._send(ServerMessages.from_action(self.robot_map.update_position(new_position)))
+        if self._subscribers[MapUpdate]:
+            self._notify(MapUpdate(self.robot_map.get_map_state()))
+
+    def _handle_client_ok_center(self, classification: Classification):
+        """
+        The handle_client_ok_center function is called when the robot has reached
+        the center of the map and sends a message of type CLIENT_OK.
+        It updates its position on the map and sends a message to pick up the message.
+        """
+        new_position = classification.value
+        self.robot_map.update_position(new_position)
+        if self._subscribers[MapUpdate]:
+            self._notify(MapUpdate(self.robot_map.get_map_state()))
+        self._send(ServerMessages.SERVER_PICK_UP)
+
+    def _finish(self):
+        """
+        The finish function sets the stop flag, so the driver closes the connection.
+        """
+        self.stop_flag = True
+        logging.info("%s:%s finished, stopping session.", *self.address)
+
+    def _check_client_hash(self, classification: Classification) -> bool:
+        """
+        The check_client_hash function is called when the client sends
+        a message of type CLIENT_CONFIRMATION.
+        The function parses out the client_hash from the message and
+        compares it to the correct hash.
+
+        :return: True if the client_hash is correct, False otherwise
+        """
+        client_hash = classification.value
+        right_hash = self._compute_client_hash()
+        return client_hash == right_hash
+
+    @staticmethod
+    def _compute_username_hash(username: str) -> int:
+        """
+        The compute_username_hash function computes a hash value for the username.
+
+        :param username: str: The username to hash.
+        :return: Hash value for the username
+        """
+        return (sum(ord(c) for c in username) * 1000) % 65536
+
+    def _compute_server_hash(self) -> int:
+        """
+        The compute_server_hash function returns a server hash value for
+        the already stored username hash and key_id.
+
+        :return: The hash of the username and key_id
+        """
+        return (self.username_hash + server_keys.get(self.key_id)) % 65536
+
+    def _compute_client_hash(self) -> int:
+        """
+        The compute_client_hash function returns a client hash value for
+        the already stored username hash and key_id.
+
+        :return: The hash of the username and key_id
+        """
+        return (self.username_hash + client_keys.get(self.key_id)) % 65536
+
+    def _save_before_charging_state(self, classification: Classification):
+        """
+        This function saves the state before the robot enters the charging state.
+        """
+        self.before_charging_state = self.state
+
+    def _load_before_charging_state(self, classification: Classification):
+        """
+        This function loads the state the robot was in before it entered the charging state.
+        """
+        self.machine.go_to(self, self.before_charging_state)
+
+    def on_enter_recharging(self):
+        """
+        This function is called when the robot enters the recharging state.
+        It sets the timeout to TIMEOUT_RECHARGING.
+        """
+        self.timeout = TIMEOUT_RECHARGING
+
+    def on_exit_recharging(self):
+        """
+        This function is called when the robot exits the recharging state.
+        It sets the timeout to the default TIMEOUT.
+        """
+        self.timeout = TIMEOUT
+
+    def add_observer(self, observer: RobotThreadObserver,
+                     events: Optional[Iterable[type[RobotThreadEvent]]] = None):
+        """
+        The add_observer function adds an observer to the list of observers.
+        It also calls on_thread_event for that observer with a StateUpdate event,
+        if the observer subscribed to the state updates.
+        If the session has a dispatcher, the events are delivered by the dispatcher,
+        unless the observer is synchronous.
+
+        :param observer: RobotThreadObserver: An observer to add to the list of observers.
+        :param events: The types of the events the observer subscribes to, None for all.
+        :raises ValueError: If a type is not a type of the events of the session.
+        """
+        events = set(EVENT_TYPES if events is None else events)
+        if not events <= set(EVENT_TYPES):
+            raise ValueError(f"Unknown event types: {events - set(EVENT_TYPES)}")
+        if self.dispatcher is not None and not observer.synchronous:
+            observer = self.dispatcher.wrap(observer)
+        self.observers.append(observer)
+        if self._subscribers is _NO_SUBSCRIBERS:
+            self._subscribers = {event_type: [] for event_type in EVENT_TYPES}
+        for event_type in events:
+            self._subscribers[event_type].append(observer)
+        if StateUpdate in events:
+            observer.on_thread_event(
+                StateUpdate(self.state, self.state in ["final", "error"], self.error)
+            )
+
+    def _notify(self, event: RobotThreadEvent):
+        """
+        Calls on_thread_event for all observers subscribed to the type of the event.
+        """
+        for observer in self._subscribers[type(event)]:
+            observer.on_thread_event(event)
+
+    def on_state_change(self):
+        """
+        The on_state_change function is called when the state machine changes state.
+        It calls on_thread_event for all subscribed observers with a StateUpdate event.
+        """
+        if self._subscribers[StateUpdate]:
+            self._notify(StateUpdate(self.state, self.state in ["final", "error"], self.error))
+
+    def _send(self, bytestring: bytes):
+        """
+        The send function is used to send a message to the client.
+        It takes in a bytestring and appends it, framed, to the output buffer,
+        which is returned from feed() as a whole.
+        The function also logs what was sent, and notifies any observers that are listening.
+
+        :param bytestring: bytes: The message to send to the client.
+        """
+        framed = self.framed_messages.get(bytestring)
+        if framed is None:
+            framed = bytestring + self.end_sequence
+        logging.info("%s:%s <<< %s", *self.address, framed)
+        self._outgoing += framed
+        if self._subscribers[MessageProcessed]:
+            self._notify(MessageProcessed(bytes(self.message_in_process)
+                                          if self.message_in_process is not None else None,
+                                          bytestring, self.message_stack))
+        self.message_in_process = None
+
+    def _send_error(self, error: bytes):
+        """
+        The send_error function is used to send an error message to the client.
+        It takes in a bytestring and queues it to be sent to the client.
+        The function also stores the corresponding error message.
+
+        :param error: bytes: The error message to send to the client.
+        """
+        self.error = ServerMessages.get_error_message(error)
+        self._send(error)
+
+    def _send_syntax_error(self, classification: Classification):
+        """
+        Sends SERVER_SYNTAX_ERROR, used as a transition callback.
+        """
+        self._send_error(ServerMessages.SERVER_SYNTAX_ERROR)
+
+    def _send_logic_error(self, classification: Classification):
+        """
+        Sends SERVER_LOGIC_ERROR, used as a transition callback.
+        """
+        self._send_error(ServerMessages.SERVER_LOGIC_ERROR)
+
+    def _send_key_out_of_range(self, classification: Classification):
+        """
+        Sends SERVER_KEY_OUT_OF_RANGE_ERROR, used as a transition callback.
+        """
+        self._send_error(ServerMessages.SERVER_KEY_OUT_OF_RANGE_ERROR)
+
+    def _send_login_failed(self, classification: Classification):
+        """
+        Sends SERVER_LOGIN_FAILED, used as a transition callback.
+        """
+        self._send_error(ServerMessages.SERVER_LOGIN_FAILED)
+
+    def _send_logout(self, classification: Classification):
+        """
+        Sends SERVER_LOGOUT, used as a transition callback.
+        """
+        self._send(ServerMessages.SERVER_LOGOUT)
+
+    def to_final(self):
+        """
+        Moves the session to the final state, e.g. when the server stops.
+        """
+        self.machine.go_to(self, "final")
+
+    def to_error(self):
+        """
+        Moves the session to the error state.
+        """
+        self.machine.go_to(self, "error")
+
+    def feed(self, text: bytes) -> bytes:
+        """
+        The feed function processes a chunk of bytes received from the client.
+        It appends the chunk to the message stack, checks the maximum length and processes
+        all complete messages. An empty chunk means the client closed the connection.
+
+        :param text: bytes: The bytes received from the client.
+        :return: The framed messages that should be sent to the client, in one buffer.
+        """
+        if not self.stop_flag:
+            if text:
+                self._framer.feed(text)
+            self._process_data(len(text))
+        return self._flush()
+
+    def receive_buffer(self) -> memoryview:
+        """
+        The receive_buffer function returns the free part of the session's receive buffer,
+        so the driver can receive into it without allocating, e.g. with socket.recv_into.
+        The received bytes are then processed by feed_received().
+
+        :return: A view of the free part of the receive buffer.
+        """
+        return self._framer.writable(RECEIVE_SIZE)
+
+    def feed_received(self, size: int) -> bytes:
+        """
+        The feed_received function processes the bytes received into the view
+        returned by receive_buffer(), in the same way as feed() processes a chunk.
+        A size of zero means the client closed the connection.
+
+        :param size: int: The number of bytes received into the view.
+        :return: The framed messages that should be sent to the client, in one buffer.
+        """
+        if not self.stop_flag:
+            self._framer.commit(size)
+            self._process_data(size)
+        return self._flush()
+
+    def on_timeout(self) -> bytes:
+        """
+        The on_timeout function is called when the client did not send anything
+        within the current timeout. It moves the state machine to the error state.
+
+        :return: The framed messages that should be sent to the client, in one buffer.
+        """
+        if not self.stop_flag:
+            logging.info("%s:%s ! Timeout, disconnecting", *self.address)
+            self.error = "Timeout"
+            self.to_error()
+        return self._flush()
+
+    def _flush(self) -> bytes:
+        """
+        Empties the output buffer.
+
+        :return: The content of the output buffer.
+        """
+        if not self._outgoing:
+            return b""
+        outgoing = bytes(self._outgoing)
+        self._outgoing.clear()
+        return outgoing
+
+    def _process_data(self, size: int):
+        """
+        Private part of the feed functions.
+        The received bytes are already in the framer, and the frames are views
+        of the framer's buffer, so they are copied only for logging and observers.
+
+        :param size: int: The number of bytes received from the client.
+        """
+        if size == 0:
+            logging.info("%s:%s >>> %s", *self.address, b"")
+            self.error = "Closed by client"
+            self.to_error()
+            return
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info("%s:%s >>> %s", *self.address, self.message_stack[-size:])
+
+        if self._subscribers[MessageStackUpdate]:
+            self._notify(MessageStackUpdate(self.message_stack))
+
+        message = self._framer.next_frame()
+        while message is not None and not self.stop_flag:
+            if logging.getLogger().isEnabledFor(logging.INFO):
+                logging.info("%s:%s <=< %s", *self.address, bytes(message))
+            self.message_in_process = message
+            self.machine.process(
+                self, self.machine.states[self.state_index].classifier.classify(message)
+            )
+            logging.info("%s:%s () State now: %s", *self.address, self.state)
+            message = self._framer.next_frame()
+        self.message_in_process = None
+
+        validator = self.machine.states[self.state_index].prefix_validator
+        if not self.stop_flag and not self._framer.pending_is_valid(validator):
+            logging.info(
+                "%s:%s sent an invalid beginning of a message: %s",
+                *self.address, self.message_stack
+            )
+            self._send(ServerMessages.SERVER_SYNTAX_ERROR)
+            self.error = "Exceeded length" \
+                if validator.exceeds_length(self._framer.unterminated_length()) \
+                else "Invalid message"
+            self.to_error()
+
+    # The states and the transition table are shared by all sessions.
+    # They are defined last, because they refer to the callbacks above.
+    states = [
+        MessageState(name='wait_username',
+                     supported_messages=[ClientMessages.CLIENT_USERNAME,
+                                         ClientMessages.CLIENT_RECHARGING]),
+        MessageState(name='wait_key_id',
+                     supported_messages=[ClientMessages.CLIENT_KEY_ID,
+                                         ClientMessages.CLIENT_RECHARGING]),
+        MessageState(name='wait_confirmation',
+                     supported_messages=[ClientMessages.CLIENT_CONFIRMATION,
+                                         ClientMessages.CLIENT_RECHARGING]),
+        MessageState(name='wait_initial_client_ok',
+                     supported_messages=[ClientMessages.CLIENT_OK,
+                                         ClientMessages.CLIENT_RECHARGING]),
+        MessageState(name='wait_client_ok',
+                     supported_messages=[ClientMessages.CLIENT_OK,
+                                         ClientMessages.CLIENT_RECHARGING]),
+        MessageState(name='wait_message',
+                     supported_messages=[ClientMessages.CLIENT_MESSAGE,
+                                         ClientMessages.CLIENT_RECHARGING]),
+        MessageState(name='final', on_enter=_finish),
+        MessageState(name='error', on_enter=_finish),
+        # any other message is a logic error, which is only known when it is complete
+        MessageState(name='recharging',
+                     supported_messages=ClientMessages.CLIENT_FULL_POWER,
+                     on_enter=on_enter_recharging, on_exit=on_exit_recharging,
+                     check_prefix=False)
+    ]
+
+    transitions = [
+        Transition('*', 'recharging', ClientMessages.CLIENT_RECHARGING,
+                   before=_save_before_charging_state),
+        Transition('recharging', None, ClientMessages.CLIENT_FULL_POWER,
+                   after=_load_before_charging_state),
+        Transition('recharging', 'error', before=_send_logic_error),
+
+        Transition('wait_username', 'wait_key_id', ClientMessages.CLIENT_USERNAME,
+                   after=_handle_correct_username),
+
+        Transition('wait_key_id', 'wait_confirmation', ClientMessages.CLIENT_KEY_ID,
+                   CheckLevel.LOGIC, after=_handle_correct_key_id),
+        Transition('wait_key_id', 'error', ClientMessages.CLIENT_KEY_ID,
+                   before=_send_key_out_of_range),
+
+        Transition('wait_confirmation', 'wait_initial_client_ok',
+                   ClientMessages.CLIENT_CONFIRMATION,
+                   condition=_check_client_hash, after=_handle_correct_confirmation),
+        Transition('wait_confirmation', 'error', ClientMessages.CLIENT_CONFIRMATION,
+                   before=_send_login_failed),
+
+        Transition(['wait_initial_client_ok', 'wait_client_ok'], 'wait_message',
+                   ClientMessages.CLIENT_OK, CheckLevel.UNIQUE, after=_handle_client_ok_center),
+        Transition(['wait_initial_client_ok', 'wait_client_ok'], 'wait_client_ok',
+                   ClientMessages.CLIENT_OK, after=_handle_client_ok),
+
+        Transition('wait_message', 'final', ClientMessages.CLIENT_MESSAGE,
+                   before=_send_logout),
+
+        Transition('*', 'error', before=_send_syntax_error),
+    ]
+
+    machine = StateMachine(states, transitions, after_state_change=on_state_change)
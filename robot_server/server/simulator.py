@@ -0,0 +1,210 @@
+"""
+This module contains an offline simulator of the robots, which drives a navigation
+strategy such as RobotMap directly, without sockets, and measures how many commands
+it needs to bring the robot to the center of the map.
+"""
+
+import random
+import statistics
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+from .map import NavigationStrategy, Action, Rotation, add_positions
+
+CENTER = (0, 0)
+DEFAULT_RADIUS = 20
+DEFAULT_DENSITY = 0.15
+MAX_CRASHES = 20
+MAX_COMMANDS = 1000
+
+
+@dataclass
+class World:
+    """
+    Obstacles placed according to the rules of the task: every obstacle spans
+    a single coordinate, all its neighbouring coordinates are free,
+    and it is never placed in the center.
+    """
+    obstacles: set[tuple[int, int]] = field(default_factory=set)
+
+    @classmethod
+    def generate(cls, rng: random.Random, radius: int = DEFAULT_RADIUS,
+                 density: float = DEFAULT_DENSITY) -> "World":
+        """
+        Creates a world with obstacles on random coordinates within the radius.
+
+        :param rng: The random number generator.
+        :param radius: The maximal coordinate of an obstacle.
+        :param density: The number of attempts to place an obstacle per coordinate.
+            Attempts breaking the rules are skipped.
+        :return: The world.
+        """
+        world = cls()
+        for _ in range(int(density * (2 * radius + 1) ** 2)):
+            world.try_add_obstacle((rng.randint(-radius, radius), rng.randint(-radius, radius)))
+        return world
+
+    def try_add_obstacle(self, position: tuple) -> bool:
+        """
+        Adds an obstacle if the rules of the task allow it.
+
+        :param position: The position of the obstacle.
+        :return: Whether the obstacle was added.
+        """
+        if position == CENTER or any((position[0] + dx, position[1] + dy) in self.obstacles
+                                     for dx in (-1, 0, 1) for dy in (-1, 0, 1)):
+            return False
+        self.obstacles.add(position)
+        return True
+
+    def random_start(self, rng: random.Random, radius: int = DEFAULT_RADIUS) -> tuple:
+        """
+        Picks a random free starting position out of the center, and a random rotation.
+
+        :param rng: The random number generator.
+        :param radius: The maximal coordinate of the position.
+        :return: The position and the rotation.
+        """
+        while True:
+            position = (rng.randint(-radius, radius), rng.randint(-radius, radius))
+            if position != CENTER and position not in self.obstacles:
+                return position, rng.choice(list(Rotation))
+
+
+@dataclass(frozen=True)
+class RunResult:
+    """
+    Commands a robot received in one simulated session.
+
+    :param commands: The number of commands, the first move included.
+    :param moves: The number of move commands, crashes included.
+    :param turns: The number of turn commands.
+    :param crashes: The number of moves into an obstacle.
+    :param reached: Whether the robot reached the center.
+    """
+    commands: int
+    moves: int
+    turns: int
+    crashes: int
+    reached: bool
+
+    @property
+    def broken(self) -> bool:
+        """
+        Whether the robot crashed too many times and broke down.
+        """
+        return self.crashes > MAX_CRASHES
+
+
+def simulate(robot_map: NavigationStrategy, world: World, position: tuple, rotation: Rotation,
+             max_commands: int = MAX_COMMANDS) -> RunResult:
+    """
+    Drives the robot as the server does: the first command is a move, and the map
+    decides every following command from the position the robot reports.
+
+    :param robot_map: The map deciding the commands.
+    :param world: The world the robot moves in.
+    :param position: The starting position.
+    :param rotation: The starting rotation.
+    :param max_commands: The number of commands after which the run is given up.
+    :return: The result of the run.
+    """
+    action = Action.MOVE
+    moves = turns = crashes = 0
+    for commands in range(1, max_commands + 1):
+        if action == Action.MOVE:
+            moves += 1
+            next_position = add_positions(position, rotation.to_coordinate())
+            if next_position in world.obstacles:
+                crashes += 1
+            else:
+                position = next_position
+        else:
+            turns += 1
+            turn = 1 if action == Action.TURN_RIGHT else 3
+            rotation = Rotation((rotation.value + turn) % 4)
+        action = robot_map.update_position(position)
+        if position == CENTER:
+            return RunResult(commands, moves, turns, crashes, True)
+    return RunResult(max_commands, moves, turns, crashes, False)
+
+
+def simulate_seeds(map_factory: Callable[[], NavigationStrategy], seeds: Iterable[int],
+                   radius: int = DEFAULT_RADIUS, density: float = DEFAULT_DENSITY,
+                   known: float = 0.0) -> list[RunResult]:
+    """
+    Simulates one run per seed, each in its own random world from a random start,
+    so the same seed gives the same run to every map.
+
+    :param map_factory: Creates the map for a run, e.g. the RobotMap class.
+    :param seeds: The seeds of the runs.
+    :param radius: The maximal coordinate of the start and of the obstacles.
+    :param density: The density of the obstacles, see World.generate.
+    :param known: The fraction of the obstacles added to the map in advance,
+        as if earlier robots had found them.
+    :return: The results, in order of the seeds.
+    """
+    results = []
+    for seed in seeds:
+        rng = random.Random(seed)
+        world = World.generate(rng, radius, density)
+        position, rotation = world.random_start(rng, radius)
+        robot_map = map_factory()
+        for obstacle in sorted(world.obstacles):
+            if rng.random() < known:
+                robot_map.add_obstacle(obstacle)
+        results.append(simulate(robot_map, world, position, rotation))
+    return results
+
+
+@dataclass(frozen=True)
+class Distribution:
+    """
+    Distribution of one metric over several runs.
+    """
+    mean: float
+    median: float
+    p95: float
+    maximum: float
+
+    @classmethod
+    def of(cls, values: list[float]) -> "Distribution":
+        """
+        Computes the distribution of the values.
+        """
+        ordered = sorted(values)
+        return cls(statistics.fmean(ordered), statistics.median(ordered),
+                   ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], ordered[-1])
+
+    def __str__(self):
+        return f"mean {self.mean:6.2f}, median {self.median:5.1f}, " \
+               f"p95 {self.p95:5.1f}, max {self.maximum:5.1f}"
+
+
+@dataclass(frozen=True)
+class Summary:
+    """
+    Distributions of the metrics of several runs.
+    """
+    runs: int
+    commands: Distribution
+    moves: Distribution
+    turns: Distribution
+    crashes: Distribution
+    unreached: int
+    broken: int
+
+    @classmethod
+    def of(cls, results: list[RunResult]) -> "Summary":
+        """
+        Summarizes the results of the runs.
+        """
+        return cls(
+            len(results),
+            Distribution.of([result.commands for result in results]),
+            Distribution.of([result.moves for result in results]),
+            Distribution.of([result.turns for result in results]),
+            Distribution.of([result.crashes for result in results]),
+            sum(not result.reached for result in results),
+            sum(result.broken for result in results)
+        )
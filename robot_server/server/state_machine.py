@@ -0,0 +1,156 @@
+"""
+This module contains the StateMachine class, a transition table which is compiled
+once and shared by all sessions, so a session only holds the index of its state.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from .messages import ClientMessage, CheckLevel, Classification
+
+
+@dataclass(frozen=True)
+class Transition:
+    """
+    One row of a transition table.
+
+    :param source: The name of the source state, a list of names, or "*" for every state.
+    :param dest: The name of the destination state, or None for an internal transition,
+        which neither leaves the state nor notifies about a state change.
+    :param message: The client message type the message has to be classified as,
+        or None to match any message.
+    :param level: The level of checks the message has to pass.
+    :param condition: An additional condition, called with the model and the classification.
+    :param before: Called with the model and the classification before the state changes.
+    :param after: Called with the model and the classification after the state changed.
+    """
+    # pylint: disable=too-many-instance-attributes
+    source: Union[str, list[str]]
+    dest: Optional[str]
+    message: Optional[ClientMessage] = None
+    level: CheckLevel = CheckLevel.SYNTAX
+    condition: Optional[Callable[[Any, Classification], bool]] = None
+    before: Optional[Callable[[Any, Classification], None]] = None
+    after: Optional[Callable[[Any, Classification], None]] = None
+
+
+class _Row(NamedTuple):
+    """
+    A transition compiled for one source state.
+    """
+    level: CheckLevel
+    condition: Optional[Callable]
+    before: Optional[Callable]
+    dest: Optional[int]
+    after: Optional[Callable]
+
+
+class StateMachine:
+    """
+    Class for a state machine driven by classified messages.
+    The transitions are compiled into a table indexed by the state and the message type,
+    and the rows matching one pair are tried in the order the transitions were given.
+    The machine keeps no per-model data: the model stores the index of its current state
+    in its state_index attribute, and the states call their on_enter and on_exit
+    callbacks with the model.
+    """
+    def __init__(self, states: list, transitions: list[Transition],
+                 after_state_change: Optional[Callable[[Any], None]] = None):
+        """
+        :param states: The states, which have a name, on_enter and on_exit attribute.
+        :param transitions: The transitions, in order of precedence.
+        :param after_state_change: Called with the model after every state change.
+        """
+        self.states = states
+        self.after_state_change = after_state_change
+        self._indices = {state.name: index for index, state in enumerate(states)}
+
+        rows: list[list[tuple[Optional[ClientMessage], _Row]]] = [[] for _ in states]
+        for transition in transitions:
+            row = _Row(
+                transition.level if transition.message is not None else CheckLevel.NONE,
+                transition.condition,
+                transition.before,
+                self.index(transition.dest) if transition.dest is not None else None,
+                transition.after
+            )
+            for source in self._sources(transition.source):
+                rows[source].append((transition.message, row))
+
+        self._table: list[tuple[dict[ClientMessage, tuple[_Row, ...]], tuple[_Row, ...]]] = []
+        for state_rows in rows:
+            kinds = dict.fromkeys(message for message, _ in state_rows if message is not None)
+            by_message = {
+                kind: tuple(row for message, row in state_rows if message in (kind, None))
+                for kind in kinds
+            }
+            fallback = tuple(row for message, row in state_rows if message is None)
+            self._table.append((by_message, fallback))
+
+    def _sources(self, source: Union[str, list[str]]) -> list[int]:
+        """
+        Returns the indices of the source states of a transition.
+        """
+        if source == "*":
+            return list(range(len(self.states)))
+        if isinstance(source, str):
+            return [self.index(source)]
+        return [self.index(name) for name in source]
+
+    def index(self, name: str) -> int:
+        """
+        Returns the index of the state with the given name.
+
+        :param name: The name of the state.
+        :return: The index of the state.
+        """
+        return self._indices[name]
+
+    def process(self, model, classification: Classification) -> bool:
+        """
+        Executes the first transition from the state of the model
+        which accepts the classified message.
+
+        :param model: The model, e.g. a RobotSession.
+        :param classification: The classification of the received message.
+        :return: Whether a transition was executed.
+        """
+        by_message, fallback = self._table[model.state_index]
+        for row in by_message.get(classification.message, fallback):
+            if classification.level < row.level:
+                continue
+            if row.condition is not None and not row.condition(model, classification):
+                continue
+            if row.before is not None:
+                row.before(model, classification)
+            if row.dest is not None:
+                self._change_state(model, row.dest)
+            if row.after is not None:
+                row.after(model, classification)
+            if row.dest is not None and self.after_state_change is not None:
+                self.after_state_change(model)
+            return True
+        return False
+
+    def go_to(self, model, name: str):
+        """
+        Moves the model to the given state, regardless of the transitions.
+
+        :param model: The model, e.g. a RobotSession.
+        :param name: The name of the destination state.
+        """
+        self._change_state(model, self.index(name))
+        if self.after_state_change is not None:
+            self.after_state_change(model)
+
+    def _change_state(self, model, dest: int):
+        """
+        Leaves the current state of the model and enters the destination state.
+        """
+        on_exit = self.states[model.state_index].on_exit
+        if on_exit is not None:
+            on_exit(model)
+        model.state_index = dest
+        on_enter = self.states[dest].on_enter
+        if on_enter is not None:
+            on_enter(model)
@@ -0,0 +1,61 @@
+import selectors
+import socket
+import threading
+import time
+from random import randrange
+
+import pytest
+
+from robot_server.server import RobotServer, AsyncRobotServer, PooledRobotServer
+
+HOST = "127.0.0.1"
+
+
+def start_server(server_class, **kwargs):
+    port = randrange(49152, 65535)
+    server = server_class(host=HOST, port=port, **kwargs)
+    thread = threading.Thread(target=server.start)
+    thread.daemon = True
+    thread.start()
+    time.sleep(0.1)
+    return server, thread
+
+
+@pytest.mark.parametrize("server_class", [RobotServer, AsyncRobotServer, PooledRobotServer])
+def test_stop_is_immediate(server_class):
+    server, thread = start_server(server_class, backlog=512)
+    clients = [socket.create_connection((HOST, server.port)) for _ in range(100)]
+    time.sleep(0.2)
+    assert server.sessions.total == 100
+    start = time.monotonic()
+    server.stop()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 0.5
+    for client in clients:
+        client.close()
+
+
+@pytest.mark.parametrize("server_class", [RobotServer, PooledRobotServer])
+def test_stop_without_connections(server_class):
+    server, thread = start_server(server_class)
+    server.stop()
+    thread.join(0.5)
+    assert not thread.is_alive()
+
+
+def test_pool_spurious_wakeup():
+    server = PooledRobotServer(host=HOST, port=0)
+    server._selector = selectors.DefaultSelector()
+    conn, client = socket.socketpair()
+    server._handle_connection(conn, (HOST, 0))
+    (connection,) = [key.data for key in server._selector.get_map().values()]
+    start = time.monotonic()
+    server._process(connection)  # nothing to receive yet
+    assert time.monotonic() - start < 0.1
+    assert not connection.session.stop_flag
+    client.sendall(b"Oompa Loompa\a\b")
+    server._process(connection)
+    assert client.recv(1024) == b"107 KEY REQUEST\a\b"
+    conn.close()
+    client.close()
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from robot_server.server.map import RobotMap, Rotation
+from robot_server.server.simulator import World, RunResult, simulate
+
+np = pytest.importorskip("numpy")
+batch_simulator = pytest.importorskip("robot_server.server.batch_simulator")
+
+
+def scalar_results(world, starts, max_commands=1000):
+    return [simulate(RobotMap(), world, position, rotation, max_commands)
+            for position, rotation in starts]
+
+
+def batch_results(world, starts, max_commands=1000):
+    return batch_simulator.simulate_batch(
+        world.obstacles, [position for position, _ in starts],
+        [rotation.value for _, rotation in starts], max_commands).results()
+
+
+@pytest.mark.parametrize('seed, density', [(0, 0.15), (1, 0.3), (2, 0.0)])
+def test_matches_robot_map(seed, density):
+    rng = random.Random(seed)
+    world = World.generate(rng, 30, density)
+    starts = [world.random_start(rng, 30) for _ in range(300)]
+    assert batch_results(world, starts) == scalar_results(world, starts)
+
+
+def test_gives_up():
+    starts = [((0, -30), Rotation.UP), ((0, -3), Rotation.UP)]
+    assert batch_results(World(), starts, max_commands=10) == \
+           [RunResult(10, 10, 0, 0, False), RunResult(3, 3, 0, 0, True)]
+
+
+def test_banned_overflow_falls_back_to_robot_map(monkeypatch):
+    monkeypatch.setattr(batch_simulator, "BANNED_CAPACITY", 1)
+    rng = random.Random(3)
+    world = World.generate(rng, 20, 0.3)
+    starts = [world.random_start(rng, 20) for _ in range(100)]
+    assert batch_results(world, starts) == scalar_results(world, starts)
+
+
+def test_command_heatmap():
+    world = World({(2, 2), (-1, 3)})
+    heatmap = batch_simulator.command_heatmap(world.obstacles, 4)
+    assert heatmap.shape == (4, 9, 9)
+    assert (heatmap[:, 2 + 4, 2 + 4] == -1).all()
+    assert (heatmap[:, 3 + 4, -1 + 4] == -1).all()
+    for rotation in Rotation:
+        for x, y in [(0, -3), (4, 4), (-4, 1)]:
+            expected = simulate(RobotMap(), world, (x, y), rotation).commands
+            assert heatmap[rotation.value, y + 4, x + 4] == expected
+
+
+def test_command_heatmap_step():
+    heatmap = batch_simulator.command_heatmap(set(), 10, step=5)
+    assert heatmap.shape == (4, 5, 5)
+    assert heatmap[Rotation.UP.value, 0, 2] == 10  # (0, -10)
@@ -0,0 +1,178 @@
+import pickle
+import threading
+import time
+
+import pytest
+
+from robot_server.bridge.thread_event import MessageStackUpdate, MessageProcessed, StateUpdate
+from robot_server.server.dispatcher import EventDispatcher, OverflowPolicy
+from robot_server.server.session import RobotSession
+from robot_server.server.thread_observer import RobotThreadObserver
+
+
+class BlockedObserver(RobotThreadObserver):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.started = threading.Event()
+        self.released = threading.Event()
+
+    def on_thread_event(self, event):
+        self.started.set()
+        self.released.wait(5)
+        self.events.append(event)
+
+
+@pytest.fixture
+def observer():
+    observer = BlockedObserver()
+    yield observer
+    observer.released.set()
+
+
+def stacks(count):
+    return [MessageStackUpdate(bytes([index])) for index in range(count)]
+
+
+def contents(events):
+    return [vars(event) for event in events]
+
+
+@pytest.mark.parametrize("policy", [OverflowPolicy.DROP_OLDEST, OverflowPolicy.COALESCE])
+def test_delivers_in_order(observer, policy):
+    dispatcher = EventDispatcher(policy=policy)
+    wrapped = dispatcher.wrap(observer)
+    observer.released.set()
+    for event in stacks(100):
+        wrapped.on_thread_event(event)
+    assert dispatcher.flush(5)
+    assert contents(observer.events) == contents(stacks(100))
+    assert dispatcher.dropped == dispatcher.coalesced == 0
+
+
+def test_drop_oldest(observer):
+    dispatcher = EventDispatcher(2, OverflowPolicy.DROP_OLDEST)
+    wrapped = dispatcher.wrap(observer)
+    events = stacks(5)
+    wrapped.on_thread_event(events[0])
+    assert observer.started.wait(5)
+    for event in events[1:]:
+        wrapped.on_thread_event(event)
+    observer.released.set()
+    assert dispatcher.flush(5)
+    assert contents(observer.events) == contents([events[0], events[3], events[4]])
+    assert dispatcher.dropped == 2
+
+
+def test_coalesce(observer):
+    dispatcher = EventDispatcher(3, OverflowPolicy.COALESCE)
+    wrapped, other = dispatcher.wrap(observer), dispatcher.wrap(observer)
+    wrapped.on_thread_event(StateUpdate("start", False, None))
+    assert observer.started.wait(5)
+    processed = MessageProcessed(b"Oompa", b"107 KEY REQUEST", b"")
+    for event in [MessageStackUpdate(b"a"), MessageStackUpdate(b"ab"), processed,
+                  MessageStackUpdate(b"x"), MessageStackUpdate(b"xy"),
+                  MessageStackUpdate(b"xyz")]:
+        wrapped.on_thread_event(event)
+    other.on_thread_event(MessageStackUpdate(b"other"))
+    wrapped.on_thread_event(MessageStackUpdate(b"xyzw"))
+    observer.released.set()
+    assert dispatcher.flush(5)
+    assert contents(observer.events[1:]) == contents([
+        processed, MessageStackUpdate(b"xyzw"), MessageStackUpdate(b"other")])
+    assert dispatcher.coalesced == 3
+    assert dispatcher.dropped == 2
+
+
+def test_stack_interval():
+    class Observer(RobotThreadObserver):
+        def __init__(self):
+            super().__init__()
+            self.events = []
+
+        def on_thread_event(self, event):
+            self.events.append((time.monotonic(), event))
+
+    observer = Observer()
+    dispatcher = EventDispatcher(policy=OverflowPolicy.DROP_OLDEST, stack_interval=0.2)
+    wrapped = dispatcher.wrap(observer)
+    start_time = time.monotonic()
+    for event in stacks(100):
+        wrapped.on_thread_event(event)
+    time.sleep(0.4)
+    assert dispatcher.flush(5)
+    assert contents(event for _, event in observer.events) == contents(stacks(100)[::99])
+    assert observer.events[1][0] - start_time >= 0.2
+    assert dispatcher.coalesced == 98
+
+    processed = MessageProcessed(b"Oompa", b"107 KEY REQUEST", b"")
+    for event in [*stacks(3), processed, *stacks(3)]:
+        wrapped.on_thread_event(event)
+    assert dispatcher.flush(5)
+    assert contents(event for _, event in observer.events[2:]) == \
+        contents([stacks(3)[0], stacks(3)[2], processed, stacks(3)[2]])
+
+
+def test_block(observer):
+    dispatcher = EventDispatcher(1, OverflowPolicy.BLOCK)
+    wrapped = dispatcher.wrap(observer)
+    events = stacks(3)
+    wrapped.on_thread_event(events[0])
+    assert observer.started.wait(5)
+    wrapped.on_thread_event(events[1])
+    producer = threading.Thread(target=wrapped.on_thread_event, args=(events[2],))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()
+    observer.released.set()
+    producer.join(5)
+    assert dispatcher.flush(5)
+    assert contents(observer.events) == contents(events)
+    assert dispatcher.dropped == 0
+
+
+def test_failing_observer_doesnt_stop_the_dispatcher(observer, caplog):
+    class FailingObserver(RobotThreadObserver):
+        def on_thread_event(self, event):
+            raise ValueError(event)
+
+    dispatcher = EventDispatcher()
+    observer.released.set()
+    dispatcher.wrap(FailingObserver()).on_thread_event(StateUpdate("start", False, None))
+    dispatcher.wrap(observer).on_thread_event(StateUpdate("start", False, None))
+    assert dispatcher.flush(5)
+    assert len(observer.events) == 1
+    assert "failed" in caplog.text
+
+
+def test_pickle():
+    dispatcher = pickle.loads(pickle.dumps(EventDispatcher(5, OverflowPolicy.BLOCK, 0.1)))
+    assert dispatcher.capacity == 5
+    assert dispatcher.policy is OverflowPolicy.BLOCK
+    assert dispatcher.stack_interval == 0.1
+
+
+def test_slow_observer_doesnt_delay_the_session(observer):
+    class Counter(RobotThreadObserver):
+        synchronous = True
+
+        def __init__(self):
+            super().__init__()
+            self.count = 0
+
+        def on_thread_event(self, event):
+            self.count += 1
+
+    dispatcher = EventDispatcher()
+    session = RobotSession(("127.0.0.1", 0), dispatcher=dispatcher)
+    counter = Counter()
+    session.add_observer(observer)
+    session.add_observer(counter)
+    assert observer.started.wait(5)
+    assert session.feed(b"Oompa Loompa\a\b") == b"107 KEY REQUEST\a\b"
+    assert session.observers[1] is counter
+    assert counter.count > 1
+    assert observer.events == []
+    observer.released.set()
+    assert dispatcher.flush(5)
+    assert len(observer.events) + dispatcher.coalesced == counter.count
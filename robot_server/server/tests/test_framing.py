@@ -0,0 +1,129 @@
+import pytest
+
+import socket
+
+from robot_server.server.framing import MessageFramer, DEFAULT_CAPACITY
+from robot_server.server.messages import ClientMessages, PrefixValidator
+
+
+@pytest.fixture(scope="function")
+def framer():
+    return MessageFramer(b"\a\b")
+
+
+def test_single_frame(framer):
+    framer.feed(b"OK 1 2\a\b")
+    assert framer.next_frame() == b"OK 1 2"
+    assert framer.next_frame() is None
+    assert framer.pending == b""
+    assert len(framer) == 0
+
+
+def test_several_frames_in_one_chunk(framer):
+    framer.feed(b"first\a\bsecond\a\bthi")
+    assert list(framer.frames()) == [b"first", b"second"]
+    assert framer.pending == b"thi"
+    framer.feed(b"rd\a\b")
+    assert list(framer.frames()) == [b"third"]
+
+
+def test_byte_by_byte(framer):
+    frames = []
+    for byte in b"Oompa Loompa\a\b\a\b":
+        framer.feed(bytes([byte]))
+        frames += (bytes(frame) for frame in framer.frames())
+    assert frames == [b"Oompa Loompa", b""]
+
+
+def test_split_end_sequence(framer):
+    framer.feed(b"abc\a")
+    assert framer.next_frame() is None
+    assert framer.pending == b"abc\a"
+    framer.feed(b"\b")
+    assert framer.next_frame() == b"abc"
+
+
+def test_bell_inside_message(framer):
+    framer.feed(b"a\ab\b\a")
+    assert framer.next_frame() is None
+    framer.feed(b"\a\b")
+    assert framer.next_frame() == b"a\ab\b\a"
+
+
+def test_growth(framer):
+    message = b"x" * 98 + b"\a\b"
+    count = DEFAULT_CAPACITY // len(message) * 3
+    framer.feed(message * count + b"tail")
+    assert sum(1 for _ in framer.frames()) == count
+    assert framer.pending == b"tail"
+    framer.feed(b"\a\b")
+    assert framer.next_frame() == b"tail"
+
+
+def test_compaction(framer):
+    for _ in range(DEFAULT_CAPACITY):
+        framer.feed(b"OK 0 0\a\bOK")
+        assert framer.next_frame() == b"OK 0 0"
+        framer.feed(b" 1 1\a\b")
+        assert framer.next_frame() == b"OK 1 1"
+    framer.feed(b"abc")
+    view = framer.writable(DEFAULT_CAPACITY - 3)
+    assert len(view) == DEFAULT_CAPACITY - 3
+    assert framer.pending == b"abc"
+
+
+def test_frames_are_views(framer):
+    framer.feed(b"first\a\bsecond\a\b")
+    first, second = framer.frames()
+    assert isinstance(first, memoryview)
+    assert (first, second) == (b"first", b"second")
+
+
+def test_recv_into():
+    framer = MessageFramer(b"\a\b")
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(b"Oompa Loompa\a\b0\a")
+        framer.commit(right.recv_into(framer.writable()))
+        assert framer.next_frame() == b"Oompa Loompa"
+        assert framer.next_frame() is None
+        left.sendall(b"\b")
+        framer.commit(right.recv_into(framer.writable()))
+        assert framer.next_frame() == b"0"
+        assert len(framer) == 0
+
+
+def test_pending_is_valid(framer):
+    validator = PrefixValidator([ClientMessages.CLIENT_CONFIRMATION])
+    assert framer.pending_is_valid(validator)
+    framer.feed(b"123\a")
+    assert framer.pending_is_valid(validator)
+    framer.feed(b"\b45678")
+    assert framer.next_frame() == b"123"
+    assert framer.pending_is_valid(validator)
+    framer.feed(b"9")
+    assert not framer.pending_is_valid(validator)
+
+
+def test_pending_is_validated_once(framer):
+    class CountingValidator(PrefixValidator):
+        def __init__(self, messages):
+            super().__init__(messages)
+            self.validated = 0
+
+        def advance(self, state, data):
+            self.validated += len(data)
+            return super().advance(state, data)
+
+    validator = CountingValidator([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_MESSAGE])
+    for byte in b"Tajny vzkaz\a":
+        framer.feed(bytes([byte]))
+        assert framer.pending_is_valid(validator)
+    assert validator.validated == len(b"Tajny vzkaz")
+    framer.feed(b"\bOK")
+    assert framer.next_frame() == b"Tajny vzkaz"
+    ok_validator = CountingValidator([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK])
+    assert framer.pending_is_valid(ok_validator)
+    framer.feed(b" 1 x")
+    assert not framer.pending_is_valid(ok_validator)
+    assert ok_validator.validated == len(b"OK 1 x")
@@ -1,6 +1,7 @@
 import pytest
 
-from robot_server.server.map import RobotMap, Action, Rotation
+from robot_server.server.map import RobotMap, Action, Rotation, add_positions
+from robot_server.server.obstacles import ObstacleStore
 from robot_server.bridge.thread_event import MapState
 
 
@@ -41,7 +42,7 @@ def initial_map():
 
 
 def test_initial_map(initial_map):
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     assert initial_map.position is None
     assert initial_map.rotation is None
@@ -53,7 +54,7 @@ def test_first_move(initial_map):
     assert initial_map.position == (0, -1)
     assert initial_map.rotation is None
     assert initial_map.previous_action is Action.MOVE
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     assert res == Action.MOVE
 
@@ -73,14 +74,14 @@ def test_obstacle_1(initial_map):
     assert initial_map.position == (-1, -1)
     assert res_1 == Action.MOVE
     assert initial_map.rotation is None
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     res_2 = initial_map.update_position((-1, -1))
     assert initial_map.position == (-1, -1)
     assert res_2 == Action.TURN_RIGHT
     assert initial_map.rotation is None
     # obstacles are empty because the robot doesn't know its location
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     res_3 = initial_map.update_position((-1, -1))
     assert initial_map.position == (-1, -1)
@@ -100,27 +101,27 @@ def test_obstacle_2(initial_map):
     res = initial_map.update_position((-2, -2))
     assert res == Action.MOVE
     assert initial_map.rotation is None
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     res = initial_map.update_position((-2, -2))
     assert res == Action.TURN_RIGHT
     assert initial_map.rotation is None
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     res = initial_map.update_position((-2, -2))
     assert res == Action.MOVE
     assert initial_map.rotation is None
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     res = initial_map.update_position((-1, -2))
     assert res == Action.MOVE
     assert initial_map.rotation == Rotation.RIGHT
-    assert initial_map.banned_positions == []
+    assert initial_map.banned_positions == set()
     assert initial_map.obstacles == []
     res = initial_map.update_position((-1, -2))
     assert res in (Action.TURN_LEFT, Action.TURN_RIGHT)
     assert initial_map.rotation != Rotation.RIGHT
-    assert initial_map.banned_positions == [(0, -2)]
+    assert initial_map.banned_positions == {(0, -2)}
     assert initial_map.obstacles == [(0, -2)]
 
 
@@ -139,3 +140,102 @@ def test_map_state(initial_map):
     assert state.position == (0, 0)
     assert state.rotation == MapState.Rotation.UP
     assert state.obstacles == []
+    initial_map.add_obstacle((1, 1))
+    assert state.obstacles == []
+
+
+def test_long_path_through_obstacles(initial_map):
+    def is_obstacle(position):
+        return (position[0] - 2 * position[1]) % 5 == 0 and position != (0, 0)
+
+    position, rotation = (-60, -60), Rotation.UP
+    for _ in range(1000):
+        action = initial_map.update_position(position)
+        if position == (0, 0):
+            break
+        if action == Action.MOVE:
+            next_position = add_positions(position, rotation.to_coordinate())
+            if not is_obstacle(next_position):
+                position = next_position
+        else:
+            turn = 1 if action == Action.TURN_RIGHT else 3
+            rotation = Rotation((rotation.value + turn) % 4)
+    assert position == (0, 0)
+    assert len(initial_map.obstacles) > 10
+    assert all(is_obstacle(obstacle) for obstacle in initial_map.obstacles)
+    assert set(initial_map.obstacles) <= initial_map.banned_positions
+
+
+class ReferenceRobotMap(RobotMap):
+    """
+    RobotMap with the navigation rule written with the Rotation methods,
+    as it was before the decision table.
+    """
+    def _navigate(self, prev_position, new_position):
+        next_position = add_positions(new_position, self.rotation.to_coordinate())
+        available_rotations = set(map(Rotation.opposite, Rotation.from_coordinate(new_position)))
+
+        if prev_position == new_position and self.previous_action == Action.MOVE:
+            self.add_obstacle(next_position)
+            available_rotations.remove(self.rotation)
+
+        available_rotations = [
+            rot for rot in available_rotations
+            if add_positions(new_position, rot.to_coordinate()) not in self.banned_positions
+        ]
+
+        if len(available_rotations) == 0:
+            if next_position in self.banned_positions:
+                return Action.TURN_RIGHT
+            self.banned_positions.add(self.position)
+            return Action.MOVE
+
+        if self.rotation not in available_rotations:
+            return self.rotation.turn_for(available_rotations)
+        return Action.MOVE
+
+
+def test_decision_table_matches_reference():
+    checked = 0
+    for x in range(-2, 3):
+        for y in range(-2, 3):
+            for rotation in Rotation:
+                for banned_mask in range(16):
+                    banned = {add_positions((x, y), neighbour.to_coordinate())
+                              for neighbour in Rotation if banned_mask >> neighbour.value & 1}
+                    step = rotation.to_coordinate()
+                    for prev_position, previous_action in [
+                            (add_positions((x, y), step, b_mult=-1), Action.MOVE),  # moved
+                            ((x, y), Action.MOVE),  # hit an obstacle
+                            ((x, y), Action.TURN_LEFT)]:  # turned
+                        maps = [ReferenceRobotMap(), RobotMap()]
+                        for robot_map in maps:
+                            robot_map.position = prev_position
+                            robot_map.rotation = rotation
+                            robot_map.previous_action = previous_action
+                            robot_map.banned_positions = set(banned)
+                        try:
+                            expected = maps[0].update_position((x, y))
+                        except KeyError:  # hit an obstacle not facing the center
+                            continue
+                        assert maps[1].update_position((x, y)) == expected
+                        assert maps[1].rotation == maps[0].rotation
+                        assert maps[1].banned_positions == maps[0].banned_positions
+                        assert maps[1].obstacles == maps[0].obstacles
+                        checked += 1
+    assert checked > 3500
+
+
+def test_shared_obstacles():
+    shared = ObstacleStore()
+    first = RobotMap(shared)
+    first.update_position((0, -3))
+    assert first.update_position((0, -2)) == Action.MOVE
+    assert first.update_position((0, -2)) == Action.TURN_RIGHT  # hit (0, -1)
+    assert (0, -1) in shared
+
+    second = RobotMap(shared)
+    second.update_position((0, -3))
+    assert second.update_position((0, -2)) == Action.TURN_RIGHT  # avoids (0, -1)
+    assert second.obstacles == []
+    assert len(shared) == 1
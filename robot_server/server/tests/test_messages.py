@@ -1,7 +1,8 @@
 import pytest
 
 from robot_server.server.messages import ServerMessages, \
-    ClientMessage, ClientMessages, ARG_NAME, RegexCheck
+    ClientMessage, ClientMessages, ARG_NAME, RegexCheck, \
+    MessageClassifier, CheckLevel, UNKNOWN_MESSAGE, PrefixValidator, literal_syntax
 from robot_server.server.map import Action
 
 
@@ -124,3 +125,126 @@ def test_message_static():
     assert ClientMessages.parse_message(message=b"XXX XXX\aYY YY YY\aZZ ZZ",
                                         end_sequence=b"\aYY") == \
            (b"XXX XXX\aYY", b" YY YY\aZZ ZZ")
+
+
+@pytest.mark.parametrize(
+    'messages, test, expected_message, level, value',
+    [
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK],
+         b"OK -12 3", ClientMessages.CLIENT_OK, CheckLevel.LOGIC, (-12, 3)),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK],
+         b"OK 0 0", ClientMessages.CLIENT_OK, CheckLevel.UNIQUE, (0, 0)),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK],
+         b"RECHARGING", ClientMessages.CLIENT_RECHARGING, CheckLevel.UNIQUE, b"RECHARGING"),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK],
+         b"OK 1.5 0", None, CheckLevel.NONE, None),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_KEY_ID],
+         b"4", ClientMessages.CLIENT_KEY_ID, CheckLevel.UNIQUE, 4),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_KEY_ID],
+         b"-1", ClientMessages.CLIENT_KEY_ID, CheckLevel.SYNTAX, -1),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_KEY_ID],
+         b"1234", None, CheckLevel.NONE, None),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_USERNAME],
+         b"Oompa Loompa", ClientMessages.CLIENT_USERNAME, CheckLevel.UNIQUE, "Oompa Loompa"),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_USERNAME],
+         b"x" * 19, None, CheckLevel.NONE, None),
+        ([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_MESSAGE],
+         b"", None, CheckLevel.NONE, None),
+        ([], b"anything", None, CheckLevel.NONE, None),
+    ])
+def test_classifier(messages, test, expected_message, level, value):
+    classification = MessageClassifier(messages).classify(test)
+    assert classification.message is expected_message
+    assert classification.level == level
+    assert classification.value == value
+
+
+@pytest.mark.parametrize(
+    'message, tests',
+    [
+        (ClientMessages.CLIENT_OK, [b"OK 1 2", b"OK 0 0", b"OK -0 0", b"OK 12345 1", b"OK 1"]),
+        (ClientMessages.CLIENT_KEY_ID, [b"0", b"5", b"-1", b"00", b"a", b"1234"]),
+        (ClientMessages.CLIENT_CONFIRMATION, [b"12345", b"123456", b"-1", b"1 "]),
+        (ClientMessages.CLIENT_USERNAME, [b"a", b"a\nb", b"x" * 18, b"x" * 19, b""]),
+        (ClientMessage(5, syntax_checks=RegexCheck(br"(\d+)"),
+                       logic_checks=RegexCheck(br"1", unless=True, full_match=False),
+                       unique_checks=RegexCheck(br"2(3)")),
+         [b"123", b"23", b"24", b"2", b"x"]),
+    ])
+def test_classifier_matches_checks(message, tests):
+    classifier = MessageClassifier([message])
+    for test in tests:
+        kwargs = {ARG_NAME: test}
+        classification = classifier.classify(test)
+        assert classification.passes(message) == message.syntax_check(**kwargs)
+        assert classification.passes(message, CheckLevel.LOGIC) == message.logic_check(**kwargs)
+        assert classification.passes(message, CheckLevel.UNIQUE) == message.unique_check(**kwargs)
+        if classification is not UNKNOWN_MESSAGE:
+            assert classification.value == message.parse(**kwargs)
+
+
+def test_literal_syntax():
+    validator = PrefixValidator([ClientMessage(prefix_syntax=literal_syntax(b"FULL POWER"))])
+    assert all(validator.is_valid(b"FULL POWER"[:i]) for i in range(11))
+    assert not validator.is_valid(b"FULL  ")
+    assert not validator.is_valid(b"FULL POWER!")
+
+
+@pytest.mark.parametrize(
+    'message, valid, invalid_prefixes',
+    [
+        (ClientMessages.CLIENT_OK, [b"OK 1 2", b"OK -123 5", b"OK 0 0", b"OK 1 -1234"],
+         [b"OK  ", b"OK 12345", b"OK 1 2 ", b"OK --", b"O1", b"OK 1 -1234 "]),
+        (ClientMessages.CLIENT_KEY_ID, [b"0", b"-1", b"123"], [b"a", b"1234", b"1-"]),
+        (ClientMessages.CLIENT_CONFIRMATION, [b"0", b"12345"], [b"-", b"123456", b"1 "]),
+        (ClientMessages.CLIENT_FULL_POWER, [b"FULL POWER"], [b"FULL  ", b"FULL POWER!"]),
+        (ClientMessages.CLIENT_USERNAME, [b"a", b"x" * 18], [b"a\nb", b"x" * 19]),
+    ])
+def test_prefix_validator(message, valid, invalid_prefixes):
+    validator = PrefixValidator([message])
+    for test in valid:
+        assert message.syntax_check(**{ARG_NAME: test})
+        assert all(validator.is_valid(test[:i]) for i in range(len(test) + 1))
+    for test in invalid_prefixes:
+        assert not validator.is_valid(test)
+
+
+def test_prefix_validator_max_length():
+    validator = PrefixValidator([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK])
+    assert validator.max_length == 10
+    assert validator.exceeds_length(11)
+    assert validator.is_valid(b"RECHAR")
+    assert validator.is_valid(b"OK -12 ")
+    assert not validator.is_valid(b"OK -12 3456")
+    assert not validator.is_valid(b"OKAY")
+    assert PrefixValidator([ClientMessages.CLIENT_RECHARGING]).is_valid(b"")
+    assert not PrefixValidator([]).is_valid(b"")
+
+
+def test_prefix_validator_length_per_type():
+    validator = PrefixValidator([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_KEY_ID])
+    assert validator.is_valid(b"-12")
+    assert not validator.is_valid(b"1234")  # shorter than RECHARGING, too long for a key
+    assert validator.is_valid(b"RECHARGING")
+
+
+def test_prefix_validator_advance():
+    validator = PrefixValidator([ClientMessages.CLIENT_RECHARGING, ClientMessages.CLIENT_OK])
+    for test in [b"OK -12 3", b"OK 1 2 ", b"RECHARGING", b"OKAY"]:
+        state = validator.initial
+        for i in range(len(test)):
+            state = validator.advance(state, test[i:i + 1])
+            assert (state != validator.REJECTED) == validator.is_valid(test[:i + 1])
+
+
+def test_prefix_validator_length_only():
+    validator = PrefixValidator([ClientMessages.CLIENT_FULL_POWER], length_only=True)
+    assert validator.is_valid(b"OK 0 1")
+    assert not validator.is_valid(b"OK 0 123456")
+
+
+def test_framed_server_messages():
+    framed = ServerMessages.framed(b"\a\b")
+    assert framed[ServerMessages.SERVER_OK] == b"200 OK\a\b"
+    assert framed[ServerMessages.SERVER_LOGIC_ERROR] == b"302 LOGIC ERROR\a\b"
+    assert len(framed) == 11
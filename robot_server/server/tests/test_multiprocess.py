@@ -0,0 +1,119 @@
+import os
+import signal
+import socket
+import threading
+import time
+import pytest
+
+from robot_server.server import RobotServer, AsyncRobotServer
+from robot_server.server import multiprocess
+from robot_server.server.multiprocess import MultiProcessRobotServer
+
+HOST = "127.0.0.1"
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"),
+                                reason="SO_REUSEPORT is not supported")
+
+
+def free_port():
+    # a random port could collide with an ephemeral port of a previous test,
+    # and workers failing to bind would be restarted forever
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module", params=[RobotServer, AsyncRobotServer])
+def supervisor(request):
+    port = free_port()
+    server = MultiProcessRobotServer(HOST, port, 2, request.param)
+    thread = threading.Thread(target=server.start)
+    thread.daemon = True
+    thread.start()
+    time.sleep(0.5)
+    yield server
+    server.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def run_example(port):
+    with socket.create_connection((HOST, port)) as client:
+        client.sendall(b"Oompa Loompa\a\b")
+        assert client.recv(1024) == b"107 KEY REQUEST\a\b"
+        client.sendall(b"0\a\b")
+        assert client.recv(1024) == b"64907\a\b"
+        client.sendall(b"8389\a\bOK 0 -1\a\bOK 0 0\a\bTajny vzkaz.\a\b")
+        received = b""
+        while not received.endswith(b"106 LOGOUT\a\b"):
+            data = client.recv(1024)
+            assert data != b""
+            received += data
+        assert received == b"200 OK\a\b102 MOVE\a\b102 MOVE\a\b105 GET MESSAGE\a\b106 LOGOUT\a\b"
+
+
+def test_workers_share_port(supervisor):
+    before = supervisor.connection_count
+    for _ in range(10):
+        run_example(supervisor.port)
+    time.sleep(0.1)
+    assert supervisor.connection_count == before + 10
+
+
+def test_dead_worker_is_restarted(supervisor):
+    old_pid = supervisor.processes[0].pid
+    os.kill(old_pid, signal.SIGKILL)
+    for _ in range(50):
+        time.sleep(0.1)
+        process = supervisor.processes[0]
+        if process.pid != old_pid and process.is_alive():
+            break
+    assert supervisor.processes[0].pid != old_pid
+    assert supervisor.restarts >= 1
+    time.sleep(0.3)
+    for _ in range(4):
+        run_example(supervisor.port)
+
+
+class FailingServer(RobotServer):
+    def start(self):
+        raise OSError("Address already in use")
+
+
+def test_failing_worker_is_restarted_with_backoff(caplog):
+    server = MultiProcessRobotServer(HOST, free_port(), 1, FailingServer)
+    thread = threading.Thread(target=server.start)
+    thread.daemon = True
+    thread.start()
+    time.sleep(2)
+    server.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    # restarted after 0.5, 1 and 2 seconds
+    assert 1 <= server.restarts <= 2
+    assert "Worker 0 exited with code 1, restarting in 1.0s" in caplog.text
+
+
+class HangingServer(RobotServer):
+    def start(self):
+        time.sleep(60)
+
+    def stop(self):
+        pass
+
+
+def test_hanging_worker_is_killed(monkeypatch, caplog):
+    monkeypatch.setattr(multiprocess, "STOP_TIMEOUT", 0.5)
+    server = MultiProcessRobotServer(HOST, free_port(), 1, HangingServer)
+    thread = threading.Thread(target=server.start)
+    thread.daemon = True
+    thread.start()
+    time.sleep(0.5)
+    process = server.processes[0]
+    start = time.monotonic()
+    server.stop()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 2
+    assert process.exitcode == -signal.SIGKILL
+    assert "Worker 0 didn't exit in 0.5s, killing it" in caplog.text
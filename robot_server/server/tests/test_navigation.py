@@ -0,0 +1,58 @@
+import pytest
+
+from robot_server.server.map import NavigationStrategy, RobotMap, Action
+from robot_server.server.navigation import STRATEGIES, DEFAULT_STRATEGY, register_strategy, \
+    get_strategy
+from robot_server.server.obstacles import ObstacleStore
+from robot_server.server.planner import PlanningRobotMap
+from robot_server.server.session import RobotSession
+
+
+class StraightStrategy(NavigationStrategy):
+    def __init__(self, shared_obstacles=None):
+        self.position = None
+
+    def update_position(self, position):
+        self.position = position
+        return Action.MOVE
+
+    def get_map_state(self):
+        return None
+
+
+@pytest.fixture
+def straight_strategy():
+    register_strategy("straight", StraightStrategy)
+    yield StraightStrategy
+    del STRATEGIES["straight"]
+
+
+def test_builtin_strategies():
+    assert get_strategy(DEFAULT_STRATEGY) is RobotMap
+    assert get_strategy("planner") is PlanningRobotMap
+    for strategy_class in STRATEGIES.values():
+        assert issubclass(strategy_class, NavigationStrategy)
+        assert strategy_class(ObstacleStore()).update_position((3, 4)) == Action.MOVE
+
+
+def test_register_strategy(straight_strategy):
+    assert get_strategy("straight") is straight_strategy
+    with pytest.raises(ValueError):
+        register_strategy("straight", RobotMap)
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError, match="greedy"):
+        get_strategy("unknown")
+
+
+def test_strategy_is_abstract():
+    with pytest.raises(TypeError):
+        NavigationStrategy()
+
+
+def test_session_strategy(straight_strategy):
+    session = RobotSession(("127.0.0.1", 0), navigation_strategy=straight_strategy)
+    session.feed(b"Oompa Loompa\a\b0\a\b8389\a\b")
+    assert session.feed(b"OK 0 -3\a\bOK 0 -3\a\bOK 0 -3\a\b") == b"102 MOVE\a\b" * 3
+    assert session.robot_map.position == (0, -3)
@@ -0,0 +1,114 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from robot_server.server.obstacles import ObstacleStore, SharedMemoryObstacleStore, \
+    MappedObstacleStore
+
+
+@pytest.fixture(params=[ObstacleStore, SharedMemoryObstacleStore, MappedObstacleStore])
+def store(request, tmp_path):
+    if request.param is MappedObstacleStore:
+        return MappedObstacleStore(tmp_path / "obstacles.bin")
+    return request.param()
+
+
+def test_add(store):
+    assert (1, 2) not in store
+    store.add((1, 2))
+    store.add((1, 2))
+    store.add((-3, 4))
+    assert (1, 2) in store
+    assert (-3, 4) in store
+    assert (2, 1) not in store
+    assert len(store) == 2
+
+
+def test_concurrent_adds(store):
+    def add_row(y):
+        for x in range(200):
+            store.add((x, y))
+
+    threads = [threading.Thread(target=add_row, args=(y,)) for y in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(store) == 8 * 200
+
+
+def _add_in_child(store, position):
+    store.add(position)
+
+
+def test_shared_between_processes():
+    store = SharedMemoryObstacleStore()
+    store.add((1, 1))
+    process = multiprocessing.Process(target=_add_in_child, args=(store, (-5, 7)))
+    process.start()
+    process.join(5)
+    assert process.exitcode == 0
+    assert (-5, 7) in store
+    assert (1, 1) in store
+    assert len(store) == 2
+
+
+def _add_row_in_child(store, length):
+    for x in range(length):
+        store.add((x, 0))
+
+
+def test_full_log_keeps_obstacles_in_the_process():
+    store = SharedMemoryObstacleStore(capacity=2)
+    process = multiprocessing.Process(target=_add_row_in_child, args=(store, 3))
+    process.start()
+    process.join(5)
+    assert process.exitcode == 0
+    assert (0, 0) in store and (1, 0) in store
+    assert (2, 0) not in store
+    store.add((5, 5))
+    assert (5, 5) in store
+
+
+def test_mapped_store_survives_reopening(tmp_path):
+    store = MappedObstacleStore(tmp_path / "obstacles.bin")
+    positions = [(x, 3 * x % 1000 - 500) for x in range(-9999, 10000, 7)]
+    for position in positions:
+        store.add(position)
+    store.close()
+
+    store = MappedObstacleStore(tmp_path / "obstacles.bin")
+    assert len(store) == len(positions)
+    assert all(position in store for position in positions)
+    assert (1, 1) not in store
+
+
+def test_mapped_store_coordinates(tmp_path):
+    store = MappedObstacleStore(tmp_path / "obstacles.bin")
+    for position in [(-10000, -10000), (10000, 10000), (-10000, 10000)]:
+        store.add(position)
+        assert position in store
+    assert (20000, 0) not in store
+    assert (0, -20000) not in store
+    with pytest.raises(ValueError):
+        store.add((0, 20000))
+
+
+def test_mapped_store_rejects_other_files(tmp_path):
+    path = tmp_path / "obstacles.bin"
+    path.write_bytes(b"not an obstacle store")
+    with pytest.raises(ValueError):
+        MappedObstacleStore(path)
+
+
+def test_mapped_store_shared_between_processes(tmp_path):
+    store = MappedObstacleStore(tmp_path / "obstacles.bin")
+    store.add((1, 1))
+    process = multiprocessing.Process(target=_add_row_in_child, args=(store, 5000))
+    process.start()
+    process.join(5)
+    assert process.exitcode == 0
+    assert all((x, 0) in store for x in range(5000))  # beyond the mapping of the parent
+    assert (1, 1) in store
+    assert len(store) == 5001
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+from robot_server.server.map import RobotMap, Action, Rotation, add_positions
+from robot_server.server.obstacles import ObstacleStore
+from robot_server.server.planner import plan_path, PlanningRobotMap
+
+
+def turned(rotation, action):
+    turn = 1 if action == Action.TURN_RIGHT else 3
+    return Rotation((rotation.value + turn) % 4)
+
+
+def follow(position, rotation, actions, obstacles=frozenset()):
+    for action in actions:
+        if action == Action.MOVE:
+            position = add_positions(position, rotation.to_coordinate())
+            assert position not in obstacles
+        else:
+            rotation = turned(rotation, action)
+    return position
+
+
+@pytest.mark.parametrize(
+    'position, rotation, obstacles, expected_length',
+    [
+        ((0, -3), Rotation.UP, set(), 3),
+        ((0, -3), Rotation.DOWN, set(), 5),
+        ((2, -3), Rotation.DOWN, set(), 7),
+        ((2, -3), Rotation.LEFT, set(), 6),
+        ((0, -3), Rotation.UP, {(0, -1)}, 8),
+        ((0, 0), Rotation.LEFT, set(), 0),
+    ])
+def test_plan_path(position, rotation, obstacles, expected_length):
+    actions = plan_path(position, rotation, obstacles)
+    assert len(actions) == expected_length
+    assert follow(position, rotation, actions, obstacles) == (0, 0)
+
+
+def drive(robot_map, obstacles, position, rotation):
+    action = Action.MOVE
+    for commands in range(1, 1000):
+        if action == Action.MOVE:
+            next_position = add_positions(position, rotation.to_coordinate())
+            if next_position not in obstacles:
+                position = next_position
+        else:
+            rotation = turned(rotation, action)
+        action = robot_map.update_position(position)
+        if position == (0, 0):
+            return commands
+    raise AssertionError("The robot didn't reach the center")
+
+
+def test_replans_around_new_obstacles():
+    obstacles = {(0, -4), (1, -1), (-3, 0)}
+    commands = drive(PlanningRobotMap(), obstacles, (0, -8), Rotation.UP)
+    assert commands == drive(RobotMap(), obstacles, (0, -8), Rotation.UP)
+
+
+def test_never_worse_than_greedy():
+    rng = random.Random(0)
+    for _ in range(50):
+        obstacles = {(rng.randint(-5, 5) * 3, rng.randint(-5, 5) * 3) for _ in range(20)}
+        obstacles.discard((0, 0))
+        position = (rng.randint(-7, 7) * 2 + 1, rng.randint(-7, 7) * 2 + 1)
+        rotation = rng.choice(list(Rotation))
+        assert drive(PlanningRobotMap(), obstacles, position, rotation) \
+               <= drive(RobotMap(), obstacles, position, rotation)
+
+
+def test_known_obstacles_are_avoided():
+    robot_map = PlanningRobotMap()
+    robot_map.add_obstacle((0, -2))
+    assert robot_map.update_position((0, -4)) == Action.MOVE
+    assert robot_map.update_position((0, -3)) == Action.TURN_RIGHT
+    assert robot_map.obstacles == [(0, -2)]
+
+
+def test_falls_back_to_greedy_without_path():
+    shared_obstacles = ObstacleStore()
+    for x in range(-2, 3):  # stale obstacles cutting the search rectangle in two
+        shared_obstacles.add((x, -2))
+    commands = drive(PlanningRobotMap(shared_obstacles), set(), (0, -6), Rotation.UP)
+    assert commands == drive(RobotMap(shared_obstacles), set(), (0, -6), Rotation.UP)
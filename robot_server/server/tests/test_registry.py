@@ -0,0 +1,48 @@
+import gc
+import weakref
+
+from robot_server.server.registry import SessionRegistry, SessionSummary
+from robot_server.server.session import RobotSession
+
+
+def new_session(port):
+    return RobotSession(("127.0.0.1", port))
+
+
+def test_finished_sessions_are_dropped():
+    registry = SessionRegistry(history=2)
+    sessions = [new_session(port) for port in range(3)]
+    for session in sessions:
+        registry.add(session)
+    assert len(registry) == 3
+    assert registry.total == 3
+
+    sessions[0].feed(b"")
+    sessions[1].feed(b"Oompa Loompa\a\b0\a\b8389\a\bOK 0 0\a\bsecret\a\b")
+    assert registry.live == [sessions[2]]
+    assert registry.finished == 1
+    assert registry.errored == 1
+    assert list(registry.recent) == [
+        SessionSummary(("127.0.0.1", 0), "error", "Closed by client"),
+        SessionSummary(("127.0.0.1", 1), "final", None),
+    ]
+
+    sessions[2].to_final()
+    assert len(registry) == 0
+    assert len(registry.recent) == 2
+    assert registry.recent[-1].address == ("127.0.0.1", 2)
+
+
+def test_registry_does_not_keep_sessions_alive():
+    registry = SessionRegistry(history=0)
+    references = []
+    for port in range(100):
+        session = new_session(port)
+        registry.add(session)
+        references.append(weakref.ref(session))
+        session.on_timeout()
+    del session
+    gc.collect()
+    assert len(registry) == 0
+    assert registry.errored == 100
+    assert all(reference() is None for reference in references)
@@ -1,22 +1,24 @@
 import socket
 import time
 
-from robot_server.server import RobotServer
+from robot_server.server import RobotServer, AsyncRobotServer, PooledRobotServer
 import pytest
 import threading
 from random import randrange
 
-HOST, PORT = "127.0.0.1", randrange(49152, 65535)
+HOST = "127.0.0.1"
 
 
-@pytest.fixture(scope="module", autouse=True)
-def server():
-    server = RobotServer(host=HOST, port=PORT)
+@pytest.fixture(scope="module", autouse=True,
+                params=[RobotServer, AsyncRobotServer, PooledRobotServer])
+def server(request):
+    port = randrange(49152, 65535)
+    server = request.param(host=HOST, port=port)
     thread = threading.Thread(target=server.start)
     thread.daemon = True
     thread.start()
     time.sleep(0.1)
-    yield
+    yield port
     server.stop()
 
 
@@ -24,7 +26,7 @@ def server():
 def client(server):
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     time.sleep(0.1)
-    s.connect((HOST, PORT))
+    s.connect((HOST, server))
     yield s
     s.close()
 
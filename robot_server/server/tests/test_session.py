@@ -0,0 +1,200 @@
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from robot_server.bridge.thread_event import StateUpdate, MapUpdate, MessageStackUpdate, \
+    MessageProcessed
+from robot_server.server import session as session_module
+from robot_server.server.obstacles import ObstacleStore
+from robot_server.server.session import RobotSession, TIMEOUT, TIMEOUT_RECHARGING
+from robot_server.server.thread_observer import RobotThreadObserver
+
+
+@pytest.fixture(scope="function")
+def session():
+    return RobotSession(("127.0.0.1", 0))
+
+
+@pytest.fixture(scope="function")
+def authorized_session(session):
+    assert session.feed(b"Oompa Loompa\a\b") == b"107 KEY REQUEST\a\b"
+    assert session.feed(b"0\a\b") == b"64907\a\b"
+    assert session.feed(b"8389\a\b") == b"200 OK\a\b102 MOVE\a\b"
+    return session
+
+
+def test_example(authorized_session):
+    assert authorized_session.feed(b"OK 0 -1\a\b") == b"102 MOVE\a\b"
+    assert authorized_session.feed(b"OK 0 0\a\b") == b"105 GET MESSAGE\a\b"
+    assert not authorized_session.stop_flag
+    assert authorized_session.feed(b"Tajny vzkaz.\a\b") == b"106 LOGOUT\a\b"
+    assert authorized_session.stop_flag
+    assert authorized_session.state == "final"
+
+
+def test_fragmented_and_pipelined(session):
+    responses = b""
+    for byte in b"Oompa Loompa\a\b0\a":
+        responses += session.feed(bytes([byte]))
+    assert responses == b"107 KEY REQUEST\a\b"
+    assert session.feed(b"\b8389\a\bOK 0 -1\a\b") == \
+           b"64907\a\b200 OK\a\b102 MOVE\a\b102 MOVE\a\b"
+
+
+def test_recharging_timeout(authorized_session):
+    assert authorized_session.timeout == TIMEOUT
+    assert authorized_session.feed(b"RECHARGING\a\b") == b""
+    assert authorized_session.timeout == TIMEOUT_RECHARGING
+    assert authorized_session.feed(b"FULL POWER\a\bOK 0 -1\a\b") == b"102 MOVE\a\b"
+    assert authorized_session.timeout == TIMEOUT
+
+
+def test_shared_obstacles():
+    shared = ObstacleStore()
+    first, second = (RobotSession(("127.0.0.1", port), shared) for port in (0, 1))
+    for session in (first, second):
+        session.feed(b"Oompa Loompa\a\b0\a\b8389\a\b")
+    assert first.feed(b"OK 0 -3\a\bOK 0 -2\a\bOK 0 -2\a\b") == \
+           b"102 MOVE\a\b102 MOVE\a\b104 TURN RIGHT\a\b"
+    assert second.feed(b"OK 0 -3\a\bOK 0 -2\a\b") == b"102 MOVE\a\b104 TURN RIGHT\a\b"
+
+
+class RecordingObserver(RobotThreadObserver):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def on_thread_event(self, event):
+        self.events.append(event)
+
+
+def test_subscriptions(session):
+    everything, states, maps = RecordingObserver(), RecordingObserver(), RecordingObserver()
+    session.add_observer(everything)
+    session.add_observer(states, {StateUpdate})
+    session.add_observer(maps, [MapUpdate])
+    session.feed(b"Oompa Loompa\a\b0\a\b8389\a\bOK 0 -1\a\b")
+    assert {type(event) for event in everything.events} == \
+           {StateUpdate, MapUpdate, MessageStackUpdate, MessageProcessed}
+    assert [event.state_name for event in states.events] == \
+           [event.state_name for event in everything.events if isinstance(event, StateUpdate)]
+    assert [event.map_state.position for event in maps.events] == [(0, -1)]
+    with pytest.raises(ValueError):
+        session.add_observer(RecordingObserver(), {int})
+
+
+def test_events_are_only_built_for_subscribers(session, monkeypatch):
+    def get_map_state():
+        raise AssertionError("the map state was built")
+
+    monkeypatch.setattr(session.robot_map, "get_map_state", get_map_state)
+    session.add_observer(RecordingObserver(), {StateUpdate})
+    session.feed(b"Oompa Loompa\a\b0\a\b8389\a\b")
+    assert session.feed(b"OK 0 -1\a\bOK 0 0\a\b") == b"102 MOVE\a\b105 GET MESSAGE\a\b"
+
+
+def test_timeout(authorized_session):
+    assert authorized_session.on_timeout() == b""
+    assert authorized_session.stop_flag
+    assert authorized_session.error == "Timeout"
+
+
+def test_closed_by_client(session):
+    assert session.feed(b"") == b""
+    assert session.stop_flag
+    assert session.error == "Closed by client"
+    assert session.feed(b"Oompa Loompa\a\b") == b""
+
+
+def test_syntax_length_error(authorized_session):
+    assert authorized_session.feed(b"OK 4 ") == b""
+    assert authorized_session.feed(b"42124124 ") == b"301 SYNTAX ERROR\a\b"
+    assert authorized_session.state == "error"
+
+
+def test_invalid_prefix_rejected_early(authorized_session):
+    assert authorized_session.feed(b"OK 4 -") == b""
+    assert authorized_session.feed(b"x") == b"301 SYNTAX ERROR\a\b"
+    assert authorized_session.stop_flag
+    assert authorized_session.error == "Invalid message"
+
+
+def test_partial_end_sequence_not_rejected(session):
+    assert session.feed(b"Oompa Loompa\a\b") == b"107 KEY REQUEST\a\b"
+    assert session.feed(b"0\a") == b""
+    assert session.feed(b"\b") == b"64907\a\b"
+
+
+def test_tail_validated_in_new_state(authorized_session):
+    assert authorized_session.feed(b"OK 0 -1\a\bRECHARGING\a\bOK") == b"102 MOVE\a\b"
+    assert authorized_session.feed(b" 0 1\a\b") == b"302 LOGIC ERROR\a\b"
+    assert authorized_session.error == "Logic error"
+
+
+@pytest.mark.parametrize("pieces", [[b"O", b"K 0 1\a\b"], [b"OK 0 1\a", b"\b"]])
+def test_logic_error_in_pieces(authorized_session, pieces):
+    assert authorized_session.feed(b"RECHARGING\a\b") == b""
+    for piece in pieces[:-1]:
+        assert authorized_session.feed(piece) == b""
+    assert authorized_session.feed(pieces[-1]) == b"302 LOGIC ERROR\a\b"
+
+
+def test_recharging_length_limit(authorized_session):
+    assert authorized_session.feed(b"RECHARGING\a\b") == b""
+    assert authorized_session.feed(b"x" * 10) == b""
+    assert authorized_session.feed(b"x") == b"301 SYNTAX ERROR\a\b"
+    assert authorized_session.error == "Exceeded length"
+
+
+def test_message_length_limit(authorized_session):
+    assert authorized_session.feed(b"OK 0 0\a\b") == b"105 GET MESSAGE\a\b"
+    assert authorized_session.feed(b"x" * 98) == b""
+    assert authorized_session.feed(b"x") == b"301 SYNTAX ERROR\a\b"
+    assert authorized_session.error == "Exceeded length"
+
+
+def test_logic_error(authorized_session):
+    authorized_session.feed(b"RECHARGING\a\b")
+    assert authorized_session.feed(b"OK 0 -1\a\b") == b"302 LOGIC ERROR\a\b"
+    assert authorized_session.error == "Logic error"
+
+
+def receive(session, data: bytes) -> bytes:
+    buffer = session.receive_buffer()
+    buffer[:len(data)] = data
+    return session.feed_received(len(data))
+
+
+def test_receive_buffer(authorized_session):
+    assert receive(authorized_session, b"OK 0 -1\a\bOK") == b"102 MOVE\a\b"
+    assert receive(authorized_session, b" 0 0\a\b") == b"105 GET MESSAGE\a\b"
+    assert receive(authorized_session, b"") == b""
+    assert authorized_session.error == "Closed by client"
+
+
+def test_steady_state_retains_no_memory(authorized_session):
+    # the messages still allocate transient objects, e.g. matches, values and the response,
+    # which tracemalloc can't count once they are freed, so only retained growth is checked
+    def move(y):
+        assert receive(authorized_session, b"OK 0 %d\a\b" % y) == b"102 MOVE\a\b"
+
+    for y in range(-9000, -6000):  # until the caches of the interpreter are filled
+        move(y)
+    messages = 1000
+    server_code = [tracemalloc.Filter(True, f"{Path(session_module.__file__).parent}/*")]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(server_code)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for y in range(-6000, -6000 + messages):
+            move(y)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(server_code)
+    finally:
+        tracemalloc.stop()
+    # the blocks allocated by the server code for the messages and still alive
+    retained_blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+    assert retained_blocks / messages < 0.01
+    assert peak - memory < 8192
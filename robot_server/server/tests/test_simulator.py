@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from robot_server.server.map import RobotMap, Rotation
+from robot_server.server.navigation import STRATEGIES
+from robot_server.server.simulator import World, RunResult, Summary, simulate, simulate_seeds
+
+# regression gate of the navigation: the seeds and the limits of the mean number of commands
+# of every registered strategy, by the fraction of the obstacles known in advance.
+# Without known obstacles the planner can't plan around anything, so it drives like greedy.
+GATE_SEEDS = range(500)
+GATE_LIMITS = {
+    0.0: {"greedy": 31.5, "planner": 31.5},
+    0.5: {"greedy": 30.5, "planner": 29.25},
+}
+
+
+def test_world_follows_the_rules():
+    for seed in range(20):
+        rng = random.Random(seed)
+        world = World.generate(rng)
+        assert world.obstacles
+        assert (0, 0) not in world.obstacles
+        for x, y in world.obstacles:
+            assert not any((x + dx, y + dy) in world.obstacles
+                           for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0))
+        position, rotation = world.random_start(rng)
+        assert position != (0, 0)
+        assert position not in world.obstacles
+        assert isinstance(rotation, Rotation)
+
+
+def test_try_add_obstacle():
+    world = World()
+    assert world.try_add_obstacle((2, 2))
+    assert not world.try_add_obstacle((3, 1))
+    assert not world.try_add_obstacle((0, 0))
+    assert world.try_add_obstacle((4, 2))
+    assert world.obstacles == {(2, 2), (4, 2)}
+
+
+@pytest.mark.parametrize(
+    'world, position, rotation, expected',
+    [
+        (World(), (0, -3), Rotation.UP, RunResult(3, 3, 0, 0, True)),
+        (World(), (0, -3), Rotation.DOWN, RunResult(9, 7, 2, 0, True)),
+        (World({(0, -2)}), (0, -3), Rotation.UP, RunResult(10, 7, 3, 2, True)),
+    ])
+def test_simulate(world, position, rotation, expected):
+    assert simulate(RobotMap(), world, position, rotation) == expected
+
+
+def test_simulate_gives_up():
+    result = simulate(RobotMap(), World(), (0, -30), Rotation.UP, max_commands=10)
+    assert result == RunResult(10, 10, 0, 0, False)
+
+
+def test_seeds_are_reproducible():
+    assert simulate_seeds(RobotMap, range(5)) == simulate_seeds(RobotMap, range(5))
+
+
+def test_summary():
+    summary = Summary.of([RunResult(10, 8, 2, 0, True), RunResult(20, 15, 5, 21, False)])
+    assert summary.runs == 2
+    assert summary.commands.mean == 15
+    assert summary.commands.maximum == 20
+    assert summary.unreached == 1
+    assert summary.broken == 1
+
+
+@pytest.mark.parametrize('known', GATE_LIMITS)
+@pytest.mark.parametrize('name', STRATEGIES)
+def test_navigation_regression_gate(name, known):
+    summary = Summary.of(simulate_seeds(STRATEGIES[name], GATE_SEEDS, known=known))
+    assert summary.unreached == 0
+    assert summary.broken == 0
+    assert summary.commands.mean <= GATE_LIMITS[known][name]
@@ -0,0 +1,78 @@
+import pytest
+
+from robot_server.server.messages import ClientMessages, CheckLevel, MessageClassifier
+from robot_server.server.session import MessageState, RobotSession
+from robot_server.server.state_machine import StateMachine, Transition
+
+CLASSIFIER = MessageClassifier([ClientMessages.CLIENT_RECHARGING,
+                                ClientMessages.CLIENT_KEY_ID])
+
+
+class Model:
+    def __init__(self):
+        self.state_index = 0
+        self.calls = []
+
+
+def record(name):
+    return lambda model, *args: model.calls.append(name)
+
+
+@pytest.fixture(scope="function")
+def machine():
+    states = [
+        MessageState("idle", on_exit=record("exit idle")),
+        MessageState("busy", on_enter=record("enter busy")),
+        MessageState("failed"),
+    ]
+    return StateMachine(states, [
+        Transition("*", "busy", ClientMessages.CLIENT_RECHARGING),
+        Transition("idle", "busy", ClientMessages.CLIENT_KEY_ID, CheckLevel.LOGIC,
+                   condition=lambda model, classification: classification.value != 0,
+                   before=record("before"), after=record("after")),
+        Transition("idle", None, ClientMessages.CLIENT_KEY_ID, after=record("internal")),
+        Transition(["idle", "busy"], "failed"),
+    ], after_state_change=record("changed"))
+
+
+def test_callback_order(machine):
+    model = Model()
+    assert machine.process(model, CLASSIFIER.classify(b"3"))
+    assert model.state_index == machine.index("busy")
+    assert model.calls == ["before", "exit idle", "enter busy", "after", "changed"]
+
+
+@pytest.mark.parametrize(
+    'message, state, calls',
+    [
+        (b"0", "idle", ["internal"]),
+        (b"9", "idle", ["internal"]),
+        (b"RECHARGING", "busy", ["exit idle", "enter busy", "changed"]),
+        (b"garbage", "failed", ["exit idle", "changed"]),
+    ])
+def test_precedence(machine, message, state, calls):
+    model = Model()
+    assert machine.process(model, CLASSIFIER.classify(message))
+    assert machine.states[model.state_index].name == state
+    assert model.calls == calls
+
+
+def test_no_transition(machine):
+    model = Model()
+    model.state_index = machine.index("failed")
+    assert not machine.process(model, CLASSIFIER.classify(b"1"))
+    assert model.calls == []
+
+
+def test_go_to(machine):
+    model = Model()
+    machine.go_to(model, "failed")
+    assert model.state_index == machine.index("failed")
+    assert model.calls == ["exit idle", "changed"]
+
+
+def test_table_is_shared():
+    first, second = RobotSession(("127.0.0.1", 0)), RobotSession(("127.0.0.1", 1))
+    assert first.machine is second.machine
+    first.feed(b"Oompa Loompa\a\b")
+    assert (first.state, second.state) == ("wait_key_id", "wait_username")
@@ -0,0 +1,70 @@
+import pytest
+
+from robot_server.server.timer_wheel import TimerWheel
+
+
+@pytest.fixture(scope="function")
+def wheel():
+    return TimerWheel(resolution=0.01, slots=64, now=100.0)
+
+
+def test_arm_and_expire(wheel):
+    wheel.arm("a", 1, now=100.0)
+    wheel.arm("b", 0.5, now=100.0)
+    assert len(wheel) == 2
+    assert wheel.expire(now=100.49) == []
+    assert wheel.expire(now=100.5) == ["b"]
+    assert "b" not in wheel
+    assert wheel.expire(now=100.99) == []
+    assert wheel.expire(now=101.0) == ["a"]
+    assert len(wheel) == 0
+
+
+def test_rearm(wheel):
+    wheel.arm("a", 1, now=100.0)
+    wheel.arm("a", 1, now=100.8)
+    assert len(wheel) == 1
+    assert wheel.expire(now=101.5) == []
+    assert wheel.expire(now=101.8) == ["a"]
+
+
+def test_cancel(wheel):
+    wheel.arm("a", 1, now=100.0)
+    wheel.cancel("a")
+    wheel.cancel("missing")
+    assert wheel.expire(now=102) == []
+    assert wheel.next_timeout(now=102) is None
+
+
+def test_longer_than_revolution(wheel):
+    # 64 slots of 0.01 s cover 0.64 s, so TIMEOUT_RECHARGING needs several rounds
+    wheel.arm("recharging", 5, now=100.0)
+    wheel.arm("short", 0.3, now=100.0)
+    expired = []
+    now = 100.0
+    while now < 104.9:
+        now += 0.05
+        expired += wheel.expire(now=now)
+    assert expired == ["short"]
+    assert wheel.expire(now=105.0) == ["recharging"]
+
+
+def test_jump_over_revolution(wheel):
+    wheel.arm("late", 2, now=100.0)
+    wheel.arm("early", 0.1, now=100.0)
+    wheel.arm("future", 50, now=100.0)
+    assert wheel.expire(now=103) == ["early", "late"]
+    assert "future" in wheel
+
+
+def test_next_timeout(wheel):
+    assert wheel.next_timeout(now=100.0) is None
+    wheel.arm("a", 0.2, now=100.0)
+    assert wheel.next_timeout(now=100.0) == pytest.approx(0.2)
+    assert wheel.next_timeout(now=100.3) == 0.0
+
+
+def test_arm_in_past(wheel):
+    wheel.expire(now=101)
+    wheel.arm("a", -5, now=101)
+    assert wheel.expire(now=101.01) == ["a"]
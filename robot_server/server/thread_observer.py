@@ -14,6 +14,10 @@ class RobotThreadObserver(ABC):
 
     # pylint: disable=too-few-public-methods
 
+    # cheap observers which must see every event at once, e.g. the bookkeeping of the server,
+    # are called by the session even if the server delivers the events from a queue
+    synchronous = False
+
     def __init__(self):
         pass
 
@@ -0,0 +1,113 @@
+"""
+This module contains the TimerWheel class, a hashed timer wheel used by
+event-driven engines to enforce TIMEOUT and TIMEOUT_RECHARGING.
+"""
+
+import math
+import time
+from typing import Hashable, Optional
+
+DEFAULT_RESOLUTION = 0.01
+DEFAULT_SLOTS = 1024
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel which keeps at most one deadline per key.
+    Time is divided into ticks of the given resolution and every tick is
+    hashed into one of the slots, so arming, re-arming and cancelling a timer
+    are O(1). Timers never fire early and fire at most one tick late.
+    All times come from the monotonic clock unless given explicitly.
+    """
+    def __init__(self, resolution=DEFAULT_RESOLUTION, slots=DEFAULT_SLOTS, now=None):
+        """
+        :param resolution: The length of one tick in seconds.
+        :param slots: The number of slots of the wheel.
+        :param now: The current time, defaults to time.monotonic().
+        """
+        self.resolution = resolution
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._timers: dict[Hashable, int] = {}
+        self._tick = math.floor((time.monotonic() if now is None else now) / resolution)
+
+    def __len__(self):
+        return len(self._timers)
+
+    def __contains__(self, key):
+        return key in self._timers
+
+    def arm(self, key: Hashable, timeout: float, now: Optional[float] = None):
+        """
+        Sets the deadline of the key to now + timeout, replacing its previous deadline.
+
+        :param key: The key the timer belongs to, e.g. a connection.
+        :param timeout: The number of seconds until the timer fires.
+        :param now: The current time, defaults to time.monotonic().
+        """
+        now = time.monotonic() if now is None else now
+        tick = max(math.ceil((now + timeout) / self.resolution), self._tick + 1)
+        old_tick = self._timers.get(key)
+        if old_tick is not None:
+            del self._slots[old_tick % len(self._slots)][key]
+        self._slots[tick % len(self._slots)][key] = tick
+        self._timers[key] = tick
+
+    def cancel(self, key: Hashable):
+        """
+        Removes the timer of the key, if there is any.
+
+        :param key: The key the timer belongs to.
+        """
+        tick = self._timers.pop(key, None)
+        if tick is not None:
+            del self._slots[tick % len(self._slots)][key]
+
+    def expire(self, now: Optional[float] = None) -> list:
+        """
+        Advances the wheel to the given time and removes all timers
+        whose deadline has passed.
+
+        :param now: The current time, defaults to time.monotonic().
+        :return: The keys of the expired timers, in order of their deadlines.
+        """
+        now = time.monotonic() if now is None else now
+        current = math.floor(now / self.resolution)
+        if current <= self._tick:
+            return []
+        slot_count = len(self._slots)
+        if current - self._tick >= slot_count:
+            ticks = range(slot_count)  # a whole revolution passed, check every slot
+        else:
+            ticks = range(self._tick + 1, current + 1)
+        self._tick = current
+
+        expired = []
+        for tick in ticks:
+            slot = self._slots[tick % slot_count]
+            if not slot:
+                continue
+            due = [(deadline, key) for key, deadline in slot.items() if deadline <= current]
+            for _, key in due:
+                del slot[key]
+                del self._timers[key]
+            expired += due
+        if len(ticks) == slot_count:
+            expired.sort(key=lambda item: item[0])
+        return [key for _, key in expired]
+
+    def next_timeout(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Returns the number of seconds until the next timer could fire,
+        which is suitable as a select() timeout.
+
+        :param now: The current time, defaults to time.monotonic().
+        :return: The number of seconds, or None if no timer is armed.
+        """
+        if not self._timers:
+            return None
+        now = time.monotonic() if now is None else now
+        slot_count = len(self._slots)
+        for tick in range(self._tick + 1, self._tick + 1 + slot_count):
+            if self._slots[tick % slot_count]:
+                return max(0.0, tick * self.resolution - now)
+        return slot_count * self.resolution